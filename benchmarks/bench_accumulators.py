@@ -0,0 +1,92 @@
+"""Runtime of the code generated for `.=` accumulation in loops.
+
+PHP loops building a string with `$out .= ...` are translated twice: with
+the list buffer lowering (`out_parts.append(...)`, then one `"".join()`),
+and without it (`out += ...`). The generated code runs ITERATIONS times
+through the loop (default: 1M), and both versions must build the same
+string. The `+=` version is quadratic, so it runs at most PLAIN_ITERATIONS
+times (default: 100k, about half a minute): compare the time per iteration.
+
+CPython can sometimes extend a string in place on `+=` (when nothing else
+references it, and the interpreter specialized the loop for it), so how
+quadratic the `+=` version is varies between loops: the cases cover a
+`while` and a `foreach` loop in a function (loops at module level, where
+the accumulator is a global, are not lowered).
+
+Usage: python benchmarks/bench_accumulators.py [ITERATIONS] [PLAIN_ITERATIONS]
+"""
+import ast as py
+import sys
+import time
+
+from php2py import php_parser
+from php2py.translator import Translator
+
+CASES = {
+    "while, local": """<?php
+function run($n) {
+    $out = "";
+    $i = 0;
+    while ($i < $n) {
+        $out .= "<td>" . $i . "</td>";
+        $i += 1;
+    }
+    return $out;
+}
+""",
+    "foreach, local": """<?php
+function run($n) {
+    $out = "";
+    foreach (range(0, $n - 1) as $i) {
+        $out .= "<td>" . $i . "</td>";
+    }
+    return $out;
+}
+""",
+}
+
+
+class PlainTranslator(Translator):
+    """A translator without the lowering of accumulators."""
+
+    translate_for = Translator.translate_for.__wrapped__
+    translate_foreach = Translator.translate_foreach.__wrapped__
+    translate_while = Translator.translate_while.__wrapped__
+    translate_do = Translator.translate_do.__wrapped__
+
+
+def run(translator: Translator, source: str, iterations: int) -> tuple[float, str]:
+    code = py.unparse(translator.translate(php_parser.parse(source)))
+    compiled = compile(code, "<generated>", "exec")
+    namespace = {}
+    exec(compiled, namespace)  # noqa: S102
+    t0 = time.perf_counter()
+    result = namespace["run"](iterations)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    plain_iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    plain_iterations = min(iterations, plain_iterations)
+
+    print(f"+= : {plain_iterations} iterations, buffer: {iterations} iterations")
+    print(
+        f"{'case':<16} {'+=':>9} {'per iter':>9} {'buffer':>9} {'per iter':>9}"
+        f" {'speedup':>8}"
+    )
+    for name, source in CASES.items():
+        before, expected = run(PlainTranslator(), source, plain_iterations)
+        assert run(Translator(), source, plain_iterations)[1] == expected
+        after, _ = run(Translator(), source, iterations)
+        before_per_iter = before / plain_iterations * 1e6
+        after_per_iter = after / iterations * 1e6
+        print(
+            f"{name:<16} {before:8.3f}s {before_per_iter:7.2f}µs"
+            f" {after:8.3f}s {after_per_iter:7.2f}µs"
+            f" {before_per_iter / after_per_iter:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
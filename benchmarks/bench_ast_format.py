@@ -0,0 +1,50 @@
+"""Compare the compact AST wire format with the `php-parse -j` JSON format.
+
+Reports bytes on the wire and decode time (`json.loads` + AST construction).
+
+Usage: python benchmarks/bench_ast_format.py [ROUNDS] [FILE.php ...]
+"""
+import sys
+import time
+from pathlib import Path
+
+from php2py.parser import ParserWorker, decode_response, encode_source, install_parser
+
+PROGRAMS = Path(__file__).parent.parent / "tests" / "programs"
+
+
+def bench_decode(payloads, format, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for payload in payloads:
+            decode_response(payload, format)
+    return time.perf_counter() - t0
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    paths = [Path(arg) for arg in sys.argv[2:]] or sorted(PROGRAMS.glob("*.php"))
+
+    install_parser()
+    sources = [encode_source(path.read_text()) for path in paths]
+
+    results = {}
+    for format in ["json", "compact"]:
+        with ParserWorker(format=format) as worker:
+            payloads = [worker.request(source) for source in sources]
+        size = sum(len(payload) for payload in payloads)
+        results[format] = size, bench_decode(payloads, format, rounds)
+
+    print(f"{len(sources)} files, {rounds} rounds")
+    print(f"{'format':10} {'bytes':>12} {'decode (s)':>12}")
+    for format, (size, duration) in results.items():
+        print(f"{format:10} {size:12d} {duration:12.3f}")
+
+    json_size, json_time = results["json"]
+    compact_size, compact_time = results["compact"]
+    print(f"size ratio: {json_size / compact_size:.1f}x smaller")
+    print(f"decode speedup: {json_time / compact_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
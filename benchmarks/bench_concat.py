@@ -0,0 +1,71 @@
+"""Runtime of the code generated for PHP string concatenation.
+
+A generated template function concatenates literals and variables with `.`
+(`"<td>" . $name . "</td>" ...`). It is translated twice: with the current
+lowering (one f-string per `.` chain), and with the previous one (a chain
+of `+`, which builds an intermediate string per operand). Both are compiled
+and called with the same arguments, and must return the same string.
+
+Usage: python benchmarks/bench_concat.py [CALLS] [COLUMNS...]
+"""
+import ast as py
+import sys
+import time
+
+from php2py import php_parser
+from php2py.translator import Translator
+
+
+class AddChainTranslator(Translator):
+    """A translator with the previous lowering of `.` to `+`."""
+
+    def translate_concat(self, node):
+        return py.BinOp(self.translate(node.left), py.Add(), self.translate(node.right))
+
+
+def generate_source(columns: int) -> str:
+    """A PHP function rendering a table row of `columns` cells."""
+    params = ", ".join(f"$c{i}" for i in range(columns))
+    cells = " . ".join(
+        f'"<td class=\\"col{i}\\">" . $c{i} . "</td>"' for i in range(columns)
+    )
+    body = f'return "<tr>" . {cells} . "</tr>";'
+    return f"<?php\nfunction render_row({params}) {{ {body} }}\n"
+
+
+def compile_function(translator: Translator, source: str):
+    code = py.unparse(translator.translate(php_parser.parse(source)))
+    namespace = {}
+    exec(compile(code, "<generated>", "exec"), namespace)  # noqa: S102
+    return namespace["render_row"]
+
+
+def bench(func, args, calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter() - t0) / calls
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sizes = [int(arg) for arg in sys.argv[2:]] or [2, 10, 50]
+
+    print(f"{'columns':>8} {'+ chain':>10} {'f-string':>10} {'speedup':>8}")
+    for columns in sizes:
+        source = generate_source(columns)
+        before = compile_function(AddChainTranslator(), source)
+        after = compile_function(Translator(), source)
+        args = [f"value {i}" for i in range(columns)]
+        assert before(*args) == after(*args)
+
+        t_before = bench(before, args, calls)
+        t_after = bench(after, args, calls)
+        print(
+            f"{columns:>8} {t_before * 1e6:8.2f}µs {t_after * 1e6:8.2f}µs"
+            f" {t_before / t_after:7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Micro-benchmark of the translator's dispatch on node types.
+
+Compares the type-keyed dispatch table of `Translator.translate()` with the
+previous dispatch: a check of the class-name prefix (`Scalar_`, `Expr_`,
+`Stmt_`), then a `match` statement trying the node classes in order, so that
+nodes near the bottom (e.g. `Stmt_Do`) paid for every case before theirs.
+The previous `match` statements are rebuilt here, calling the current
+handlers, so that only the dispatch differs.
+
+Files default to `tests/programs/*.php` (parsed with the Python parser).
+
+Usage: python benchmarks/bench_dispatch.py [ROUNDS] [FILE...]
+"""
+import sys
+import time
+from pathlib import Path
+
+from php2py import php_ast, php_parser
+from php2py.translator import InstrumentedTranslator, TranslationStats, Translator
+
+PROGRAMS = Path(__file__).parent.parent / "tests" / "programs"
+
+# The cases of the previous `match` statements, in order.
+SCALAR_CASES = [
+    ["Scalar_String"],
+    ["Scalar_LNumber"],
+    ["Scalar_DNumber"],
+    ["Scalar_Encapsed"],
+]
+EXPR_CASES = [
+    ["Expr_Variable"],
+    ["Expr_ConstFetch"],
+    ["Expr_Array"],
+    ["Expr_UnaryOp"],
+    ["Expr_BinaryOp"],
+    ["Expr_Ternary"],
+    ["Expr_PostInc", "Expr_PreDec", "Expr_PreInc", "Expr_PostDec"],
+    ["Expr_Cast"],
+    ["Expr_AssignRef"],
+    ["Expr_AssignOp_Coalesce"],
+    ["Expr_AssignOp"],
+    ["Expr_Assign"],
+    ["Expr_Exit"],
+    ["Expr_PropertyFetch"],
+    ["Expr_Isset"],
+    ["Expr_Empty"],
+    ["Expr_FuncCall"],
+    ["Expr_New"],
+    ["Expr_MethodCall"],
+    ["Expr_StaticCall"],
+    ["Expr_ArrayDimFetch"],
+    ["Expr_ClassConstFetch"],
+    ["Expr_Closure"],
+    ["Expr_List"],
+    ["Expr_Instanceof"],
+    ["Expr_StaticPropertyFetch"],
+]
+STMT_CASES = [
+    ["Stmt_Nop"],
+    ["Stmt_Echo"],
+    ["Stmt_Expression"],
+    ["Stmt_Namespace"],
+    ["Stmt_Use"],
+    ["Stmt_UseUse"],
+    ["Stmt_InlineHTML"],
+    ["Stmt_Unset"],
+    ["Stmt_If"],
+    ["Stmt_For"],
+    ["Stmt_Foreach"],
+    ["Stmt_While"],
+    ["Stmt_Break"],
+    ["Stmt_Continue"],
+    ["Stmt_Class"],
+    ["Stmt_Interface"],
+    ["Stmt_ClassConst"],
+    ["Stmt_Function"],
+    ["Stmt_Return"],
+    ["Expr_Yield"],
+    ["Stmt_ClassMethod"],
+    ["Stmt_Switch"],
+    ["Stmt_Property"],
+    ["Stmt_TryCatch"],
+    ["Stmt_Throw"],
+    ["Stmt_Static"],
+    ["Stmt_Do"],
+]
+
+
+def make_match_lookup(cases: list[list[str]]):
+    """Return a function finding the handler of a node with a `match`."""
+    lines = ["def lookup(node):", "    match node:"]
+    handlers = []
+    for i, names in enumerate(cases):
+        patterns = " | ".join(f"php_ast.{name}()" for name in names)
+        lines.append(f"        case {patterns}:")
+        lines.append(f"            return handlers[{i}]")
+        handlers.append(Translator.resolve_handler(getattr(php_ast, names[0])))
+    lines.append("        case _:")
+    lines.append("            return Translator.translate_other")
+    namespace = {"php_ast": php_ast, "handlers": handlers, "Translator": Translator}
+    exec("\n".join(lines), namespace)  # noqa: S102
+    return namespace["lookup"]
+
+
+lookup_scalar = make_match_lookup(SCALAR_CASES)
+lookup_expr = make_match_lookup(EXPR_CASES)
+lookup_stmt = make_match_lookup(STMT_CASES)
+
+
+def prefix_lookup(node):
+    node_type = node.__class__.__name__
+    if node_type.startswith("Scalar_"):
+        return lookup_scalar(node)
+    if node_type.startswith("Expr_"):
+        return lookup_expr(node)
+    if node_type.startswith("Stmt_"):
+        return lookup_stmt(node)
+    if node_type in ("Name", "Name_FullyQualified"):
+        return Translator.translate_name
+    return Translator.translate_other
+
+
+class PrefixDispatchTranslator(Translator):
+    """A translator with the previous dispatch."""
+
+    def translate(self, node):
+        match node:
+            case [*_]:
+                return [self.translate(n) for n in node]
+            case php_ast.Node():
+                return prefix_lookup(node)(self, node)
+            case _:
+                return self.translate_unknown(node)
+
+
+def table_lookup(node):
+    handler = Translator.dispatch_table.get(node.__class__)
+    if handler is None:
+        handler = Translator.resolve_handler(node.__class__)
+    return handler
+
+
+def bench_lookup(lookup, node, n=200_000):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        lookup(node)
+    return (time.perf_counter() - t0) / n
+
+
+def bench_translate(translator_class, asts, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for tree in asts:
+            translator_class().translate_root(tree)
+    return time.perf_counter() - t0
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    paths = [Path(arg) for arg in sys.argv[2:]] or sorted(PROGRAMS.glob("*.php"))
+    asts = [php_parser.parse(path.read_text()) for path in paths]
+
+    print("Dispatch only (ns per node):")
+    print(f"{'node type':<24} {'match':>8} {'table':>8}")
+    samples = [
+        php_ast.Expr_Variable("a"),
+        php_ast.Scalar_String("a"),
+        php_ast.Stmt_Expression(None),
+        php_ast.Expr_StaticPropertyFetch(None, None),
+        php_ast.Stmt_TryCatch([], [], None),
+        php_ast.Stmt_Do(None, []),
+    ]
+    for node in samples:
+        before = bench_lookup(prefix_lookup, node) * 1e9
+        after = bench_lookup(table_lookup, node) * 1e9
+        print(f"{node.__class__.__name__:<24} {before:8.0f} {after:8.0f}")
+
+    stats = TranslationStats()
+    for tree in asts:
+        InstrumentedTranslator(stats=stats).translate_root(tree)
+    nodes = rounds * sum(node.count for node in stats.nodes.values())
+
+    before = bench_translate(PrefixDispatchTranslator, asts, rounds)
+    after = bench_translate(Translator, asts, rounds)
+    print()
+    print(f"Translation of {len(paths)} files x {rounds} ({nodes} nodes):")
+    print(f"match    {before:8.3f}s  {before / nodes * 1e6:6.2f} µs/node")
+    print(f"table    {after:8.3f}s  {after / nodes * 1e6:6.2f} µs/node")
+    print(f"speedup  {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Runtime of the code generated for loops with `count()`/`strlen()` in
+their condition.
+
+Each PHP function is translated twice: with the lengths computed once
+before the loop, and on each iteration (the previous translation). The
+generated code calls `count()` and `strlen()` helpers like those a PHP
+runtime provides (`strlen()` counts bytes, so it encodes the string). Both
+versions are called with the same argument, and must return the same result.
+
+Usage: python benchmarks/bench_hoisting.py [N]
+"""
+import ast as py
+import sys
+import time
+
+from php2py import php_parser
+from php2py.translator import Translator
+
+CASES = {
+    "for, count()": """<?php
+function run($items) {
+    $total = 0;
+    for ($i = 0; $i < count($items); $i++) {
+        $total += $items[$i];
+    }
+    return $total + $i;
+}
+""",
+    "while, strlen()": """<?php
+function run($items) {
+    $s = str_repeat("ab", count($items));
+    $vowels = 0;
+    $i = 0;
+    while ($i < strlen($s)) {
+        if ($s[$i] == "a") {
+            $vowels++;
+        }
+        $i++;
+    }
+    return $vowels;
+}
+""",
+}
+
+
+def count(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (list, dict)):
+        return len(value)
+    return 1
+
+
+def strlen(value) -> int:
+    return len(str(value).encode())
+
+
+def str_repeat(value: str, times: int) -> str:
+    return value * times
+
+
+class UnhoistedTranslator(Translator):
+    """A translator computing the lengths on each iteration."""
+
+    def hoist_lengths(self, cond, loop):
+        return [], self.translate(cond)
+
+
+def compile_run(translator: Translator, source: str):
+    code = py.unparse(translator.translate(php_parser.parse(source)))
+    namespace = {"count": count, "strlen": strlen, "str_repeat": str_repeat}
+    exec(compile(code, "<generated>", "exec"), namespace)  # noqa: S102
+    return namespace["run"]
+
+
+def bench(func, items: list) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    result = func(items)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    items = list(range(n))
+
+    print(f"{'case':<16} {'n':>7} {'each':>9} {'hoisted':>9} {'speedup':>8}")
+    for name, source in CASES.items():
+        before, expected = bench(compile_run(UnhoistedTranslator(), source), items)
+        after, result = bench(compile_run(Translator(), source), items)
+        assert result == expected
+        print(f"{name:<16} {n:>7} {before:8.3f}s {after:8.3f}s {before / after:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measure how `convert --jobs N` scales with the number of workers.
+
+A corpus of generated PHP files is converted with 1, 2, 4, 8 and 16 workers
+(pool startup included, as in a real run). The parse cache is disabled, so
+every run parses every file. Uses nikic/php-parser if PHP is installed, the
+Python parser otherwise.
+
+Usage: python benchmarks/bench_jobs.py [FILES] [LINES_PER_FILE]
+"""
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from php2py.main import main as convert
+
+JOBS = [1, 2, 4, 8, 16]
+
+
+def generate_source(lines: int, seed: int) -> str:
+    body = "".join(
+        f'$v{i} = "{i + seed}" . f($v{i}, [{i}, 2.5]);\n' for i in range(lines)
+    )
+    return f"<?php\n{body}"
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    parser = "nikic" if shutil.which("php") else "python"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i in range(files):
+            path = Path(tmp_dir) / f"file{i}.php"
+            path.write_text(generate_source(lines, i))
+            paths.append(path)
+
+        print(f"{files} files of {lines} lines, {parser} parser")
+        print(f"{'jobs':>4} {'seconds':>8} {'files/s':>8} {'speedup':>8} efficiency")
+        baseline = None
+        for jobs in JOBS:
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                convert(paths, False, use_cache=False, parser=parser, jobs=jobs)
+            seconds = time.perf_counter() - t0
+
+            baseline = baseline or seconds
+            speedup = baseline / seconds
+            print(
+                f"{jobs:4d} {seconds:8.2f} {files / seconds:8.1f}"
+                f" {speedup:7.2f}x {speedup / jobs:9.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Runtime of the code generated for nested counting for-loops.
+
+Each PHP function is translated twice: with counting loops as
+`for ... in range()`, and as `while` loops (an interpreted comparison and
+increment per iteration, the previous translation). Both versions are
+compiled, called with the same argument, and must return the same result.
+
+Usage: python benchmarks/bench_loops.py [N]
+"""
+import ast as py
+import sys
+import time
+
+from php2py import php_parser
+from php2py.translator import Translator
+
+CASES = {
+    "nested sum": """<?php
+function run($n) {
+    $total = 0;
+    for ($i = 0; $i < $n; $i++) {
+        for ($j = 0; $j < $n; $j++) {
+            $total += $i * $j;
+        }
+    }
+    return $total;
+}
+""",
+    "triangle": """<?php
+function run($n) {
+    $total = 0;
+    for ($i = 1; $i <= $n; $i++) {
+        for ($j = $i; $j > 0; $j -= 2) {
+            $total += $j % 7;
+        }
+    }
+    return $total;
+}
+""",
+    "matrix product": """<?php
+function run($n) {
+    $total = 0;
+    for ($i = 0; $i < $n; $i++) {
+        for ($j = 0; $j < $n; $j++) {
+            $cell = 0;
+            for ($k = 0; $k < $n; $k++) {
+                $cell += ($i + $k) * ($k - $j);
+            }
+            $total += $cell;
+        }
+    }
+    return $total;
+}
+""",
+}
+
+# Argument of each case, relative to N (the matrix product is cubic).
+SIZES = {"nested sum": 1.0, "triangle": 2.0, "matrix product": 0.1}
+
+
+class WhileTranslator(Translator):
+    """A translator with every for-loop as a `while` loop."""
+
+    def is_local_to_loop(self, var, loop):
+        return False
+
+
+def compile_run(translator: Translator, source: str):
+    code = py.unparse(translator.translate(php_parser.parse(source)))
+    namespace = {}
+    exec(compile(code, "<generated>", "exec"), namespace)  # noqa: S102
+    return namespace["run"]
+
+
+def bench(func, n: int) -> tuple[float, int]:
+    t0 = time.perf_counter()
+    result = func(n)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    print(f"{'case':<16} {'n':>6} {'while':>9} {'range':>9} {'speedup':>8}")
+    for name, source in CASES.items():
+        size = int(n * SIZES[name])
+        before, expected = bench(compile_run(WhileTranslator(), source), size)
+        after, result = bench(compile_run(Translator(), source), size)
+        assert result == expected
+        print(
+            f"{name:<16} {size:>6} {before:8.3f}s {after:8.3f}s"
+            f" {before / after:7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
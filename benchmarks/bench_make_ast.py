@@ -0,0 +1,89 @@
+"""Micro-benchmark of `make_ast()` on the ASTs of `tests/programs/*.php`.
+
+Compares the table-driven `make_ast()` with the previous implementation,
+which looked up the node class and rebuilt its field map for every node.
+
+Usage: python benchmarks/bench_make_ast.py [ROUNDS]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+from php2py import php_ast
+from php2py.parser import ParserWorker, encode_source, install_parser, make_ast
+
+PROGRAMS = Path(__file__).parent.parent / "tests" / "programs"
+
+
+def make_ast_reference(json_node):
+    """The implementation of `make_ast()` before the node registry."""
+    if isinstance(json_node, list):
+        return [make_ast_reference(subnode) for subnode in json_node]
+
+    if isinstance(json_node, str):
+        return json_node
+
+    if json_node is None:
+        return None
+
+    assert isinstance(json_node, dict)
+    if "nodeType" not in json_node:
+        return None
+
+    node_type = json_node["nodeType"]
+    node_class = getattr(php_ast, node_type)
+    args = {k: None for k in node_class.__annotations__}
+
+    for attr, value in json_node.items():
+        if attr in {"nodeType", "attributes"}:
+            continue
+
+        remap_attrs = {
+            "if": "if_",
+            "else": "else_",
+            "class": "class_",
+            "finally": "finally_",
+        }
+        attr = remap_attrs.get(attr, attr)
+
+        match value:
+            case [*_]:
+                args[attr] = make_ast_reference(value)
+            case {"nodeType": _}:
+                args[attr] = make_ast_reference(value)
+            case _:
+                args[attr] = value
+
+    return node_class(**args, lineno=json_node["attributes"]["startLine"])
+
+
+def bench(func, json_asts, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for json_ast in json_asts:
+            func(json_ast)
+    return time.perf_counter() - t0
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    install_parser()
+    with ParserWorker(format="json") as worker:
+        json_asts = [
+            json.loads(worker.request(encode_source(path.read_text())))
+            for path in sorted(PROGRAMS.glob("*.php"))
+        ]
+
+    reference = bench(make_ast_reference, json_asts, rounds)
+    current = bench(make_ast, json_asts, rounds)
+
+    print(f"{len(json_asts)} ASTs, {rounds} rounds")
+    print(f"reference make_ast: {reference:8.3f}s")
+    print(f"make_ast:           {current:8.3f}s")
+    print(f"speedup:            {reference / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
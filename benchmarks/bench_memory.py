@@ -0,0 +1,82 @@
+"""Report the memory used by php_ast nodes, per node and per file.
+
+For each file (`tests/programs/*.php` and a large generated file), the AST is
+built with tracemalloc running. The numbers include everything the AST
+references (lists, strings, numbers), but not the parser output.
+
+Usage: python benchmarks/bench_memory.py [GENERATED_LINES]
+"""
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+import attr
+
+from php2py.parser import (
+    ParserWorker,
+    decode_response,
+    encode_source,
+    install_parser,
+)
+from php2py.php_ast import Node
+
+PROGRAMS = Path(__file__).parent.parent / "tests" / "programs"
+
+
+def generate_source(lines: int) -> str:
+    body = "".join(f'$v{i} = "{i}" . f($v{i}, [{i}, 2.5]);\n' for i in range(lines))
+    return f"<?php\n{body}"
+
+
+def walk(nodes):
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, Node):
+            yield node
+            stack.extend(getattr(node, f.name) for f in attr.fields(type(node)))
+
+
+def measure(worker, source: str) -> tuple[int, int, dict[str, int]]:
+    payload = worker.request(encode_source(source))
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        php_ast = decode_response(payload, worker.format)
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    nodes = list(walk(php_ast))
+    sizes = {type(node).__name__: sys.getsizeof(node) for node in nodes}
+    return after - before, len(nodes), sizes
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    install_parser()
+    files = {path.name: path.read_text() for path in sorted(PROGRAMS.glob("*.php"))}
+    files[f"generated ({lines} lines)"] = generate_source(lines)
+
+    node_sizes = {}
+    print(f"{'file':32} {'nodes':>8} {'bytes':>12} {'bytes/node':>10}")
+    with ParserWorker() as worker:
+        for name, source in files.items():
+            size, count, sizes = measure(worker, source)
+            node_sizes.update(sizes)
+            print(f"{name:32} {count:8d} {size:12d} {size / max(count, 1):10.1f}")
+
+    print()
+    print("Shallow size per node class (sys.getsizeof):")
+    for name in sorted(node_sizes):
+        print(f"  {name:32} {node_sizes[name]:4d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cost and effect of the optimization passes (`-O`).
+
+A PHP function with `DEBUG` and `PHP_VERSION_ID` guards and constant
+arithmetic in its loop is translated at each level (with the constants
+given, from `-O1`), and the generated code is run: at `-O0`, the guards are
+evaluated on each iteration, with the constants defined as globals. The
+time the passes take is measured on a file of many such functions.
+
+Usage: python benchmarks/bench_optimizer.py [ITERATIONS] [FUNCTIONS]
+"""
+import ast as py
+import sys
+import time
+
+from php2py import php_parser
+from php2py.optimizer import Optimizer
+from php2py.translator import Translator
+
+SOURCE = """<?php
+function run%(n)s($n) {
+    $total = 0;
+    $i = 0;
+    while ($i < $n) {
+        if (DEBUG) {
+            echo "iteration " . $i;
+        }
+        if (PHP_VERSION_ID >= 80000) {
+            $total += $i %% (60 * 60 * 24) + 1024 * 3;
+        } else {
+            $total += $i;
+        }
+        $i += 1;
+    }
+    return $total;
+}
+"""
+
+CONSTANTS = {"DEBUG": False, "PHP_VERSION_ID": 80100}
+
+
+def translate(php_ast, level: int) -> list:
+    translator = Translator()
+    optimizer = Optimizer(level, CONSTANTS).for_file(php_ast, translator)
+    return optimizer.optimize(translator.translate(php_ast))
+
+
+def run(level: int, iterations: int) -> tuple[float, int]:
+    code = py.unparse(translate(php_parser.parse(SOURCE % {"n": ""}), level))
+    namespace = dict(CONSTANTS)
+    exec(compile(code, "<generated>", "exec"), namespace)  # noqa: S102
+    t0 = time.perf_counter()
+    result = namespace["run"](iterations)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    functions = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    times = {}
+    results = {}
+    print(f"Generated code, {iterations} iterations:")
+    for level in (0, 1, 2):
+        times[level], results[level] = run(level, iterations)
+        assert results[level] == results[0]
+        print(f"  -O{level}: {times[level]:.3f}s ({times[0] / times[level]:.2f}x)")
+
+    functions_source = "".join(SOURCE % {"n": i} for i in range(functions))
+    php_ast = php_parser.parse("<?php" + functions_source.replace("<?php", ""))
+    print(f"Translation of {functions} functions:")
+    for level in (0, 1, 2):
+        t0 = time.perf_counter()
+        translate(php_ast, level)
+        print(f"  -O{level}: {time.perf_counter() - t0:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Compare the persistent parser worker against spawning a PHP process per file.
+
+Usage: python benchmarks/bench_parser.py [ROUNDS]
+"""
+import sys
+import time
+from pathlib import Path
+
+from php2py.parser import get_worker, install_parser, parse, parse_oneshot
+
+PROGRAMS = Path(__file__).parent.parent / "tests" / "programs"
+
+
+def bench(func, sources, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for source in sources:
+            func(source)
+    return time.perf_counter() - t0
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    install_parser()
+    sources = [path.read_text() for path in sorted(PROGRAMS.glob("*.php"))]
+    n = rounds * len(sources)
+
+    # Warm up the worker so that its startup is not counted.
+    get_worker().parse("<?php")
+
+    spawn = bench(parse_oneshot, sources, rounds)
+    worker = bench(parse, sources, rounds)
+
+    print(f"{n} parses of {len(sources)} files")
+    print(f"spawn per file: {spawn:8.3f}s  ({spawn / n * 1000:7.2f} ms/file)")
+    print(f"worker:         {worker:8.3f}s  ({worker / n * 1000:7.2f} ms/file)")
+    print(f"speedup:        {spawn / worker:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compare the throughput of the Python parser and the nikic/php-parser worker.
+
+The worker is warmed up first, so its numbers are the steady state of a run
+(request, PHP-side parse and dump, decoding into `php_ast` nodes). Files
+default to `tests/programs/*.php`; the nikic side is skipped without PHP.
+
+Usage: python benchmarks/bench_php_parser.py [ROUNDS] [FILE...]
+"""
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from php2py import php_parser
+from php2py.parser import get_worker, install_parser, parse
+
+PROGRAMS = Path(__file__).parent.parent / "tests" / "programs"
+
+
+def bench(func, sources, rounds):
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for source in sources:
+            func(source)
+    return time.perf_counter() - t0
+
+
+def report(name, seconds, n, size):
+    print(
+        f"{name:8} {seconds:8.3f}s  {n / seconds:9.1f} files/s"
+        f"  {size / 1024 / seconds:9.1f} KiB/s"
+    )
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    paths = [Path(arg) for arg in sys.argv[2:]] or sorted(PROGRAMS.glob("*.php"))
+    sources = [path.read_text() for path in paths]
+    n = rounds * len(sources)
+    size = rounds * sum(len(source.encode()) for source in sources)
+
+    print(f"{n} parses of {len(sources)} files")
+    python = bench(php_parser.parse, sources, rounds)
+    report("python", python, n, size)
+
+    if shutil.which("php") is None:
+        print("nikic    skipped (PHP is not installed)")
+        return
+
+    install_parser()
+    get_worker().parse("<?php")
+    nikic = bench(parse, sources, rounds)
+    report("nikic", nikic, n, size)
+    print(f"ratio    {nikic / python:8.2f}x (> 1: the Python parser is faster)")
+
+
+if __name__ == "__main__":
+    main()
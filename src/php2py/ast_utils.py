@@ -1,12 +1,32 @@
+from collections.abc import Iterator
+
+import attr
+
 from .php_ast import Node
 
 
+def walk(node: Node | list) -> Iterator[Node]:
+    """Yield `node` and all the nodes below it (iteratively, in no order)."""
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, Node):
+            yield value
+            for field in attr.fields(value.__class__):
+                if not field.name.startswith("_"):
+                    stack.append(getattr(value, field.name))
+
+
 def print_ast(node: Node, level: int = 0):
     print("  " * level + node.__class__.__name__)
-    for attr, value in node.__dict__.items():
-        if attr.startswith("_"):
+    for field in attr.fields(node.__class__):
+        if field.name.startswith("_"):
             continue
 
+        value = getattr(node, field.name)
+
         if isinstance(value, Node):
             print_ast(value, level + 1)
         elif isinstance(value, list):
@@ -14,4 +34,4 @@ def print_ast(node: Node, level: int = 0):
                 if isinstance(item, Node):
                     print_ast(item, level + 1)
         elif value is not None:
-            print("  " * (level + 1) + f"{attr}: {value}")
+            print("  " * (level + 1) + f"{field.name}: {value}")
@@ -0,0 +1,131 @@
+"""Content-addressed on-disk cache of parser output.
+
+Entries are keyed by a hash of the PHP source bytes and of the parser
+version, so a cached AST is never reused across parser upgrades. The cache is
+bounded in size: when it grows past `max_size`, the least recently used
+entries (by modification time, which is bumped on every hit) are evicted.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from platformdirs import user_cache_dir
+
+from .constants import APP_NAME
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Fraction of `max_size` the cache is trimmed down to when it overflows, so
+# that eviction doesn't run again on the very next write.
+LOW_WATER_MARK = 0.9
+
+
+def default_cache_dir() -> Path:
+    return Path(user_cache_dir(APP_NAME)) / "parse-cache"
+
+
+class ParseCache:
+    def __init__(
+        self,
+        directory: Path | str | None = None,
+        version: str = "",
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.version = version
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size: int | None = None
+
+    def key(self, source: bytes) -> str:
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(b"\0")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / key[2:]
+
+    def get(self, source: bytes) -> bytes | None:
+        path = self.path(self.key(source))
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # Mark the entry as recently used.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, source: bytes, data: bytes):
+        path = self.path(self.key(source))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so that concurrent readers never
+        # see a partial entry.
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        if self._size is None:
+            self._size = self.stats()["size"]
+        else:
+            self._size += len(data)
+        if self._size > self.max_size:
+            self.evict()
+
+    def entries(self) -> list[tuple[os.stat_result, Path]]:
+        result = []
+        if not self.directory.exists():
+            return result
+        for subdir in self.directory.iterdir():
+            if not subdir.is_dir():
+                continue
+            for path in subdir.iterdir():
+                if path.name.startswith(".tmp-"):
+                    continue
+                try:
+                    result.append((path.stat(), path))
+                except FileNotFoundError:
+                    pass
+        return result
+
+    def evict(self):
+        """Remove least recently used entries until under the size limit."""
+        entries = sorted(self.entries(), key=lambda entry: entry[0].st_mtime)
+        size = sum(stat.st_size for stat, _ in entries)
+        target = self.max_size * LOW_WATER_MARK
+        for stat, path in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
+        self._size = size
+
+    def clear(self):
+        for _, path in self.entries():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def stats(self) -> dict:
+        entries = self.entries()
+        return {
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "size": sum(stat.st_size for stat, _ in entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -1,4 +1,7 @@
 import argparse
+import json
+
+from php2py.profiling import DEFAULT_PROFILE_REPORT
 
 
 def cli():
@@ -13,10 +16,124 @@ def cli():
     convert_parser = subparsers.add_parser(
         "convert", help="Convert (compile) a PHP file to Python"
     )
-    convert_parser.add_argument("files", nargs="+", help="PHP files to convert")
+    convert_parser.add_argument(
+        "files", nargs="+", help="PHP files, or directories to search for PHP files"
+    )
     convert_parser.add_argument("--ignore-errors", action="store_true")
+    convert_parser.add_argument(
+        "--no-cache", action="store_true", help="Don't use the parse cache"
+    )
+    convert_parser.add_argument(
+        "--parser",
+        choices=["nikic", "python"],
+        default="nikic",
+        help="PHP parser: nikic/php-parser (needs PHP) or the built-in one",
+    )
+    convert_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="Convert files in N worker processes",
+    )
+    convert_parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Only convert files whose source, output or converter changed",
+    )
+    convert_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --incremental, convert all files anyway",
+    )
+    convert_parser.add_argument(
+        "--manifest",
+        help="Manifest of converted files for --incremental"
+        " (default: .php2py-manifest.json)",
+    )
+    convert_parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=DEFAULT_PROFILE_REPORT,
+        metavar="REPORT",
+        help="Convert files one at a time, print the time and peak memory of"
+        " each phase and the slowest files, and write a JSON report to REPORT"
+        f" (default: {DEFAULT_PROFILE_REPORT})",
+    )
+    convert_parser.add_argument(
+        "--cprofile",
+        metavar="FILE",
+        help="Dump the cProfile stats of the translate phase to FILE"
+        " (implies --profile)",
+    )
+    convert_parser.add_argument(
+        "--node-stats",
+        nargs="?",
+        const=True,
+        metavar="FILE",
+        help="Count the nodes of each type and time their translation (in this"
+        " process), print the table and write it to FILE as JSON if given",
+    )
+    convert_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the code of each top-level statement as soon as it is"
+        " translated (less memory on huge files; not with -j or --profile)",
+    )
+    convert_parser.add_argument(
+        "--translation-cache",
+        action="store_true",
+        help="Cache the code of each top-level function, class and constant,"
+        " and only translate again the ones that changed",
+    )
+    add_tree_arguments(convert_parser)
+    add_optimization_arguments(convert_parser)
     convert_parser.set_defaults(func=run_convert)
 
+    watch_parser = subparsers.add_parser(
+        "watch", help="Convert PHP files in directories as they are saved"
+    )
+    watch_parser.add_argument("dirs", nargs="+", help="Directories to watch")
+    watch_parser.add_argument(
+        "--no-cache", action="store_true", help="Don't use the parse cache"
+    )
+    watch_parser.add_argument(
+        "--parser",
+        choices=["nikic", "python"],
+        default="nikic",
+        help="PHP parser: nikic/php-parser (needs PHP) or the built-in one",
+    )
+    watch_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=100,
+        metavar="MS",
+        help="Wait for MS milliseconds without changes before converting"
+        " (default: 100)",
+    )
+    watch_parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Detect changes by polling, even if inotify is available",
+    )
+    watch_parser.add_argument(
+        "--translation-cache",
+        action="store_true",
+        help="Cache the code of each top-level function, class and constant,"
+        " and only translate again the ones that changed",
+    )
+    add_tree_arguments(watch_parser)
+    add_optimization_arguments(watch_parser)
+    watch_parser.set_defaults(func=run_watch)
+
+    cache_parser = subparsers.add_parser(
+        "cache", help="Manage the parse and translation caches"
+    )
+    cache_parser.add_argument("action", choices=["stats", "clear"])
+    cache_parser.set_defaults(func=run_cache)
+
     args = parser.parse_args()
 
     if hasattr(args, "func"):
@@ -25,10 +142,166 @@ def cli():
         parser.print_help()
 
 
+def add_tree_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="PATTERN",
+        help="Convert the files matching PATTERN in directories (default: *.php)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Skip the files or directories (e.g. vendor/) matching PATTERN",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help="Write the output there, mirroring the input directories,"
+        " instead of next to the sources",
+    )
+
+
+def add_optimization_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "-O",
+        dest="optimize",
+        type=int,
+        choices=[0, 1, 2],
+        default=0,
+        metavar="LEVEL",
+        help="Optimization level: 0 (none), 1 (substitute the constants, fold"
+        " constant expressions and remove dead branches), 2 (also substitute"
+        " the literal constants defined in the file, and remove unreachable"
+        " code) (default: 0)",
+    )
+    parser.add_argument(
+        "-D",
+        "--define",
+        action="append",
+        default=[],
+        type=constant_definition,
+        metavar="NAME=VALUE",
+        help="Substitute VALUE (JSON, or else a string) for the PHP constant"
+        " NAME (with -O1 or more)",
+    )
+    parser.add_argument(
+        "--constants",
+        type=constants_file,
+        metavar="FILE",
+        help="Substitute the PHP constants of FILE, a JSON object of names"
+        " and values (with -O1 or more)",
+    )
+
+
 def run_convert(args):
     from php2py.main import main
 
-    main(args.files, ignore_errors=args.ignore_errors)
+    profile_path = args.profile
+    if args.cprofile and profile_path is None:
+        profile_path = DEFAULT_PROFILE_REPORT
+
+    main(
+        args.files,
+        ignore_errors=args.ignore_errors,
+        use_cache=not args.no_cache,
+        parser=args.parser,
+        jobs=args.jobs,
+        incremental=args.incremental,
+        force=args.force,
+        manifest_path=args.manifest,
+        include=args.include or ["*.php"],
+        exclude=args.exclude,
+        output_dir=args.output_dir,
+        profile_path=profile_path,
+        cprofile_path=args.cprofile,
+        node_stats=args.node_stats is not None,
+        node_stats_path=args.node_stats if isinstance(args.node_stats, str) else None,
+        stream=args.stream,
+        use_translation_cache=args.translation_cache,
+        optimize=args.optimize,
+        constants=constants_of(args),
+    )
+
+
+def run_watch(args):
+    from php2py.watch import watch
+
+    watch(
+        args.dirs,
+        parser=args.parser,
+        use_cache=not args.no_cache,
+        include=args.include or ["*.php"],
+        exclude=args.exclude,
+        output_dir=args.output_dir,
+        debounce=args.debounce / 1000,
+        polling=args.poll,
+        use_translation_cache=args.translation_cache,
+        optimize=args.optimize,
+        constants=constants_of(args),
+    )
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def constant_definition(value: str) -> tuple[str, object]:
+    name, sep, text = value.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE: {value}")
+    try:
+        constant = json.loads(text)
+    except ValueError:
+        constant = text
+    return name, check_constant(name, constant)
+
+
+def constants_file(path: str) -> dict[str, object]:
+    try:
+        with open(path) as fp:
+            constants = json.load(fp)
+    except (OSError, ValueError) as e:
+        raise argparse.ArgumentTypeError(f"can't read {path}: {e}") from e
+    if not isinstance(constants, dict):
+        raise argparse.ArgumentTypeError(f"not a JSON object: {path}")
+    return {name: check_constant(name, value) for name, value in constants.items()}
+
+
+def check_constant(name: str, value):
+    if not isinstance(value, (str, int, float, bool, type(None))):
+        raise argparse.ArgumentTypeError(
+            f"{name}: the value must be a string, a number, a boolean or null"
+        )
+    return value
+
+
+def constants_of(args) -> dict[str, object]:
+    """Return the constants of `--constants`, overridden by those of `-D`."""
+    return {**(args.constants or {}), **dict(args.define)}
+
+
+def run_cache(args):
+    from php2py.parser import get_parse_cache
+    from php2py.translation_cache import get_translation_cache
+
+    caches = {"Parse": get_parse_cache(), "Translation": get_translation_cache()}
+    for name, cache in caches.items():
+        match args.action:
+            case "stats":
+                stats = cache.stats()
+                print(f"{name} cache")
+                print(f"  Directory: {stats['directory']}")
+                print(f"  Entries:   {stats['entries']}")
+                print(f"  Size:      {stats['size'] / 2**20:.1f} MiB")
+                print(f"  Max size:  {stats['max_size'] / 2**20:.1f} MiB")
+            case "clear":
+                cache.clear()
 
 
 def run_update(args):
@@ -0,0 +1,104 @@
+"""Finding the PHP files to convert, and where their output goes.
+
+Directories given to `convert` are walked lazily (files are yielded as they
+are found, so conversion starts before the walk is over), in sorted order.
+Patterns are fnmatch-style, like in `.gitignore`:
+
+- `vendor/` (trailing slash) only matches directories, which are not entered;
+- `*.inc.php` (no slash) matches the name of a file or directory at any depth;
+- `lib/legacy/*` (with a slash) matches the path relative to the directory
+  given on the command line.
+"""
+import os
+from collections.abc import Iterable, Iterator
+from fnmatch import fnmatch
+from pathlib import Path
+
+DEFAULT_INCLUDE = ("*.php",)
+
+
+def matches(relative_path: str, is_dir: bool, patterns: Iterable[str]) -> bool:
+    name = relative_path.rpartition("/")[2]
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch(relative_path, pattern.lstrip("/")):
+                return True
+        elif fnmatch(name, pattern):
+            return True
+    return False
+
+
+def discover(
+    paths: Iterable[str | Path],
+    include: Iterable[str] = DEFAULT_INCLUDE,
+    exclude: Iterable[str] = (),
+) -> Iterator[str | Path]:
+    """Yield the files to convert for the command-line `paths`.
+
+    Files are yielded as given (even if they don't exist, so that the error
+    is reported when converting them). Directories are walked recursively,
+    yielding the files matching `include` and not `exclude`.
+    """
+    include = tuple(include)
+    exclude = tuple(exclude)
+    for path in paths:
+        if os.path.isdir(path):
+            yield from _walk(Path(path), include, exclude)
+        else:
+            yield path
+
+
+def _walk(root: Path, include: tuple, exclude: tuple) -> Iterator[Path]:
+    for dir_path, dir_names, file_names in os.walk(root):
+        relative_dir = os.path.relpath(dir_path, root).replace(os.sep, "/")
+        prefix = "" if relative_dir == "." else relative_dir + "/"
+
+        # Pruning `dir_names` in place keeps `os.walk()` out of them.
+        dir_names[:] = [
+            name
+            for name in sorted(dir_names)
+            if not matches(prefix + name, True, exclude)
+        ]
+        for name in sorted(file_names):
+            relative_path = prefix + name
+            if matches(relative_path, False, include) and not matches(
+                relative_path, False, exclude
+            ):
+                yield Path(dir_path) / name
+
+
+class OutputLayout:
+    """Map source files to the path of their Python output.
+
+    By default, the output is written next to the source. With an
+    `output_dir`, the tree of each directory in `roots` is mirrored there;
+    other files go at the top of `output_dir`.
+    """
+
+    def __init__(
+        self, roots: Iterable[str | Path] = (), output_dir: str | Path | None = None
+    ):
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        # Deepest first, so that nested roots win.
+        self.roots = sorted(
+            (Path(root) for root in roots if os.path.isdir(root)),
+            key=lambda root: len(root.parts),
+            reverse=True,
+        )
+
+    def __call__(self, source_file: str | Path) -> Path:
+        source_file = Path(source_file)
+        if self.output_dir is None:
+            return source_file.with_suffix(".py")
+
+        for root in self.roots:
+            if source_file.is_relative_to(root):
+                relative_path = source_file.relative_to(root)
+                break
+        else:
+            relative_path = Path(source_file.name)
+        return (self.output_dir / relative_path).with_suffix(".py")
@@ -0,0 +1,136 @@
+"""Streaming output: write the Python code of each top-level statement as soon
+as it is translated, instead of unparsing the whole module at the end.
+
+The output is byte-identical to `ast.unparse()` of the whole translation:
+`StreamingUnparser` is the stdlib unparser, flushed to a file after each
+top-level statement. The Python AST and the code of a statement are dropped
+once written, so (on top of the PHP AST) memory grows with the largest
+statement, not with the size of the file.
+
+Once something was written, the code of a statement doesn't depend on its
+place in the file (e.g. a function always starts with a blank line), so it
+can be cached (see `translation_cache`).
+"""
+import ast
+import os
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TextIO
+
+from .cache import ParseCache
+from .optimizer import Optimizer
+from .php_ast import Node, Stmt_Namespace
+from .recursion import call_with_deep_stack, recursion_section
+from .translation_cache import CACHED_DECLARATIONS, structural_key
+from .translator import Translator
+
+
+class StreamingUnparser(ast._Unparser):
+    # The stdlib unparses the expressions of f-strings with another instance,
+    # created with keyword arguments (and no file).
+    def __init__(self, file: TextIO | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.file = file
+        self.written = False
+
+    def maybe_newline(self):
+        # Unlike `ast.unparse()`, the code before is in the file, not in
+        # `self._source`.
+        if self._source or self.written:
+            self.write("\n")
+
+    def render(self, py_node: ast.AST | list) -> str:
+        """Return the code of a top-level statement (or list of statements)."""
+        try:
+            with recursion_section():
+                self.traverse(py_node)
+        except RecursionError:
+            # Start over, with a deeper stack.
+            self._source = []
+            self._indent = 0
+            self._precedences.clear()
+            call_with_deep_stack(self.traverse, py_node)
+        # `_source` may hold empty strings, which still count for
+        # `maybe_newline()`.
+        if self._source:
+            self.written = True
+        code = "".join(self._source)
+        self._source = []
+        # Keyed by node: would keep the whole translation alive.
+        self._precedences.clear()
+        return code
+
+    def emit(self, py_node: ast.AST | list):
+        """Write the code of a top-level statement (or list of statements)."""
+        self.file.write(self.render(py_node))
+
+
+def write_translation(
+    php_nodes: Iterable[Node],
+    file: TextIO,
+    translator: Translator | None = None,
+    cache: ParseCache | None = None,
+    optimizer: Optimizer | None = None,
+):
+    """Translate `php_nodes` to `file`, one top-level statement at a time.
+
+    With a `cache`, the code of declarations is looked up there first (see
+    `translation_cache`), except at the start of the file. With an
+    `optimizer`, each statement is optimized once translated.
+    """
+    if translator is None:
+        translator = Translator()
+    if optimizer is None:
+        optimizer = Optimizer(level=0)
+    else:
+        php_nodes = list(php_nodes)
+        optimizer = optimizer.for_file(php_nodes, translator)
+    # The code depends on the optimizer options (and, at `-O2`, on the
+    # constants of the file).
+    options = f"\0{optimizer.fingerprint()}".encode() if optimizer.level else b""
+
+    unparser = StreamingUnparser(file)
+    for php_node in top_level_nodes(php_nodes):
+        if (
+            cache is None
+            or not unparser.written
+            or not isinstance(php_node, CACHED_DECLARATIONS)
+        ):
+            unparser.emit(optimizer.optimize(translator.translate(php_node)))
+            continue
+
+        key = structural_key(php_node) + options
+        data = cache.get(key)
+        if data is None:
+            code = unparser.render(optimizer.optimize(translator.translate(php_node)))
+            cache.put(key, code.encode("utf8", "surrogateescape"))
+        else:
+            code = data.decode("utf8", "surrogateescape")
+        file.write(code)
+
+
+def top_level_nodes(php_nodes: Iterable[Node]) -> Iterable[Node]:
+    """Yield the nodes, with the statements of namespaces instead of them.
+
+    A namespace translates to the list of its statements, so this doesn't
+    change the output, and the declarations of namespaces can be cached.
+    """
+    for php_node in php_nodes:
+        if isinstance(php_node, Stmt_Namespace) and isinstance(php_node.stmts, list):
+            yield from php_node.stmts
+        else:
+            yield php_node
+
+
+def write_file_atomically(output_file: Path, write):
+    """Call `write(fp)` on a temporary file, renamed to `output_file` if it
+    succeeds (so that an error never leaves a truncated output behind)."""
+    # Not `tempfile.mkstemp()`: its files are private (mode 0600).
+    tmp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_file, "w") as fp:
+            write(fp)
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,87 @@
+<?php
+/**
+ * Compact, positional serializer for nikic/php-parser ASTs.
+ *
+ * The schema, sent by php2py, lists `[nodeType, [field, ...]]` pairs: a node
+ * type's id is its index in the schema, and its fields are written in the
+ * order given there (the order of the `php_ast` annotations). Only the start
+ * line of each node is kept; other attributes and comments are dropped.
+ *
+ * The AST is written in post-order as two flat arrays, `[ops, values]`, so
+ * that the JSON stays shallow however deeply nested the code is:
+ *
+ * - `id >= 0`, `line`: build a node of type `id` from the last N values on
+ *   the stack (N being its number of fields);
+ * - `-1`: push the next item of `values` (a string, number or boolean);
+ * - `-2`: push null;
+ * - `-3`, `n`: build a list from the last n values on the stack.
+ */
+
+use PhpParser\Node;
+
+final class CompactDumper
+{
+    const VALUE = -1;
+    const NULL = -2;
+    const LIST = -3;
+
+    /** @var array<string, int> */
+    private $ids = [];
+
+    /** @var array<string, string[]> */
+    private $fields = [];
+
+    /** @var int[] */
+    private $ops = [];
+
+    /** @var array */
+    private $values = [];
+
+    public function __construct(array $schema)
+    {
+        foreach ($schema as $id => [$type, $fields]) {
+            $this->ids[$type] = $id;
+            $this->fields[$type] = $fields;
+        }
+    }
+
+    public function dump(array $stmts): array
+    {
+        $this->ops = [];
+        $this->values = [];
+        $this->dumpValue($stmts);
+        return [$this->ops, $this->values];
+    }
+
+    private function dumpValue($value): void
+    {
+        if ($value === null) {
+            $this->ops[] = self::NULL;
+        } elseif ($value instanceof Node) {
+            $this->dumpNode($value);
+        } elseif (is_array($value)) {
+            foreach ($value as $item) {
+                $this->dumpValue($item);
+            }
+            $this->ops[] = self::LIST;
+            $this->ops[] = count($value);
+        } else {
+            $this->ops[] = self::VALUE;
+            $this->values[] = $value;
+        }
+    }
+
+    private function dumpNode(Node $node): void
+    {
+        $type = $node->getType();
+        if (!isset($this->ids[$type])) {
+            throw new RuntimeException("Unsupported node type: $type");
+        }
+
+        foreach ($this->fields[$type] as $field) {
+            $this->dumpValue(property_exists($node, $field) ? $node->$field : null);
+        }
+        $this->ops[] = $this->ids[$type];
+        $this->ops[] = $node->getStartLine();
+    }
+}
@@ -0,0 +1,77 @@
+<?php
+/**
+ * Long-lived PHP parser process for php2py.
+ *
+ * Reads length-prefixed PHP source blobs on stdin ("<length>\n<source>") and
+ * writes length-prefixed JSON ASTs on stdout. Parse errors are reported as
+ * `{"error": "<message>"}` and do not stop the process.
+ *
+ * By default, ASTs are in the same format as `php-parse -j`. With `--compact`,
+ * the first message must be a JSON schema, and ASTs are written in the format
+ * described in `compact_dumper.php`.
+ *
+ * Usage: php parse_server.php /path/to/vendor/autoload.php [--compact]
+ */
+
+// Warnings must never end up in the protocol stream.
+ini_set('display_errors', 'stderr');
+
+require $argv[1];
+require __DIR__ . '/compact_dumper.php';
+
+use PhpParser\Error;
+use PhpParser\Lexer\Emulative;
+use PhpParser\ParserFactory;
+
+$lexer = new Emulative([
+    'usedAttributes' => ['startLine', 'endLine', 'startFilePos', 'endFilePos', 'comments'],
+]);
+$parser = (new ParserFactory())->create(ParserFactory::PREFER_PHP7, $lexer);
+
+function read_message($stream)
+{
+    $header = fgets($stream);
+    if ($header === false) {
+        return false;
+    }
+
+    $length = (int) trim($header);
+    $data = '';
+    while (strlen($data) < $length) {
+        $chunk = fread($stream, $length - strlen($data));
+        if ($chunk === false || $chunk === '') {
+            return false;
+        }
+        $data .= $chunk;
+    }
+    return $data;
+}
+
+function write_message($stream, string $payload): void
+{
+    fwrite($stream, strlen($payload) . "\n" . $payload);
+    fflush($stream);
+}
+
+$dumper = null;
+if (($argv[2] ?? null) === '--compact') {
+    $schema = read_message(STDIN);
+    if ($schema === false) {
+        exit(0);
+    }
+    $dumper = new CompactDumper(json_decode($schema, true));
+}
+
+while (($code = read_message(STDIN)) !== false) {
+    try {
+        $stmts = $parser->parse($code);
+        $payload = json_encode($dumper ? $dumper->dump($stmts) : $stmts);
+        if ($payload === false) {
+            $payload = json_encode(['error' => json_last_error_msg()]);
+        }
+    } catch (Error | RuntimeException $e) {
+        $payload = json_encode(['error' => $e->getMessage()], JSON_INVALID_UTF8_SUBSTITUTE);
+    }
+
+    write_message(STDOUT, $payload);
+}
@@ -1,35 +1,418 @@
 #!/usr/bin/env python3
 
+import functools
 import sys
 import traceback
 from ast import unparse
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import closing
+from io import StringIO
 from pathlib import Path
+from typing import NamedTuple, TextIO
 
 from cleez.colors import blue, red
 
-from .parser import install_parser, parse
-from .translator import Translator
+from .cache import ParseCache
+from .discovery import DEFAULT_INCLUDE, OutputLayout, discover
+from .emitter import write_file_atomically, write_translation
+from .manifest import DEFAULT_MANIFEST, Manifest, translator_fingerprint
+from .optimizer import DEFAULT_LEVEL, Optimizer
+from .parser import (
+    DEFAULT_PARSER,
+    ParseError,
+    get_parse_cache,
+    get_worker,
+    install_parser,
+    parse,
+    parse_many,
+)
+from .pipeline import Pipeline
+from .profiling import Profiler
+from .recursion import deep_recursion
+from .translation_cache import get_translation_cache
+from .translator import InstrumentedTranslator, TranslationStats, Translator
 
+# Errors that fail a single file (the others abort the run).
+CONVERSION_ERRORS = (
+    OSError,
+    UnicodeDecodeError,
+    ParseError,
+    NotImplementedError,
+    KeyError,
+)
 
-def main(source_files, ignore_errors):
-    install_parser()
+# Files submitted to the pool ahead of the one being reported, per worker.
+QUEUED_FILES_PER_JOB = 4
 
+
+class Conversion(NamedTuple):
+    """The outcome of converting one file: its Python code, or an error.
+
+    When streaming, `output` is a function translating the file and writing
+    the code to the file it's given.
+    """
+
+    source_file: str | Path
+    output: str | Callable[[TextIO], None] | None = None
+    error: Exception | None = None
+    traceback: str = ""
+
+
+def main(
+    source_files,
+    ignore_errors,
+    use_cache=True,
+    parser=DEFAULT_PARSER,
+    jobs=1,
+    incremental=False,
+    force=False,
+    manifest_path=None,
+    include=DEFAULT_INCLUDE,
+    exclude=(),
+    output_dir=None,
+    profile_path=None,
+    cprofile_path=None,
+    node_stats=False,
+    node_stats_path=None,
+    stream=False,
+    use_translation_cache=False,
+    optimize=DEFAULT_LEVEL,
+    constants=None,
+):
+    """Convert `source_files` (files, or directories to search for files).
+
+    With a `profile_path`, files are converted one at a time, in this
+    process, and a profile of each phase is written there as JSON (and the
+    translate phase's cProfile stats to `cprofile_path`).
+
+    With `node_stats`, the translation is instrumented, files are converted
+    in this process, and the count and translation time of each node type
+    are printed (and written to `node_stats_path` as JSON).
+
+    With `stream` (and one job, without profiling), the code of each
+    top-level statement is written as soon as it is translated.
+
+    With `use_translation_cache`, the code of top-level declarations is
+    cached, and only the declarations that changed are translated again.
+
+    The code is optimized at the `optimize` level, with the PHP `constants`
+    (a mapping of names to values) substituted (see `optimizer`).
+    """
+    cache = None
+    if parser == "nikic":
+        install_parser()
+        cache = get_parse_cache() if use_cache else None
+    translation_cache = get_translation_cache(parser) if use_translation_cache else None
+    optimizer = Optimizer(optimize, constants or {})
+
+    if output_dir is not None:
+        source_files = list(source_files)
+    layout = OutputLayout(source_files if output_dir else (), output_dir)
+    # Lazy: conversion starts while directories are still being walked.
+    source_files = discover(source_files, include, exclude)
+
+    manifest = None
+    if incremental:
+        fingerprint = f"{translator_fingerprint(parser)}:{optimizer.fingerprint()}"
+        manifest = Manifest.load(manifest_path or DEFAULT_MANIFEST, fingerprint)
+        source_files = manifest.stale(source_files, layout, force)
+
+    stats = TranslationStats() if node_stats or node_stats_path else None
+    pipeline = profiler = None
+    if profile_path is not None:
+        caches = {"parse": cache, "translation": translation_cache}
+        profiler = Profiler(
+            cprofile_path,
+            {name: c for name, c in caches.items() if c is not None},
+        )
+        conversions = convert_profiled(
+            source_files, cache, parser, profiler, stats, translation_cache, optimizer
+        )
+    elif jobs > 1 and stats is None:
+        conversions = convert_parallel(
+            source_files, jobs, use_cache, parser, use_translation_cache, optimizer
+        )
+    else:
+        pipeline = make_pipeline(
+            source_files, cache, parser, stats, stream, translation_cache, optimizer
+        )
+        conversions = pipeline.run()
+
+    # Conversions come in the order of `source_files`, whatever the order in
+    # which they finished, so the output doesn't depend on worker timing.
+    try:
+        with closing(conversions):
+            for conversion in conversions:
+                output_file = layout(conversion.source_file)
+                if profiler is not None:
+                    with profiler.phase("write"):
+                        written = emit(conversion, output_file, ignore_errors)
+                else:
+                    written = emit(conversion, output_file, ignore_errors)
+                if manifest is not None:
+                    manifest.record(conversion.source_file, written)
+    finally:
+        if manifest is not None:
+            manifest.save()
+        if profiler is not None:
+            profiler.stop()
+            profiler.save(profile_path)
+
+    if pipeline is not None:
+        print(f"Pipeline: {pipeline.summary('files')}")
+    if profiler is not None:
+        print(profiler.summary())
+        print(f"Profile written to {profile_path}")
+    if stats is not None:
+        print(stats.table())
+        if node_stats_path is not None:
+            stats.save(node_stats_path)
+    if manifest is not None:
+        print(f"{manifest.up_to_date} files up to date")
+
+
+def emit(
+    conversion: Conversion,
+    output_file: Path,
+    ignore_errors: bool,
+    errors: type[Exception] | tuple[type[Exception], ...] = CONVERSION_ERRORS,
+) -> Path | None:
+    """Write the output of a conversion, or report its error (if one of
+    `errors`, raise it otherwise).
+
+    Returns the output file, or `None` on error.
+    """
+    print(blue(f"Transpiling {conversion.source_file}..."))
+
+    try:
+        if conversion.error is not None:
+            raise conversion.error
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        if callable(conversion.output):
+            write_file_atomically(output_file, conversion.output)
+        else:
+            output_file.write_text(conversion.output)
+    except errors as e:
+        print(red("Error transpiling file."))
+        print(e)
+        print(conversion.traceback or traceback.format_exc(), end="")
+        print()
+        if not ignore_errors:
+            sys.exit(1)
+        return None
+    return output_file
+
+
+def translate(
+    php_ast,
+    stats: TranslationStats | None = None,
+    translation_cache: ParseCache | None = None,
+    optimizer: Optimizer | None = None,
+) -> str:
+    translator = make_translator(stats)
+    if translation_cache is not None:
+        output = StringIO()
+        write_translation(php_ast, output, translator, translation_cache, optimizer)
+        return output.getvalue()
+    if optimizer is None:
+        return deep_recursion(unparse, translator.translate(php_ast))
+    optimizer = optimizer.for_file(php_ast, translator)
+    py_ast = optimizer.optimize(translator.translate(php_ast))
+    return deep_recursion(unparse, py_ast)
+
+
+def make_translator(stats: TranslationStats | None = None) -> Translator:
+    """Return a translator, instrumented if `stats` is given."""
+    if stats is not None:
+        return InstrumentedTranslator(stats=stats)
+    return Translator()
+
+
+def make_pipeline(
+    source_files: Iterable[str | Path],
+    cache: ParseCache | None,
+    parser: str,
+    stats: TranslationStats | None = None,
+    stream: bool = False,
+    translation_cache: ParseCache | None = None,
+    optimizer: Optimizer | None = None,
+) -> Pipeline:
+    """Return a pipeline yielding the `Conversion` of each file, in order.
+
+    Parsing, translation and emitting (by the consumer) overlap, in three
+    threads. When streaming, translation happens while emitting.
+    """
+    translate_stage = functools.partial(
+        _translate_parsed,
+        stats=stats,
+        stream=stream,
+        translation_cache=translation_cache,
+        optimizer=optimizer,
+    )
+    return Pipeline(
+        parse_many(source_files, cache=cache, parser=parser),
+        [("translate", translate_stage)],
+        source_name="parse",
+        sink_name="emit",
+    )
+
+
+def _translate_parsed(
+    parsed: tuple[str | Path, list | Exception],
+    stats: TranslationStats | None = None,
+    stream: bool = False,
+    translation_cache: ParseCache | None = None,
+    optimizer: Optimizer | None = None,
+) -> Conversion:
+    source_file, php_ast = parsed
+    try:
+        if isinstance(php_ast, Exception):
+            raise php_ast
+        if stream:
+            output = functools.partial(
+                write_translation,
+                php_ast,
+                translator=make_translator(stats),
+                cache=translation_cache,
+                optimizer=optimizer,
+            )
+        else:
+            output = translate(php_ast, stats, translation_cache, optimizer)
+    except CONVERSION_ERRORS as e:
+        return Conversion(source_file, error=e, traceback=traceback.format_exc())
+    return Conversion(source_file, output=output)
+
+
+def convert_profiled(
+    source_files: Iterable[str | Path],
+    cache: ParseCache | None,
+    parser: str,
+    profiler: Profiler,
+    stats: TranslationStats | None = None,
+    translation_cache: ParseCache | None = None,
+    optimizer: Optimizer | None = None,
+) -> Iterator[Conversion]:
+    """Convert files one at a time, recording each phase in `profiler`.
+
+    With a `translation_cache`, the code is written while translating, so the
+    optimize and unparse phases are part of the translate phase.
+    """
+    if optimizer is None:
+        optimizer = Optimizer(level=0)
+    profiler.start()
     for source_file in source_files:
-        print(blue(f"Transpiling {source_file}..."))
+        file_profile = profiler.begin_file(source_file)
+        try:
+            with profiler.phase("read"):
+                source_code = Path(source_file).read_text()
+            php_ast = parse(source_code, cache, parser, phase=profiler.phase)
+            if translation_cache is not None:
+                with profiler.phase("translate"):
+                    output = translate(php_ast, stats, translation_cache, optimizer)
+            else:
+                with profiler.phase("translate"):
+                    translator = make_translator(stats)
+                    file_optimizer = optimizer.for_file(php_ast, translator)
+                    py_ast = translator.translate(php_ast)
+                with profiler.phase("optimize"):
+                    py_ast = file_optimizer.optimize(py_ast)
+                with profiler.phase("unparse"):
+                    output = deep_recursion(unparse, py_ast)
+        except CONVERSION_ERRORS as e:
+            file_profile.error = f"{type(e).__name__}: {e}"
+            yield Conversion(source_file, error=e, traceback=traceback.format_exc())
+        else:
+            yield Conversion(source_file, output=output)
+
 
+def convert_parallel(
+    source_files: Iterable[str | Path],
+    jobs: int,
+    use_cache: bool,
+    parser: str,
+    use_translation_cache: bool = False,
+    optimizer: Optimizer | None = None,
+) -> Iterator[Conversion]:
+    """Convert files in `jobs` worker processes, each with its own parser.
+
+    Files are handed out as workers become free and their results collected
+    as they finish, then yielded in the order of `source_files`. At most
+    `QUEUED_FILES_PER_JOB * jobs` files are in flight at any time.
+    """
+    source_files = iter(source_files)
+    max_pending = QUEUED_FILES_PER_JOB * jobs
+    pending: dict[Future, int] = {}
+    done: dict[int, Conversion] = {}
+    submitted = reported = 0
+
+    with ProcessPoolExecutor(
+        jobs,
+        initializer=_init_worker,
+        initargs=(use_cache, parser, use_translation_cache, optimizer),
+    ) as executor:
         try:
-            php_ast = parse(open(source_file).read())
-            translator = Translator()
-            py_ast = translator.translate(php_ast)
-            output = unparse(py_ast)
-            Path(source_file).with_suffix(".py").write_text(output)
-        except (NotImplementedError, KeyError) as e:
-            print(red("Error transpiling file."))
-            print(e)
-            traceback.print_exc()
-            print()
-            if not ignore_errors:
-                sys.exit(1)
+            while True:
+                while reported in done:
+                    yield done.pop(reported)
+                    reported += 1
+
+                while len(pending) + len(done) < max_pending:
+                    source_file = next(source_files, None)
+                    if source_file is None:
+                        break
+                    future = executor.submit(_convert_in_worker, source_file)
+                    pending[future] = submitted
+                    submitted += 1
+
+                # With nothing running, everything submitted was reported.
+                if not pending:
+                    return
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done[pending.pop(future)] = future.result()
+        finally:
+            # Don't start the files left behind if the caller stops early.
+            executor.shutdown(cancel_futures=True)
+
+
+# Per-process state of the `convert_parallel()` workers.
+_worker_cache: ParseCache | None = None
+_worker_parser = DEFAULT_PARSER
+_worker_translation_cache: ParseCache | None = None
+_worker_optimizer: Optimizer | None = None
+
+
+def _init_worker(
+    use_cache: bool,
+    parser: str,
+    use_translation_cache: bool = False,
+    optimizer: Optimizer | None = None,
+):
+    global _worker_cache, _worker_parser, _worker_translation_cache, _worker_optimizer
+    _worker_parser = parser
+    _worker_optimizer = optimizer
+    if use_translation_cache:
+        _worker_translation_cache = get_translation_cache(parser)
+    if parser == "nikic":
+        _worker_cache = get_parse_cache() if use_cache else None
+        # Start the PHP process now rather than on the first file.
+        get_worker().parse("<?php")
+
+
+def _convert_in_worker(source_file: str | Path) -> Conversion:
+    try:
+        source_code = Path(source_file).read_text()
+        php_ast = parse(source_code, _worker_cache, _worker_parser)
+        output = translate(
+            php_ast,
+            translation_cache=_worker_translation_cache,
+            optimizer=_worker_optimizer,
+        )
+    except CONVERSION_ERRORS as e:
+        return Conversion(source_file, error=e, traceback=traceback.format_exc())
+    return Conversion(source_file, output=output)
 
 
 if __name__ == "__main__":
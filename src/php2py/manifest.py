@@ -0,0 +1,145 @@
+"""Manifest of converted files, for incremental (make-style) conversion.
+
+For each source file, the manifest records the hash of the PHP source, a
+fingerprint of the converter and the hash of the Python output. A file is
+up to date, and skipped, if all three still match: its source didn't change,
+php2py didn't change, and its output wasn't edited or deleted.
+"""
+import functools
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import NamedTuple
+
+from .parser import get_parser_version
+
+DEFAULT_MANIFEST = ".php2py-manifest.json"
+
+# Bumped when the manifest format changes (older manifests are discarded).
+MANIFEST_VERSION = 1
+
+PACKAGE_DIR = Path(__file__).parent
+
+
+class Entry(NamedTuple):
+    source: str
+    translator: str
+    output: str
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@functools.cache
+def translator_fingerprint(parser: str) -> str:
+    """Return a hash of everything that determines the output of a file.
+
+    That is the php2py code, the PHP parser and its version, and the Python
+    version (`ast.unparse()` output varies between versions).
+    """
+    digest = hashlib.sha256()
+    python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    digest.update(f"{parser}:{get_parser_version()}:{python_version}".encode())
+    for path in sorted(PACKAGE_DIR.rglob("*.py")):
+        digest.update(b"\0" + str(path.relative_to(PACKAGE_DIR)).encode() + b"\0")
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path: Path | str, fingerprint: str):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.entries: dict[str, Entry] = {}
+        # Source hashes of the files handed out by `stale()`, until recorded.
+        self._source_hashes: dict[str, str] = {}
+        self.up_to_date = 0
+
+    @classmethod
+    def load(cls, path: Path | str, fingerprint: str) -> "Manifest":
+        manifest = cls(path, fingerprint)
+        try:
+            data = json.loads(manifest.path.read_text())
+        except FileNotFoundError:
+            return manifest
+        except ValueError:
+            # A corrupted manifest only means converting everything again.
+            return manifest
+        if data.get("version") == MANIFEST_VERSION:
+            manifest.entries = {
+                key: Entry(*entry) for key, entry in data["files"].items()
+            }
+        return manifest
+
+    def save(self):
+        files = {key: list(entry) for key, entry in sorted(self.entries.items())}
+        data = {"version": MANIFEST_VERSION, "files": files}
+        # Write to a temporary file first, so that an interrupted run never
+        # leaves a truncated manifest behind.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as fp:
+                json.dump(data, fp, indent=0)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def key(source_file: str | Path) -> str:
+        return str(Path(source_file).resolve())
+
+    def is_up_to_date(
+        self, source_file: str | Path, source_hash: str, output_file: Path
+    ) -> bool:
+        entry = self.entries.get(self.key(source_file))
+        if entry is None:
+            return False
+        if entry.source != source_hash or entry.translator != self.fingerprint:
+            return False
+        try:
+            return file_hash(output_file.read_bytes()) == entry.output
+        except OSError:
+            return False
+
+    def stale(
+        self,
+        source_files: Iterable[str | Path],
+        output_path: Callable[[str | Path], Path],
+        force: bool = False,
+    ) -> Iterator[str | Path]:
+        """Yield the files of `source_files` that need converting.
+
+        Files that can't be read are yielded too, so that the error is
+        reported by the conversion. With `force`, all files are yielded.
+        """
+        for source_file in source_files:
+            try:
+                source_hash = file_hash(Path(source_file).read_bytes())
+            except OSError:
+                yield source_file
+                continue
+
+            if not force and self.is_up_to_date(
+                source_file, source_hash, output_path(source_file)
+            ):
+                self.up_to_date += 1
+                continue
+            self._source_hashes[self.key(source_file)] = source_hash
+            yield source_file
+
+    def record(self, source_file: str | Path, output_file: Path | None):
+        """Record the output of a file from `stale()` (`None` if it failed)."""
+        key = self.key(source_file)
+        source_hash = self._source_hashes.pop(key, None)
+        if output_file is None or source_hash is None:
+            self.entries.pop(key, None)
+            return
+        output_hash = file_hash(output_file.read_bytes())
+        self.entries[key] = Entry(source_hash, self.fingerprint, output_hash)
@@ -0,0 +1,518 @@
+"""Optimization of the translated code (`convert -O`).
+
+PHP code is full of `if (DEBUG)` and `if (PHP_VERSION_ID >= 80000)` guards,
+constant arithmetic and literal concatenations. After translation, the
+Python AST goes through a chain of `ast.NodeTransformer` passes, depending
+on the optimization level:
+
+- `-O0` (default): none, the code is the translation of the PHP code as is;
+- `-O1`: the constants given by the user (`-D NAME=VALUE`,
+  `--constants FILE`) are substituted for their `ConstFetch`, constant
+  expressions are folded (`ConstantFolder`), and the branches whose
+  condition is constant are removed (`DeadBranches`);
+- `-O2`: also the constants defined in the file itself, once and at the top
+  level, with a literal value (`define("DEBUG", false);`,
+  `const VERSION = "1.2";`), and the statements after a `return`, `raise`,
+  `break` or `continue` (`UnreachableCode`).
+
+The passes only fold what Python would compute when running the generated
+code (an expression that would raise is left alone), so they don't change
+what it does, as long as the constants have the given values.
+"""
+import ast as py
+import hashlib
+import json
+import math
+import operator
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field, replace
+
+from .php_ast import (
+    Arg,
+    Const,
+    Expr_ConstFetch,
+    Expr_FuncCall,
+    Expr_UnaryMinus,
+    Name,
+    Node,
+    Scalar_DNumber,
+    Scalar_LNumber,
+    Scalar_String,
+    Stmt_Const,
+    Stmt_Expression,
+    Stmt_Namespace,
+)
+from .recursion import deep_recursion
+from .translator import Translator
+
+LEVELS = (0, 1, 2)
+DEFAULT_LEVEL = 0
+
+# Values that constants may have.
+ConstantValue = str | int | float | bool | None
+
+# Folded values larger than this (bits of an integer, characters of a
+# string) are left as expressions.
+MAX_SIZE = 4096
+
+BINARY_OPS = {
+    py.Add: operator.add,
+    py.Sub: operator.sub,
+    py.Mult: operator.mul,
+    py.Div: operator.truediv,
+    py.FloorDiv: operator.floordiv,
+    py.Mod: operator.mod,
+    py.Pow: operator.pow,
+    py.LShift: operator.lshift,
+    py.RShift: operator.rshift,
+    py.BitOr: operator.or_,
+    py.BitXor: operator.xor,
+    py.BitAnd: operator.and_,
+}
+
+UNARY_OPS = {
+    py.Not: operator.not_,
+    py.USub: operator.neg,
+    py.UAdd: operator.pos,
+    py.Invert: operator.invert,
+}
+
+# Not `is`: the identity of equal constants isn't guaranteed.
+COMPARE_OPS = {
+    py.Eq: operator.eq,
+    py.NotEq: operator.ne,
+    py.Lt: operator.lt,
+    py.LtE: operator.le,
+    py.Gt: operator.gt,
+    py.GtE: operator.ge,
+    py.In: lambda a, b: a in b,
+    py.NotIn: lambda a, b: a not in b,
+}
+
+# Returned by `literal_value()` for other expressions.
+NOT_LITERAL = object()
+
+# Fields of the statements holding blocks (or handlers and cases, which hold
+# blocks).
+BLOCK_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+# Nodes with their own scope (and `yield`s).
+SCOPES = (
+    py.FunctionDef,
+    py.AsyncFunctionDef,
+    py.Lambda,
+    py.ClassDef,
+    py.ListComp,
+    py.SetComp,
+    py.DictComp,
+    py.GeneratorExp,
+)
+
+# The translator writes `true`, `false` and `null` as names.
+NAMED_CONSTANTS = {"True": True, "False": False, "None": None}
+
+
+@dataclass(frozen=True)
+class Optimizer:
+    level: int = DEFAULT_LEVEL
+    # PHP constants, substituted from `-O1`.
+    constants: Mapping[str, ConstantValue] = field(default_factory=dict)
+
+    def for_file(self, php_nodes: Iterable[Node], translator: Translator):
+        """Return the optimizer of a file (at `-O2`, with the constants it
+        defines), and make `translator` substitute the constants."""
+        optimizer = self
+        if self.level >= 2:
+            optimizer = replace(
+                self, constants={**file_constants(php_nodes), **self.constants}
+            )
+        if self.level >= 1:
+            translator.constants = optimizer.constants
+        return optimizer
+
+    @property
+    def passes(self) -> list[type[py.NodeTransformer]]:
+        passes = []
+        if self.level >= 1:
+            passes += [ConstantFolder, DeadBranches]
+        if self.level >= 2:
+            passes.append(UnreachableCode)
+        return passes
+
+    def optimize(self, py_node: py.AST | list) -> py.AST | list:
+        """Return the optimized translation of a file or of top-level
+        statements (a node, or a list of them)."""
+        passes = self.passes
+        if not passes:
+            return py_node
+        # A module, to replace the top-level statements, but unparsed as a
+        # list (a module would start with a docstring).
+        module = py.Module(flatten(py_node), [])
+        for transformer in passes:
+            module = deep_recursion(transformer().visit, module)
+        return module.body
+
+    def fingerprint(self) -> str:
+        """Return a hash of the options, which determine the output."""
+        options = json.dumps([self.level, self.constants], sort_keys=True)
+        return hashlib.sha256(options.encode()).hexdigest()[:16]
+
+
+def flatten(py_node: py.AST | list) -> list[py.AST]:
+    if not isinstance(py_node, list):
+        return [py_node]
+    nodes = []
+    todo = [py_node]
+    while todo:
+        item = todo.pop()
+        if isinstance(item, list):
+            todo += reversed(item)
+        else:
+            nodes.append(item)
+    return nodes
+
+
+def file_constants(php_nodes: Iterable[Node]) -> dict[str, ConstantValue]:
+    """Return the constants defined once, at the top level of a file, with a
+    literal value."""
+    definitions: dict[str, list[ConstantValue]] = {}
+    todo = list(reversed(list(php_nodes)))
+    while todo:
+        node = todo.pop()
+        match node:
+            case Stmt_Namespace(stmts=list(stmts)):
+                todo += reversed(stmts)
+                continue
+            case Stmt_Expression(
+                expr=Expr_FuncCall(
+                    name=Name(parts=["define"]),
+                    args=[Arg(value=Scalar_String(value=name)), Arg(value=value)],
+                )
+            ):
+                consts = [(name, value)]
+            case Stmt_Const(consts=consts):
+                consts = [
+                    (const.name.name, const.value)
+                    for const in consts
+                    if isinstance(const, Const)
+                ]
+            case _:
+                continue
+        for name, value in consts:
+            definitions.setdefault(name, []).append(literal_value(value))
+
+    return {
+        name: values[0]
+        for name, values in definitions.items()
+        if len(values) == 1 and values[0] is not NOT_LITERAL
+    }
+
+
+def literal_value(node: Node) -> ConstantValue | object:
+    """Return the value of a literal, or `NOT_LITERAL`."""
+    match node:
+        case Scalar_String(value=value) | Scalar_LNumber(value=value):
+            return value
+        case Scalar_DNumber(value=value):
+            return float(value)
+        case Expr_UnaryMinus(expr=Scalar_LNumber(value=value)):
+            return -value
+        case Expr_UnaryMinus(expr=Scalar_DNumber(value=value)):
+            return -float(value)
+        case Expr_ConstFetch(name=Name(parts=[name])):
+            match name.lower():
+                case "true":
+                    return True
+                case "false":
+                    return False
+                case "null":
+                    return None
+    return NOT_LITERAL
+
+
+class Unfoldable(Exception):
+    pass
+
+
+class ConstantFolder(py.NodeTransformer):
+    """Replace the expressions whose operands are constants with their value
+    (children first, so that nested expressions fold all the way)."""
+
+    def visit_Name(self, node: py.Name):
+        if isinstance(node.ctx, py.Load) and node.id in NAMED_CONSTANTS:
+            return py.copy_location(py.Constant(NAMED_CONSTANTS[node.id]), node)
+        return node
+
+    def visit_BinOp(self, node: py.BinOp):
+        self.generic_visit(node)
+        match node:
+            case py.BinOp(
+                left=py.Constant(value=left), op=op, right=py.Constant(value=right)
+            ) if type(op) in BINARY_OPS:
+                return self.fold(node, fold_binary_op, op, left, right)
+        return node
+
+    def visit_UnaryOp(self, node: py.UnaryOp):
+        self.generic_visit(node)
+        match node:
+            case py.UnaryOp(op=op, operand=py.Constant(value=value)):
+                return self.fold(node, UNARY_OPS[type(op)], value)
+        return node
+
+    def visit_Compare(self, node: py.Compare):
+        self.generic_visit(node)
+        operands = [node.left, *node.comparators]
+        if not all(isinstance(operand, py.Constant) for operand in operands):
+            return node
+        if not all(type(op) in COMPARE_OPS for op in node.ops):
+            return node
+        values = [operand.value for operand in operands]
+        return self.fold(node, compare, node.ops, values)
+
+    def visit_BoolOp(self, node: py.BoolOp):
+        self.generic_visit(node)
+        # `a and b` is `a` if `a` is false, else `b` (and the reverse for
+        # `or`): the leading constants are either the value, or skipped.
+        values = node.values
+        stop_on = isinstance(node.op, py.Or)
+        while len(values) > 1 and isinstance(values[0], py.Constant):
+            if bool(values[0].value) == stop_on:
+                return values[0]
+            values = values[1:]
+        if len(values) == 1:
+            return values[0]
+        node.values = values
+        return node
+
+    def visit_IfExp(self, node: py.IfExp):
+        self.generic_visit(node)
+        if isinstance(node.test, py.Constant):
+            return node.body if node.test.value else node.orelse
+        return node
+
+    def visit_JoinedStr(self, node: py.JoinedStr):
+        self.generic_visit(node)
+        parts = []
+        for part in node.values:
+            match part:
+                case py.FormattedValue(
+                    value=py.Constant(value=value), conversion=-1, format_spec=None
+                ) if not isinstance(value, bytes):
+                    part = py.Constant(format(value))
+            if (
+                parts
+                and isinstance(part, py.Constant)
+                and isinstance(parts[-1], py.Constant)
+            ):
+                parts[-1] = py.Constant(parts[-1].value + part.value)
+            else:
+                parts.append(part)
+        if all(isinstance(part, py.Constant) for part in parts):
+            value = "".join(part.value for part in parts)
+            return py.copy_location(py.Constant(value), node)
+        node.values = parts
+        return node
+
+    def fold(self, node: py.expr, function, *args) -> py.expr:
+        try:
+            value = function(*args)
+        except (Unfoldable, ArithmeticError, TypeError, ValueError):
+            return node
+        if not is_small(value):
+            return node
+        return py.copy_location(py.Constant(value), node)
+
+
+def fold_binary_op(
+    op: py.operator, left: ConstantValue, right: ConstantValue
+) -> ConstantValue:
+    # Check the size before computing huge values (e.g. `10 ** 10 ** 9`).
+    if isinstance(left, int) and isinstance(right, int):
+        if (
+            isinstance(op, py.Pow)
+            and right > 0
+            and left.bit_length() * right > MAX_SIZE
+        ):
+            raise Unfoldable
+        if isinstance(op, py.LShift) and right > MAX_SIZE:
+            raise Unfoldable
+    if isinstance(op, py.Mult):
+        for sequence, times in ((left, right), (right, left)):
+            if (
+                isinstance(sequence, str)
+                and isinstance(times, int)
+                and len(sequence) * times > MAX_SIZE
+            ):
+                raise Unfoldable
+    return BINARY_OPS[type(op)](left, right)
+
+
+def compare(ops: list[py.cmpop], values: list[ConstantValue]) -> bool:
+    return all(
+        COMPARE_OPS[type(op)](left, right)
+        for op, left, right in zip(ops, values, values[1:])
+    )
+
+
+def is_small(value: ConstantValue) -> bool:
+    match value:
+        case bool() | None:
+            return True
+        case int():
+            return value.bit_length() <= MAX_SIZE
+        case float():
+            # `ast.unparse()` can't write NaN, and writes infinity as 1e309.
+            return math.isfinite(value)
+        case str():
+            return len(value) <= MAX_SIZE
+    return False
+
+
+class BlockTransformer(py.NodeTransformer):
+    """A transformer of statements, which may remove some (blocks left empty
+    get a `pass`).
+
+    Only the blocks of statements are visited: expressions don't have any.
+
+    Dead code is only removed if `removable()`: in a function, a `yield`
+    makes it a generator, and an assignment makes the variable local (without
+    `if False: x = 1`, `return x` would return a global `x` instead of
+    raising).
+    """
+
+    def __init__(self):
+        # The number of bindings of each name in the function being
+        # visited (`None` outside functions).
+        self.bindings: Counter | None = None
+
+    def visit_FunctionDef(self, node: py.FunctionDef | py.AsyncFunctionDef):
+        outer = self.bindings
+        self.bindings = Counter(bound_names([node.args, *node.body]))
+        try:
+            return self.generic_visit(node)
+        finally:
+            self.bindings = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_ClassDef(self, node: py.ClassDef):
+        # The names of a class body are looked up globally when unbound.
+        outer = self.bindings
+        self.bindings = None
+        try:
+            return self.generic_visit(node)
+        finally:
+            self.bindings = outer
+
+    def generic_visit(self, node: py.AST):
+        for name in BLOCK_FIELDS:
+            block = getattr(node, name, None)
+            if isinstance(block, list):
+                setattr(node, name, self.visit_block(block))
+        if not isinstance(node, py.Module) and getattr(node, "body", None) == []:
+            node.body = [py.Pass()]
+        return node
+
+    def visit_block(self, block: list[py.AST]) -> list[py.AST]:
+        visited = []
+        for stmt in block:
+            result = self.visit(stmt)
+            if isinstance(result, list):
+                visited += result
+            elif result is not None:
+                visited.append(result)
+        return visited
+
+    def removable(self, dead: list[py.AST]) -> bool:
+        """Tell if the `dead` statements can be removed (and count them as
+        removed if so): they have no `yield`, and the names they bind are
+        bound elsewhere in the function."""
+        if contains_yield(dead):
+            return False
+        if self.bindings is None:
+            return True
+        dead_bindings = Counter(bound_names(dead))
+        if any(self.bindings[name] <= n for name, n in dead_bindings.items()):
+            return False
+        self.bindings -= dead_bindings
+        return True
+
+
+class DeadBranches(BlockTransformer):
+    """Replace `if` statements whose condition is constant with the branch
+    taken, and remove `while` loops whose condition is false (see
+    `removable()`)."""
+
+    def visit_If(self, node: py.If):
+        if isinstance(node.test, py.Constant):
+            taken, dead = node.body, node.orelse
+            if not node.test.value:
+                taken, dead = dead, taken
+            if self.removable(dead):
+                return self.visit_block(taken)
+        return self.generic_visit(node)
+
+    def visit_While(self, node: py.While):
+        if (
+            isinstance(node.test, py.Constant)
+            and not node.test.value
+            and self.removable(node.body)
+        ):
+            return self.visit_block(node.orelse)
+        return self.generic_visit(node)
+
+
+class UnreachableCode(BlockTransformer):
+    """Remove the statements after a `return`, `raise`, `break` or
+    `continue` in a block (see `removable()`)."""
+
+    def visit_block(self, block: list[py.AST]) -> list[py.AST]:
+        for i, stmt in enumerate(block):
+            if isinstance(stmt, (py.Return, py.Raise, py.Break, py.Continue)):
+                if self.removable(block[i + 1 :]):
+                    block = block[: i + 1]
+                break
+        return super().visit_block(block)
+
+
+def scope_nodes(nodes: list[py.AST]) -> Iterator[py.AST]:
+    """Yield the nodes of `nodes` in the scope they are in (the functions,
+    classes and comprehensions defined there, but not their nodes)."""
+    todo = list(nodes)
+    while todo:
+        node = todo.pop()
+        yield node
+        if not isinstance(node, SCOPES):
+            todo.extend(py.iter_child_nodes(node))
+
+
+def bound_names(nodes: list[py.AST]) -> Iterator[str]:
+    """Yield the names bound by `nodes` in their scope (once per binding)."""
+    for node in scope_nodes(nodes):
+        match node:
+            case py.Name(ctx=py.Store() | py.Del()):
+                yield node.id
+            case py.FunctionDef() | py.AsyncFunctionDef() | py.ClassDef():
+                yield node.name
+            case py.Import() | py.ImportFrom():
+                for alias in node.names:
+                    yield alias.asname or alias.name.split(".")[0]
+            case py.Global() | py.Nonlocal():
+                yield from node.names
+            case py.arg():
+                yield node.arg
+            case py.ExceptHandler(name=str()) | py.MatchAs(name=str()):
+                yield node.name
+            case py.MatchStar(name=str()):
+                yield node.name
+            case py.MatchMapping(rest=str()):
+                yield node.rest
+
+
+def contains_yield(nodes: list[py.AST]) -> bool:
+    """Tell if `nodes` have a `yield` of the function they are in (not of a
+    function defined there)."""
+    return any(
+        isinstance(node, (py.Yield, py.YieldFrom)) for node in scope_nodes(nodes)
+    )
@@ -1,17 +1,54 @@
+import atexit
+import functools
+import hashlib
 import json
-import shlex
-import shutil
 import subprocess
-import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager, nullcontext
+from itertools import islice
 from pathlib import Path
+from typing import NamedTuple
 
-from devtools import debug
+import attr
 from platformdirs import user_cache_dir
 
 from . import php_ast
+from .cache import ParseCache
 from .constants import APP_NAME
+from .recursion import recursion_section
 
 PHP_PARSE = "vendor/nikic/php-parser/bin/php-parse"
+AUTOLOAD = "vendor/autoload.php"
+ETC_DIR = Path(__file__).parent / "etc"
+PARSE_SERVER = ETC_DIR / "parse_server.php"
+
+# Wire format of the parser output: "compact" (see `etc/compact_dumper.php`)
+# or "json" (the format of `php-parse -j`).
+DEFAULT_FORMAT = "compact"
+
+# Opcodes of the compact format (node type ids are >= 0).
+OP_VALUE = -1
+OP_NULL = -2
+OP_LIST = -3
+
+# Fields whose name is a Python keyword get a trailing underscore.
+REMAPPED_ATTRS = {
+    "if": "if_",
+    "else": "else_",
+    "class": "class_",
+    "finally": "finally_",
+}
+
+# Number of files handled by each PHP process in `parse_many()`.
+DEFAULT_CHUNK_SIZE = 500
+
+# Front-ends: nikic/php-parser in a PHP process, or `php2py.php_parser`.
+PARSERS = ("nikic", "python")
+DEFAULT_PARSER = "nikic"
+
+
+class ParseError(ValueError):
+    """Raised when the PHP parser rejects a source file or dies."""
 
 
 def install_parser(force: bool = False, ignore_errors: bool = False):
@@ -35,79 +72,401 @@ def install_parser(force: bool = False, ignore_errors: bool = False):
     subprocess.run("composer install", shell=True, cwd=cache_dir)
 
 
-def parse(source_code):
-    cache_dir = Path(user_cache_dir(APP_NAME))
-    php_parse = cache_dir / PHP_PARSE
-    assert php_parse.exists()
+@functools.cache
+def get_parser_version() -> str:
+    """Return the nikic/php-parser version pinned in `etc/composer.lock`."""
+    lock = json.loads((ETC_DIR / "composer.lock").read_text())
+    for package in lock["packages"]:
+        if package["name"] == "nikic/php-parser":
+            return package["version"]
+    raise KeyError("nikic/php-parser")
+
+
+@functools.cache
+def get_schema() -> bytes:
+    """Return the node types and their fields, as expected by the dumper."""
+    schema = [[spec.cls.__name__, spec.json_fields] for spec in NODE_SPECS_BY_ID]
+    return json.dumps(schema).encode()
+
+
+def get_parse_cache(format: str = DEFAULT_FORMAT) -> ParseCache:
+    """Return a parse cache for the current parser and AST format."""
+    schema_hash = hashlib.sha256(get_schema()).hexdigest()[:16]
+    return ParseCache(version=f"{format}:{get_parser_version()}:{schema_hash}")
+
+
+def parse(
+    source_code: str,
+    cache: ParseCache | None = None,
+    parser: str = DEFAULT_PARSER,
+    phase: Callable[[str], AbstractContextManager] = nullcontext,
+) -> list[php_ast.Node]:
+    """Parse PHP source code, reusing the shared parser worker.
+
+    If `cache` is given, the parser output is looked up there first, and
+    stored there after a successful parse. The Python parser (`parser=
+    "python"`) runs in-process and doesn't use the cache.
+
+    `phase(name)` is entered around the "parse" (PHP process round trip)
+    and "decode" (AST building) steps, for profiling.
+    """
+    if parser == "python":
+        from . import php_parser
+
+        with phase("parse"):
+            return php_parser.parse(source_code)
+    return _parse_with(get_worker(), encode_source(source_code), cache, phase)
+
+
+def parse_many(
+    paths: Iterable[str | Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: ParseCache | None = None,
+    parser: str = DEFAULT_PARSER,
+) -> Iterator[tuple[str | Path, list[php_ast.Node] | Exception]]:
+    """Parse several PHP files, using one PHP process per chunk of files.
+
+    Yields `(path, php_ast)` pairs in order. If a file can't be read or
+    parsed, the exception is yielded in place of its AST and the remaining
+    files are still processed.
+    """
+    if parser == "python":
+        yield from _parse_many_in_process(paths)
+        return
+
+    paths = iter(paths)
+    while chunk := list(islice(paths, chunk_size)):
+        with ParserWorker() as worker:
+            for path in chunk:
+                try:
+                    data = encode_source(Path(path).read_text())
+                    php_ast = _parse_with(worker, data, cache)
+                except (OSError, UnicodeDecodeError, ParseError) as e:
+                    yield path, e
+                else:
+                    yield path, php_ast
+
+
+def _parse_many_in_process(
+    paths: Iterable[str | Path],
+) -> Iterator[tuple[str | Path, list[php_ast.Node] | Exception]]:
+    from . import php_parser
+
+    for path in paths:
+        try:
+            php_ast = php_parser.parse(Path(path).read_text())
+        except (OSError, UnicodeDecodeError, ParseError) as e:
+            yield path, e
+        else:
+            yield path, php_ast
+
+
+def _parse_with(
+    worker: "ParserWorker",
+    data: bytes,
+    cache: ParseCache | None,
+    phase: Callable[[str], AbstractContextManager] = nullcontext,
+) -> list[php_ast.Node]:
+    with phase("parse"):
+        payload = cache.get(data) if cache is not None else None
+        cached = payload is not None
+        if not cached:
+            payload = worker.request(data)
+
+    with phase("decode"):
+        result = decode_response(payload, worker.format)
+    if cache is not None and not cached:
+        cache.put(data, payload)
+    return result
+
+
+def parse_oneshot(source_code: str) -> list[php_ast.Node]:
+    """Parse PHP source code in a fresh PHP process (one process per call).
+
+    The source is piped to the process, nothing is written to disk, and the
+    process is always reaped, even if parsing fails.
+    """
+    with ParserWorker() as worker:
+        return worker.parse(source_code)
+
+
+class ParserWorker:
+    """A long-lived PHP process running `etc/parse_server.php`.
+
+    Sources are sent on the worker's stdin as length-prefixed blobs, and ASTs
+    (in the given wire format) are read back the same way from its stdout.
+    The process is started lazily and restarted if it dies.
+    """
+
+    def __init__(self, php: str = "php", format: str = DEFAULT_FORMAT):
+        self.php = php
+        self.format = format
+        self.process: subprocess.Popen | None = None
+
+    def __enter__(self):
+        return self
 
-    with tempfile.NamedTemporaryFile("w", suffix=".php", delete=False) as source_file:
-        source_file.write(source_code)
-        source_file.flush()
+    def __exit__(self, *exc_info):
+        self.close()
 
-        cmd_line = f"{php_parse} -j {source_file.name}"
-        args = shlex.split(cmd_line)
-        which = shutil.which(args[0])
-        assert which is not None
-        with subprocess.Popen(
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        autoload = Path(user_cache_dir(APP_NAME)) / AUTOLOAD
+        assert autoload.exists()
+
+        args = [self.php, str(PARSE_SERVER), str(autoload)]
+        if self.format == "compact":
+            args.append("--compact")
+        self.process = subprocess.Popen(
             args,
+            stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        ) as p:
-            data = p.stdout.read()
+        )
+        if self.format == "compact":
+            self._send(get_schema())
+
+    def close(self):
+        if self.process is None:
+            return
+
+        process, self.process = self.process, None
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        finally:
+            process.stdout.close()
+
+    def parse(self, source_code: str) -> list[php_ast.Node]:
+        payload = self.request(encode_source(source_code))
+        return decode_response(payload, self.format)
+
+    def request(self, data: bytes) -> bytes:
+        """Send one source blob and return the raw response.
+
+        If the worker has died (or dies while handling the request), it is
+        restarted and the request is retried once.
+        """
+        for attempt in range(2):
+            if not self.alive:
+                self.start()
             try:
-                json_ast = json.loads(data)
-            except json.JSONDecodeError:
-                debug(args, which, data, stderr=p.stderr.read())
-                raise ValueError("Could not parse PHP file")
-            result = make_ast(json_ast)
+                return self._roundtrip(data)
+            except (OSError, EOFError) as e:
+                self.close()
+                if attempt:
+                    raise ParseError(f"PHP parser process died: {e}") from e
+
+    def _roundtrip(self, data: bytes) -> bytes:
+        self._send(data)
+        return self._receive()
+
+    def _send(self, data: bytes):
+        stdin = self.process.stdin
+        stdin.write(b"%d\n" % len(data))
+        stdin.write(data)
+        stdin.flush()
+
+    def _receive(self) -> bytes:
+        stdout = self.process.stdout
+        header = stdout.readline()
+        if not header:
+            raise EOFError("no response")
+        # E.g. a PHP warning: out of sync with the worker, like a crash.
+        if not header.strip().isdigit():
+            raise EOFError(f"malformed response header {header!r}")
+        length = int(header)
+        payload = stdout.read(length)
+        if len(payload) != length:
+            raise EOFError("truncated response")
+        return payload
 
+
+def encode_source(source_code: str) -> bytes:
+    return source_code.encode("utf8", "surrogateescape")
+
+
+def decode_response(payload: bytes, format: str) -> list[php_ast.Node]:
+    """Decode a parser response, raising `ParseError` for reported errors."""
+    with recursion_section():
+        data = json.loads(payload)
+    if isinstance(data, dict):
+        raise ParseError(data["error"])
+    if format == "compact":
+        return decode_compact(data)
+    return make_ast(data)
+
+
+def decode_compact(data: list) -> list[php_ast.Node]:
+    """Build an AST from the compact format of `etc/compact_dumper.php`."""
+    ops, values = data
+    values = iter(values)
+    stack = []
+    push = stack.append
+
+    ops = iter(ops)
+    for op in ops:
+        if op >= 0:
+            node_class, arity = NODE_ARITIES[op]
+            if arity:
+                args = stack[-arity:]
+                del stack[-arity:]
+                push(node_class(*args, lineno=next(ops)))
+            else:
+                push(node_class(lineno=next(ops)))
+        elif op == OP_VALUE:
+            push(next(values))
+        elif op == OP_NULL:
+            push(None)
+        else:
+            length = next(ops)
+            if length:
+                items = stack[-length:]
+                del stack[-length:]
+                push(items)
+            else:
+                push([])
+
+    [result] = stack
     return result
 
 
+_worker: ParserWorker | None = None
+
+
+def get_worker() -> ParserWorker:
+    """Return the process-wide parser worker, creating it on first use."""
+    global _worker
+    if _worker is None:
+        _worker = ParserWorker()
+        atexit.register(_worker.close)
+    return _worker
+
+
+#
+# Node registry
+#
+# Annotations of fields that never contain nodes (or lists of nodes): their
+# JSON values are used as is.
+SCALAR_TYPES = {"int", "str", "float", "bool"}
+
+
+class NodeSpec(NamedTuple):
+    """How to build a node of a given type."""
+
+    id: int
+    cls: type[php_ast.Node]
+    #: Field names, in the order of the constructor's positional arguments.
+    fields: tuple[str, ...]
+    #: The same field names, as they appear in the PHP AST.
+    json_fields: tuple[str, ...]
+    #: `(json_field, is_scalar)` pairs, for `make_ast()`.
+    converters: tuple[tuple[str, bool], ...]
+
+
+def is_scalar_type(annotation: str | type | None) -> bool:
+    if not isinstance(annotation, str):
+        return False
+    types = {t.strip() for t in annotation.split("|")}
+    return not types.isdisjoint(SCALAR_TYPES) and types <= SCALAR_TYPES | {"None"}
+
+
+def make_node_specs() -> list[NodeSpec]:
+    """Return the specs of all the node classes, sorted by name (and id)."""
+    php_names = {v: k for k, v in REMAPPED_ATTRS.items()}
+    node_classes = sorted(
+        (
+            cls
+            for cls in vars(php_ast).values()
+            if isinstance(cls, type)
+            and issubclass(cls, php_ast.Node)
+            and cls.__module__ == php_ast.__name__
+        ),
+        key=lambda cls: cls.__name__,
+    )
+
+    specs = []
+    for id, cls in enumerate(node_classes):
+        # Keyword-only fields (i.e. `Node._lineno`) are not part of the AST.
+        fields = [f for f in attr.fields(cls) if not f.kw_only]
+        json_fields = tuple(php_names.get(f.name, f.name) for f in fields)
+        converters = tuple(
+            (json_field, is_scalar_type(f.type))
+            for json_field, f in zip(json_fields, fields)
+        )
+        specs.append(
+            NodeSpec(id, cls, tuple(f.name for f in fields), json_fields, converters)
+        )
+    return specs
+
+
+NODE_SPECS_BY_ID = make_node_specs()
+NODE_SPECS = {spec.cls.__name__: spec for spec in NODE_SPECS_BY_ID}
+NODE_ARITIES = [(spec.cls, len(spec.fields)) for spec in NODE_SPECS_BY_ID]
+
+
 def make_ast(
     json_node: list | dict | str | int | None,
 ) -> php_ast.Node | list[php_ast.Node] | None:
-    if isinstance(json_node, list):
-        return [make_ast(subnode) for subnode in json_node]
-
-    if isinstance(json_node, str):
-        return None
+    """Build php_ast nodes from a JSON AST.
 
-    if json_node is None:
-        return None
+    The tree is walked with an explicit stack instead of recursion, so that
+    arbitrarily deep ASTs don't hit Python's recursion limit. There are two
+    kinds of tasks on the stack:
 
-    assert isinstance(json_node, dict)
-    if "nodeType" not in json_node:
-        return None
+    - `(json_value, target, index)`: convert `json_value` and store the result
+      in `target[index]`;
+    - `(spec, args, lineno, target, index)`: once all the `args` have been
+      converted (their tasks are above this one on the stack), build the node
+      and store it in `target[index]`.
+    """
+    root = [None]
+    todo = [(json_node, root, 0)]
+    push = todo.append
+    pop = todo.pop
 
-    node_type = json_node["nodeType"]
-    node_class = getattr(php_ast, node_type)
-    args = {k: None for k in node_class.__annotations__}
+    while todo:
+        task = pop()
 
-    for attr, value in json_node.items():
-        if attr in {"nodeType", "attributes"}:
+        if len(task) == 5:
+            spec, args, lineno, target, index = task
+            target[index] = spec.cls(*args, lineno=lineno)
             continue
 
-        remap_attrs = {
-            "if": "if_",
-            "else": "else_",
-            "class": "class_",
-            "finally": "finally_",
-        }
-        attr = remap_attrs.get(attr, attr)
-
-        match value:
-            case [*_]:
-                args[attr] = make_ast(value)
-            case {"nodeType": _}:
-                args[attr] = make_ast(value)
-            case _:
-                args[attr] = value
-
-    node = node_class(**args)
-
-    # Hacks
-    node._json = json_node
-    node._attributes = json_node["attributes"]
-
-    return node
+        value, target, index = task
+        if isinstance(value, list):
+            items = value[:]
+            target[index] = items
+            for i, item in enumerate(value):
+                if isinstance(item, (list, dict)):
+                    push((item, items, i))
+
+        elif isinstance(value, dict):
+            node_type = value.get("nodeType")
+            if node_type is None:
+                target[index] = None
+                continue
+
+            spec = NODE_SPECS[node_type]
+            args = []
+            push((spec, args, value["attributes"]["startLine"], target, index))
+            get = value.get
+            for i, (json_field, is_scalar) in enumerate(spec.converters):
+                field_value = get(json_field)
+                args.append(field_value)
+                if is_scalar or field_value is None:
+                    continue
+                if isinstance(field_value, list) or (
+                    isinstance(field_value, dict) and "nodeType" in field_value
+                ):
+                    push((field_value, args, i))
+
+        else:
+            target[index] = value
+
+    return root[0]
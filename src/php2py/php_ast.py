@@ -1,37 +1,40 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import Any
 
-from attr import dataclass
+from attr import attrib, attrs
 from devtools import debug
 
-frozen = dataclass
+# Nodes are slotted (no per-instance `__dict__`, no `__weakref__`), to keep
+# the memory footprint of large ASTs down.
+frozen = partial(attrs, auto_attribs=True, slots=True, weakref_slot=False)
 
 
 @frozen
 class Node:
+    # Start line in the PHP source (0 if unknown). Keyword-only, so it stays
+    # out of the positional arguments and `__match_args__` of subclasses,
+    # and ignored when comparing nodes.
+    _lineno: int = attrib(default=0, kw_only=True, eq=False, repr=False)
+
     def __getitem__(self, item):
         if item == "nodeType":
             return self.__class__.__name__
         raise KeyError(item)
 
-    @property
-    def _lineno(self):
-        return self._json["attributes"]["startLine"]
-
     @property
     def _col_offset(self):
         return 0
-        # return self._attributes["col_offset"]
 
     def get_parts(self):
-        if "parts" in self._json:
-            return self._json["parts"]
+        if hasattr(self, "parts"):
+            return self.parts
 
-        if "name" in self._json:
-            return [self._json["name"]]
+        if hasattr(self, "name"):
+            return [self.name]
 
-        debug(self._json)
+        debug(self)
         raise ValueError()
 
 
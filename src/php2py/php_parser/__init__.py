@@ -0,0 +1,9 @@
+"""A PHP parser written in Python.
+
+An in-process alternative to nikic/php-parser (run in a PHP subprocess),
+building the same `php_ast` nodes. Select it with `--parser=python`.
+"""
+from .lexer import tokenize
+from .parser import parse
+
+__all__ = ["parse", "tokenize"]
@@ -0,0 +1,444 @@
+"""Tokenizer for PHP source code.
+
+Follows the token stream of PHP's own lexer (as seen by nikic/php-parser),
+with a few simplifications:
+
+- keywords have their lowercase name as kind (`die` is `exit`), operators and
+  punctuation are their own kind, other tokens have PHP's name (`T_STRING`,
+  `T_VARIABLE`, ...);
+- whitespace, comments and open tags are dropped, `<?=` is `echo` and `?>`
+  is `;`;
+- each token records the end line of the comments just before it, which the
+  parser needs to create `Stmt_Nop` nodes where nikic/php-parser does.
+"""
+import re
+from typing import NamedTuple
+
+from ..parser import ParseError
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    line: int
+    # End line of the last comment before the token (0 if none).
+    comment_line: int = 0
+
+
+LABEL_START = r"[a-zA-Z_\x80-\U0010ffff]"
+LABEL = LABEL_START + r"[a-zA-Z0-9_\x80-\U0010ffff]*"
+LNUM = r"[0-9]+(?:_[0-9]+)*"
+EXPONENT = rf"e[+-]?{LNUM}"
+
+KEYWORDS = frozenset(
+    [
+        "abstract",
+        "and",
+        "array",
+        "as",
+        "break",
+        "callable",
+        "case",
+        "catch",
+        "class",
+        "clone",
+        "const",
+        "continue",
+        "declare",
+        "default",
+        "do",
+        "echo",
+        "else",
+        "elseif",
+        "empty",
+        "enddeclare",
+        "endfor",
+        "endforeach",
+        "endif",
+        "endswitch",
+        "endwhile",
+        "eval",
+        "exit",
+        "extends",
+        "final",
+        "finally",
+        "fn",
+        "for",
+        "foreach",
+        "function",
+        "global",
+        "goto",
+        "if",
+        "implements",
+        "include",
+        "include_once",
+        "instanceof",
+        "insteadof",
+        "interface",
+        "isset",
+        "list",
+        "match",
+        "namespace",
+        "new",
+        "or",
+        "print",
+        "private",
+        "protected",
+        "public",
+        "readonly",
+        "require",
+        "require_once",
+        "return",
+        "static",
+        "switch",
+        "throw",
+        "trait",
+        "try",
+        "unset",
+        "use",
+        "var",
+        "while",
+        "xor",
+        "yield",
+        "__class__",
+        "__dir__",
+        "__file__",
+        "__function__",
+        "__halt_compiler",
+        "__line__",
+        "__method__",
+        "__namespace__",
+        "__trait__",
+    ]
+)
+KEYWORD_KINDS = {keyword: keyword for keyword in KEYWORDS} | {"die": "exit"}
+
+OPERATORS = sorted(
+    [
+        "<<=",
+        ">>=",
+        "**=",
+        "...",
+        "<=>",
+        "===",
+        "!==",
+        "??=",
+        "?->",
+        "++",
+        "--",
+        "->",
+        "=>",
+        "::",
+        "==",
+        "!=",
+        "<>",
+        "<=",
+        ">=",
+        "&&",
+        "||",
+        "??",
+        "+=",
+        "-=",
+        "*=",
+        "/=",
+        ".=",
+        "%=",
+        "&=",
+        "|=",
+        "^=",
+        "<<",
+        ">>",
+        "**",
+        ";",
+        ":",
+        ",",
+        ".",
+        "[",
+        "]",
+        "(",
+        ")",
+        "{",
+        "}",
+        "|",
+        "^",
+        "&",
+        "+",
+        "-",
+        "/",
+        "*",
+        "=",
+        "%",
+        "!",
+        "~",
+        "$",
+        "<",
+        ">",
+        "?",
+        "@",
+        "\\",
+    ],
+    key=len,
+    reverse=True,
+)
+
+SCRIPT_RE = re.compile(
+    rf"""
+      (?P<whitespace>[ \t\r\n]+)
+    | (?P<comment>
+          (?://|\#(?!\[))[^\r\n?]*(?:\?(?!>)[^\r\n?]*)*
+        | /\*[\s\S]*?(?:\*/|\Z)
+      )
+    | (?P<close_tag>\?>(?:\r\n|\n)?)
+    | (?P<variable>\${LABEL})
+    | (?P<cast>
+          \([ \t]*
+          (?:int|integer|bool|boolean|float|double|real|string|binary|array|object|unset)
+          [ \t]*\)
+      )
+    | (?P<dnumber>
+          (?:(?:{LNUM})?\.{LNUM}|{LNUM}\.(?:{LNUM})?)(?:{EXPONENT})?
+        | {LNUM}{EXPONENT}
+      )
+    | (?P<lnumber>
+          0x[0-9a-f]+(?:_[0-9a-f]+)*
+        | 0b[01]+(?:_[01]+)*
+        | 0o[0-7]+(?:_[0-7]+)*
+        | {LNUM}
+      )
+    | (?P<string>b?'(?:[^'\\]|\\[\s\S])*')
+    | (?P<constant_string>b?"(?:[^"\\$]|\\[\s\S]|\$(?!{LABEL_START}|\{{))*")
+    | (?P<double_quote>b?")
+    | (?P<heredoc>b?<<<[ \t]*(?:{LABEL}|"{LABEL}"|'{LABEL}')(?:\r\n|\n))
+    | (?P<yield_from>yield[ \t\r\n]+from(?![a-zA-Z0-9_\x80-\U0010ffff]))
+    | (?P<name>(?:namespace\\|\\)?{LABEL}(?:\\{LABEL})*)
+    | (?P<attribute>\#\[)
+    | (?P<operator>{"|".join(re.escape(op) for op in OPERATORS)})
+    | (?P<backquote>`)
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+OPEN_TAG_RE = re.compile(r"<\?(?:php(?:[ \t]|\r\n|\n|\Z)|=)", re.IGNORECASE)
+LABEL_RE = re.compile(LABEL)
+PROPERTY_RE = re.compile(rf"(\??->)({LABEL})")
+VAR_OFFSET_RE = re.compile(
+    rf"(?P<num>0x[0-9a-f]+|0b[01]+|[0-9]+)|(?P<label>{LABEL})|(?P<var>\${LABEL})",
+    re.IGNORECASE,
+)
+STRING_VARNAME_RE = re.compile(rf"{LABEL}(?=[\[}}])")
+HEREDOC_LABEL_RE = re.compile(LABEL)
+
+# Where interpolation (or the end of the string) may start, per quote.
+INTERPOLATION_RES = {
+    quote: re.compile(
+        rf"\\[\s\S]|\$(?={LABEL_START}|\{{)|\{{(?=\$)" + (f"|{quote}" if quote else "")
+    )
+    for quote in ['"', "`", None]
+}
+
+
+def tokenize(source: str) -> list[Token]:
+    """Split PHP source code into tokens, ending with an `EOF` token."""
+    lexer = Lexer(source)
+    lexer.run()
+    return lexer.tokens
+
+
+class Lexer:
+    def __init__(self, source: str):
+        self.source = source
+        self.pos = 0
+        self.line = 1
+        self.comment_line = 0
+        self.tokens: list[Token] = []
+
+    def run(self):
+        while self.pos < len(self.source):
+            self.lex_html()
+            if self.pos < len(self.source):
+                self.lex_script()
+        self.emit("EOF", "")
+
+    def emit(self, kind: str, text: str):
+        self.tokens.append(Token(kind, text, self.line, self.comment_line))
+        self.comment_line = 0
+        self.line += text.count("\n")
+
+    def error(self, message: str) -> ParseError:
+        return ParseError(f"{message} on line {self.line}")
+
+    def lex_html(self):
+        source = self.source
+        m = OPEN_TAG_RE.search(source, self.pos)
+        end = m.start() if m else len(source)
+        if end > self.pos:
+            self.emit("T_INLINE_HTML", source[self.pos : end])
+        if m is None:
+            self.pos = end
+            return
+
+        tag = m.group()
+        self.line += tag.count("\n")
+        if tag == "<?=":
+            self.emit("echo", tag)
+        self.pos = m.end()
+
+    def lex_script(self, nested: bool = False):
+        """Lex PHP code, until `?>` or, if `nested`, an unmatched `}`."""
+        source = self.source
+        match = SCRIPT_RE.match
+        depth = 0
+        while self.pos < len(source):
+            m = match(source, self.pos)
+            if m is None:
+                raise self.error(f"Syntax error, unexpected {source[self.pos]!r}")
+
+            kind = m.lastgroup
+            text = m.group()
+            self.pos = m.end()
+
+            match kind:
+                case "whitespace":
+                    self.line += text.count("\n")
+                case "comment":
+                    self.comment_line = self.line + text.count("\n")
+                    self.line = self.comment_line
+                case "close_tag":
+                    self.emit(";", text)
+                    return
+                case "variable":
+                    self.emit("T_VARIABLE", text)
+                case "cast":
+                    self.emit("T_CAST", text[1:-1].strip(" \t").lower())
+                case "dnumber":
+                    self.emit("T_DNUMBER", text)
+                case "lnumber":
+                    self.emit("T_LNUMBER", text)
+                case "string" | "constant_string":
+                    self.emit("T_CONSTANT_ENCAPSED_STRING", text)
+                case "double_quote":
+                    self.lex_quoted('"', text)
+                case "backquote":
+                    self.lex_quoted("`", text)
+                case "heredoc":
+                    self.lex_heredoc(text)
+                case "yield_from":
+                    self.emit("yield from", text)
+                case "name":
+                    self.emit(name_kind(text), text)
+                case "attribute":
+                    self.emit("T_ATTRIBUTE", text)
+                case "operator":
+                    if text == "{":
+                        depth += 1
+                    elif text == "}":
+                        if nested and depth == 0:
+                            self.emit("}", text)
+                            return
+                        depth -= 1
+                    self.emit(text, text)
+
+        if nested:
+            raise self.error("Syntax error, unexpected end of file")
+
+    def lex_quoted(self, quote: str, text: str):
+        self.emit(quote, text)
+        self.lex_interpolated(len(self.source), quote)
+        if self.pos >= len(self.source):
+            raise self.error("Syntax error, unterminated string")
+        self.emit(quote, quote)
+        self.pos += 1
+
+    def lex_heredoc(self, text: str):
+        label = HEREDOC_LABEL_RE.search(text, text.index("<<<") + 3).group()
+        end_re = re.compile(
+            rf"^[ \t]*{re.escape(label)}(?![a-zA-Z0-9_\x80-\U0010ffff])", re.MULTILINE
+        )
+        end = end_re.search(self.source, self.pos)
+        if end is None:
+            raise self.error("Syntax error, unterminated heredoc")
+
+        self.emit("T_START_HEREDOC", text)
+        if "'" in text:
+            self.emit_string_part(self.source[self.pos : end.start()])
+        else:
+            self.lex_interpolated(end.start(), None)
+        self.emit("T_END_HEREDOC", end.group())
+        self.pos = end.end()
+
+    def lex_interpolated(self, end: int, quote: str | None):
+        """Lex the inside of a string with interpolation, up to `end` or `quote`.
+
+        Stops on the closing quote (without consuming it) or at `end`.
+        """
+        source = self.source
+        search = INTERPOLATION_RES[quote].search
+        start = pos = self.pos
+        while m := search(source, pos, end):
+            text = m.group()
+            pos = m.end()
+            if text[0] == "\\":
+                continue
+
+            self.emit_string_part(source[start : m.start()])
+            if text == quote:
+                self.pos = m.start()
+                return
+
+            if text == "{":
+                self.emit("T_CURLY_OPEN", text)
+                self.pos = pos
+                self.lex_script(nested=True)
+            elif source.startswith("${", m.start()):
+                self.emit("T_DOLLAR_OPEN_CURLY_BRACES", "${")
+                self.pos = pos + 1
+                if varname := STRING_VARNAME_RE.match(source, self.pos):
+                    self.emit("T_STRING_VARNAME", varname.group())
+                    self.pos = varname.end()
+                self.lex_script(nested=True)
+            else:
+                self.pos = m.start()
+                self.lex_simple_interpolation()
+            start = pos = self.pos
+
+        self.emit_string_part(source[start:end])
+        self.pos = end
+
+    def lex_simple_interpolation(self):
+        """Lex `$name`, `$name[offset]` or `$name->property` in a string."""
+        source = self.source
+        name = LABEL_RE.match(source, self.pos + 1)
+        self.emit("T_VARIABLE", source[self.pos : name.end()])
+        self.pos = name.end()
+
+        if source.startswith("[", self.pos):
+            self.emit("[", "[")
+            self.pos += 1
+            if source.startswith("-", self.pos):
+                self.emit("-", "-")
+                self.pos += 1
+            m = VAR_OFFSET_RE.match(source, self.pos)
+            if m is None or not source.startswith("]", m.end()):
+                raise self.error("Syntax error, invalid string offset")
+            kind = {"num": "T_NUM_STRING", "label": "T_STRING", "var": "T_VARIABLE"}
+            self.emit(kind[m.lastgroup], m.group())
+            self.emit("]", "]")
+            self.pos = m.end() + 1
+        elif m := PROPERTY_RE.match(source, self.pos):
+            self.emit(m.group(1), m.group(1))
+            self.emit("T_STRING", m.group(2))
+            self.pos = m.end()
+
+    def emit_string_part(self, text: str):
+        if text:
+            self.emit("T_ENCAPSED_AND_WHITESPACE", text)
+
+
+def name_kind(text: str) -> str:
+    if text[0] == "\\":
+        return "T_NAME_FULLY_QUALIFIED"
+    if "\\" in text:
+        if text[:10].lower() == "namespace\\":
+            return "T_NAME_RELATIVE"
+        return "T_NAME_QUALIFIED"
+    return KEYWORD_KINDS.get(text.lower(), "T_STRING")
@@ -0,0 +1,143 @@
+"""Decoding of PHP string and number literals, as done by nikic/php-parser."""
+import re
+
+from ..parser import ParseError
+
+PHP_INT_MAX = 2**63 - 1
+
+ESCAPE_RE = re.compile(
+    r"\\([\\$nrtfve]|[xX][0-9a-fA-F]{1,2}|[0-7]{1,3}|u\{([0-9a-fA-F]+)\})"
+)
+REPLACEMENTS = {
+    "\\": "\\",
+    "$": "$",
+    "n": "\n",
+    "t": "\t",
+    "r": "\r",
+    "f": "\f",
+    "v": "\v",
+    "e": "\x1b",
+}
+ESCAPED_BYTE_RE = re.compile("[\udc80-\udcff]")
+NUM_STRING_RE = re.compile(r"(?:0|-?[1-9][0-9]*)\Z")
+TRAILING_NEWLINE_RE = re.compile(r"(?:\r\n|\n|\r)\Z")
+
+
+def parse_string(text: str) -> str:
+    """Return the value of a single- or double-quoted string literal."""
+    if text[0] in "bB":
+        text = text[1:]
+    if text[0] == "'":
+        return text[1:-1].replace("\\\\", "\\").replace("\\'", "'")
+    return parse_escape_sequences(text[1:-1], '"')
+
+
+def parse_escape_sequences(text: str, quote: str | None) -> str:
+    if "\\" not in text:
+        return text
+
+    if quote is not None:
+        text = text.replace("\\" + quote, quote)
+    text = ESCAPE_RE.sub(_replace_escape, text)
+    if ESCAPED_BYTE_RE.search(text):
+        # Bytes from `\x..` and octal escapes must combine into UTF-8, as the
+        # PHP front-end can't send other strings over JSON either.
+        try:
+            text = text.encode("utf-8", "surrogateescape").decode("utf-8")
+        except UnicodeDecodeError:
+            raise ParseError(
+                "Malformed UTF-8 characters, possibly incorrectly encoded"
+            ) from None
+    return text
+
+
+def _replace_escape(m: re.Match) -> str:
+    escape = m.group(1)
+    if escape in REPLACEMENTS:
+        return REPLACEMENTS[escape]
+    if escape[0] in "xX":
+        return _byte(int(escape[1:], 16))
+    if escape[0] == "u":
+        code_point = int(m.group(2), 16)
+        if code_point > 0x10FFFF:
+            raise ParseError(
+                "Invalid UTF-8 codepoint escape sequence: Codepoint too large"
+            )
+        return chr(code_point)
+    return _byte(int(escape, 8) & 0xFF)
+
+
+def _byte(value: int) -> str:
+    # Non-ASCII bytes are represented as in `surrogateescape`-decoded text.
+    return chr(value) if value < 0x80 else chr(0xDC00 + value)
+
+
+def parse_int(text: str) -> int:
+    """Return the value of an integer literal (possibly above PHP_INT_MAX)."""
+    text = text.replace("_", "")
+    if text[0] != "0" or text == "0":
+        return int(text)
+    match text[1]:
+        case "x" | "X":
+            return int(text, 16)
+        case "b" | "B":
+            return int(text, 2)
+        case "o" | "O":
+            return int(text, 8)
+    if "8" in text or "9" in text:
+        raise ParseError("Invalid numeric literal")
+    return int(text, 8)
+
+
+def parse_float(text: str) -> float:
+    return float(text.replace("_", ""))
+
+
+def parse_num_string(text: str) -> int | str:
+    """Return the value of an offset in a string, like `1` in `"$a[1]"`."""
+    if not NUM_STRING_RE.match(text):
+        return text
+    value = int(text)
+    if not -PHP_INT_MAX - 1 <= value <= PHP_INT_MAX:
+        return text
+    return value
+
+
+def get_doc_indentation(end_token: str) -> str:
+    """Return the indentation of a heredoc, from its closing marker."""
+    indentation = end_token[: len(end_token) - len(end_token.lstrip(" \t"))]
+    if " " in indentation and "\t" in indentation:
+        raise ParseError("Invalid indentation - tabs and spaces cannot be mixed")
+    return indentation
+
+
+def strip_indentation(
+    text: str, indentation: str, at_start: bool, at_end: bool, line: int
+) -> str:
+    """Remove the heredoc `indentation` from the lines of `text`."""
+    indent_len = len(indentation)
+    if indent_len == 0:
+        return text
+
+    start = r"(?:(?<=\n)|\A)" if at_start else r"(?<=\n)"
+    end = r"(?:(?=[\r\n])|\Z)" if at_end else r"(?=[\r\n])"
+    wrong_char = "\t" if indentation[0] == " " else " "
+
+    def replace(m: re.Match) -> str:
+        prefix = m.group(1)[:indent_len]
+        if wrong_char in prefix:
+            raise ParseError(
+                f"Invalid indentation - tabs and spaces cannot be mixed on line {line}"
+            )
+        if len(prefix) < indent_len and m.group(2) is None:
+            raise ParseError(
+                "Invalid body indentation level (expecting an indentation level"
+                f" of at least {indent_len}) on line {line}"
+            )
+        return m.group(1)[indent_len:]
+
+    return re.sub(f"{start}([ \\t]*)({end})?", replace, text)
+
+
+def strip_trailing_newline(text: str) -> str:
+    return TRAILING_NEWLINE_RE.sub("", text)
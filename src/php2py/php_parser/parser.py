@@ -0,0 +1,1920 @@
+"""Recursive descent parser for PHP, building `php_ast` nodes.
+
+The AST is the one nikic/php-parser (v4) builds, down to its quirks (block
+statements are flattened, comments before a `;` or at the end of a statement
+list become `Stmt_Nop`, `else if` is an `Stmt_Else` wrapping an `Stmt_If`,
+...), so that the translator can't tell the two front-ends apart.
+
+Binary operators are parsed by precedence climbing, with the precedences of
+PHP 7's grammar. Like in PHP, an assignment binds to the variable just before
+it whatever the surrounding operators (`!$a = f()` is `!($a = f())`).
+"""
+from .. import php_ast
+from ..parser import ParseError
+from ..php_ast import (
+    Arg,
+    Attribute,
+    AttributeGroup,
+    Const,
+    Expr_Array,
+    Expr_ArrayDimFetch,
+    Expr_ArrayItem,
+    Expr_ArrowFunction,
+    Expr_Assign,
+    Expr_AssignRef,
+    Expr_BinaryOp_BitwiseAnd,
+    Expr_BinaryOp_BitwiseOr,
+    Expr_BinaryOp_BitwiseXor,
+    Expr_BinaryOp_BooleanAnd,
+    Expr_BinaryOp_BooleanOr,
+    Expr_BinaryOp_Coalesce,
+    Expr_BinaryOp_Concat,
+    Expr_BinaryOp_Div,
+    Expr_BinaryOp_Equal,
+    Expr_BinaryOp_Greater,
+    Expr_BinaryOp_GreaterOrEqual,
+    Expr_BinaryOp_Identical,
+    Expr_BinaryOp_LogicalAnd,
+    Expr_BinaryOp_LogicalOr,
+    Expr_BinaryOp_LogicalXor,
+    Expr_BinaryOp_Minus,
+    Expr_BinaryOp_Mod,
+    Expr_BinaryOp_Mul,
+    Expr_BinaryOp_NotEqual,
+    Expr_BinaryOp_NotIdentical,
+    Expr_BinaryOp_Plus,
+    Expr_BinaryOp_Pow,
+    Expr_BinaryOp_ShiftLeft,
+    Expr_BinaryOp_ShiftRight,
+    Expr_BinaryOp_Smaller,
+    Expr_BinaryOp_SmallerOrEqual,
+    Expr_BinaryOp_Spaceship,
+    Expr_BitwiseNot,
+    Expr_BooleanNot,
+    Expr_ClassConstFetch,
+    Expr_Clone,
+    Expr_Closure,
+    Expr_ClosureUse,
+    Expr_ConstFetch,
+    Expr_Empty,
+    Expr_ErrorSuppress,
+    Expr_Eval,
+    Expr_Exit,
+    Expr_FuncCall,
+    Expr_Include,
+    Expr_Instanceof,
+    Expr_Isset,
+    Expr_List,
+    Expr_Match,
+    Expr_MethodCall,
+    Expr_New,
+    Expr_NullsafeMethodCall,
+    Expr_NullsafePropertyFetch,
+    Expr_PostDec,
+    Expr_PostInc,
+    Expr_PreDec,
+    Expr_PreInc,
+    Expr_Print,
+    Expr_PropertyFetch,
+    Expr_ShellExec,
+    Expr_StaticCall,
+    Expr_StaticPropertyFetch,
+    Expr_Ternary,
+    Expr_Throw,
+    Expr_UnaryMinus,
+    Expr_UnaryPlus,
+    Expr_Variable,
+    Expr_Yield,
+    Expr_YieldFrom,
+    Identifier,
+    MatchArm,
+    Name,
+    Name_FullyQualified,
+    Name_Relative,
+    Node,
+    NullableType,
+    Param,
+    Scalar_DNumber,
+    Scalar_Encapsed,
+    Scalar_EncapsedStringPart,
+    Scalar_LNumber,
+    Scalar_String,
+    Stmt_Break,
+    Stmt_Case,
+    Stmt_Catch,
+    Stmt_Class,
+    Stmt_ClassConst,
+    Stmt_ClassMethod,
+    Stmt_Const,
+    Stmt_Continue,
+    Stmt_Declare,
+    Stmt_DeclareDeclare,
+    Stmt_Do,
+    Stmt_Echo,
+    Stmt_Else,
+    Stmt_ElseIf,
+    Stmt_Enum,
+    Stmt_EnumCase,
+    Stmt_Expression,
+    Stmt_Finally,
+    Stmt_For,
+    Stmt_Foreach,
+    Stmt_Function,
+    Stmt_Global,
+    Stmt_Goto,
+    Stmt_GroupUse,
+    Stmt_If,
+    Stmt_InlineHTML,
+    Stmt_Interface,
+    Stmt_Label,
+    Stmt_Namespace,
+    Stmt_Nop,
+    Stmt_Property,
+    Stmt_PropertyProperty,
+    Stmt_Return,
+    Stmt_Static,
+    Stmt_StaticVar,
+    Stmt_Switch,
+    Stmt_Throw,
+    Stmt_Trait,
+    Stmt_TraitUse,
+    Stmt_TraitUseAdaptation_Alias,
+    Stmt_TryCatch,
+    Stmt_Unset,
+    Stmt_Use,
+    Stmt_UseUse,
+    Stmt_While,
+)
+from ..recursion import deep_recursion
+from .lexer import KEYWORDS, Token, tokenize
+from .literals import (
+    PHP_INT_MAX,
+    get_doc_indentation,
+    parse_escape_sequences,
+    parse_float,
+    parse_int,
+    parse_num_string,
+    parse_string,
+    strip_indentation,
+    strip_trailing_newline,
+)
+
+LEFT, RIGHT, NONASSOC = range(3)
+
+# Binary operators: precedence, associativity and node class.
+BINARY_OPS = {
+    "or": (1, LEFT, Expr_BinaryOp_LogicalOr),
+    "xor": (2, LEFT, Expr_BinaryOp_LogicalXor),
+    "and": (3, LEFT, Expr_BinaryOp_LogicalAnd),
+    "??": (10, RIGHT, Expr_BinaryOp_Coalesce),
+    "||": (11, LEFT, Expr_BinaryOp_BooleanOr),
+    "&&": (12, LEFT, Expr_BinaryOp_BooleanAnd),
+    "|": (13, LEFT, Expr_BinaryOp_BitwiseOr),
+    "^": (14, LEFT, Expr_BinaryOp_BitwiseXor),
+    "&": (15, LEFT, Expr_BinaryOp_BitwiseAnd),
+    "==": (16, NONASSOC, Expr_BinaryOp_Equal),
+    "!=": (16, NONASSOC, Expr_BinaryOp_NotEqual),
+    "<>": (16, NONASSOC, Expr_BinaryOp_NotEqual),
+    "===": (16, NONASSOC, Expr_BinaryOp_Identical),
+    "!==": (16, NONASSOC, Expr_BinaryOp_NotIdentical),
+    "<=>": (16, NONASSOC, Expr_BinaryOp_Spaceship),
+    "<": (17, NONASSOC, Expr_BinaryOp_Smaller),
+    "<=": (17, NONASSOC, Expr_BinaryOp_SmallerOrEqual),
+    ">": (17, NONASSOC, Expr_BinaryOp_Greater),
+    ">=": (17, NONASSOC, Expr_BinaryOp_GreaterOrEqual),
+    "<<": (18, LEFT, Expr_BinaryOp_ShiftLeft),
+    ">>": (18, LEFT, Expr_BinaryOp_ShiftRight),
+    "+": (19, LEFT, Expr_BinaryOp_Plus),
+    "-": (19, LEFT, Expr_BinaryOp_Minus),
+    ".": (19, LEFT, Expr_BinaryOp_Concat),
+    "*": (20, LEFT, Expr_BinaryOp_Mul),
+    "/": (20, LEFT, Expr_BinaryOp_Div),
+    "%": (20, LEFT, Expr_BinaryOp_Mod),
+    "instanceof": (22, NONASSOC, Expr_Instanceof),
+    "**": (24, RIGHT, Expr_BinaryOp_Pow),
+}
+
+# Precedences of the other operators.
+INCLUDE_PREC = THROW_PREC = ARROW_FN_PREC = 0
+PRINT_PREC = 4
+YIELD_PREC = 5
+YIELD_FROM_PREC = 7
+ASSIGN_PREC = 8
+TERNARY_PREC = 9
+NOT_PREC = 21
+UNARY_PREC = 23
+CLONE_PREC = 25
+
+ASSIGN_OPS = {
+    "+=": "Expr_AssignOp_Plus",
+    "-=": "Expr_AssignOp_Minus",
+    "*=": "Expr_AssignOp_Mul",
+    "/=": "Expr_AssignOp_Div",
+    ".=": "Expr_AssignOp_Concat",
+    "%=": "Expr_AssignOp_Mod",
+    "**=": "Expr_AssignOp_Pow",
+    "&=": "Expr_AssignOp_BitwiseAnd",
+    "|=": "Expr_AssignOp_BitwiseOr",
+    "^=": "Expr_AssignOp_BitwiseXor",
+    "<<=": "Expr_AssignOp_ShiftLeft",
+    ">>=": "Expr_AssignOp_ShiftRight",
+    "??=": "Expr_AssignOp_Coalesce",
+}
+ASSIGNABLE = (
+    Expr_Variable,
+    Expr_ArrayDimFetch,
+    Expr_PropertyFetch,
+    Expr_NullsafePropertyFetch,
+    Expr_StaticPropertyFetch,
+    Expr_List,
+    Expr_Array,
+)
+
+CASTS = {
+    "int": "Expr_Cast_Int",
+    "integer": "Expr_Cast_Int",
+    "bool": "Expr_Cast_Bool",
+    "boolean": "Expr_Cast_Bool",
+    "float": "Expr_Cast_Double",
+    "double": "Expr_Cast_Double",
+    "real": "Expr_Cast_Double",
+    "string": "Expr_Cast_String",
+    "binary": "Expr_Cast_String",
+    "array": "Expr_Cast_Array",
+    "object": "Expr_Cast_Object",
+    "unset": "Expr_Cast_Unset",
+}
+MAGIC_CONSTANTS = {
+    "__line__": "Scalar_MagicConst_Line",
+    "__file__": "Scalar_MagicConst_File",
+    "__dir__": "Scalar_MagicConst_Dir",
+    "__function__": "Scalar_MagicConst_Function",
+    "__class__": "Scalar_MagicConst_Class",
+    "__method__": "Scalar_MagicConst_Method",
+    "__namespace__": "Scalar_MagicConst_Namespace",
+    "__trait__": "Scalar_MagicConst_Trait",
+}
+INCLUDE_TYPES = {"include": 1, "include_once": 2, "require": 3, "require_once": 4}
+
+# Class member modifiers (`Stmt_Class::MODIFIER_*`).
+MODIFIERS = {
+    "public": 1,
+    "protected": 2,
+    "private": 4,
+    "static": 8,
+    "abstract": 16,
+    "final": 32,
+    "readonly": 64,
+}
+VISIBILITY = {"public", "protected", "private"}
+
+# `Stmt_Use::TYPE_*`.
+USE_UNKNOWN, USE_NORMAL, USE_FUNCTION, USE_CONSTANT = range(4)
+
+BUILTIN_TYPES = {
+    "bool",
+    "int",
+    "float",
+    "string",
+    "iterable",
+    "void",
+    "object",
+    "null",
+    "false",
+    "mixed",
+    "never",
+    "true",
+}
+
+NAME_KINDS = {
+    "T_STRING",
+    "T_NAME_QUALIFIED",
+    "T_NAME_FULLY_QUALIFIED",
+    "T_NAME_RELATIVE",
+}
+IDENTIFIER_KINDS = KEYWORDS | {"T_STRING", "exit"}
+CLASS_DECLARATION_KINDS = {"abstract", "final", "readonly", "class"}
+
+# Tokens after which `yield` has no operand.
+YIELD_END_KINDS = {";", ")", ",", "]", "}", "=>", ":", "as", "EOF"}
+
+END_OF_FILE = frozenset(["EOF"])
+END_OF_BLOCK = frozenset(["}"])
+END_OF_CASE = frozenset(["case", "default", "}", "endswitch"])
+
+
+def parse(source: str) -> list[Node]:
+    """Parse PHP source code into `php_ast` nodes.
+
+    The parser recurses for each level of nesting, with a large stack if
+    needed (see `recursion`).
+    """
+    try:
+        return deep_recursion(lambda: Parser(tokenize(source)).parse_file())
+    except RecursionError:
+        raise ParseError("Code is nested too deeply") from None
+
+
+def node_class(name: str) -> type:
+    """Return the `php_ast` class called `name`.
+
+    Node types that have no class yet are rejected, as the PHP front-end does.
+    """
+    cls = getattr(php_ast, name, None)
+    if cls is None:
+        raise ParseError(f"Unsupported node type: {name}")
+    return cls
+
+
+class Parser:
+    def __init__(self, tokens: list[Token]):
+        self.tokens = tokens
+        self.seek(0)
+
+        self.statement_parsers = {
+            "{": self.parse_block,
+            ";": self.parse_empty_statement,
+            "T_INLINE_HTML": self.parse_inline_html,
+            "T_ATTRIBUTE": self.parse_attributed_statement,
+            "if": self.parse_if,
+            "while": self.parse_while,
+            "do": self.parse_do,
+            "for": self.parse_for,
+            "foreach": self.parse_foreach,
+            "switch": self.parse_switch,
+            "break": self.parse_break,
+            "continue": self.parse_continue,
+            "return": self.parse_return,
+            "global": self.parse_global,
+            "static": self.parse_static,
+            "echo": self.parse_echo,
+            "unset": self.parse_unset,
+            "try": self.parse_try,
+            "throw": self.parse_throw,
+            "goto": self.parse_goto,
+            "declare": self.parse_declare,
+            "function": self.parse_function,
+            "abstract": self.parse_class,
+            "final": self.parse_class,
+            "readonly": self.parse_class,
+            "class": self.parse_class,
+            "interface": self.parse_interface,
+            "trait": self.parse_trait,
+            "namespace": self.parse_namespace,
+            "use": self.parse_use,
+            "const": self.parse_const,
+            "__halt_compiler": self.parse_halt_compiler,
+        }
+        self.prefix_parsers = {
+            "!": self.parse_not,
+            "-": self.parse_unary_op,
+            "+": self.parse_unary_op,
+            "~": self.parse_unary_op,
+            "@": self.parse_unary_op,
+            "T_CAST": self.parse_cast,
+            "++": self.parse_pre_inc_dec,
+            "--": self.parse_pre_inc_dec,
+            "clone": self.parse_clone,
+            "new": self.parse_new,
+            "print": self.parse_print,
+            "yield": self.parse_yield,
+            "yield from": self.parse_yield_from,
+            "throw": self.parse_throw_expr,
+            "include": self.parse_include,
+            "include_once": self.parse_include,
+            "require": self.parse_include,
+            "require_once": self.parse_include,
+            "function": self.parse_closure,
+            "fn": self.parse_closure,
+            "static": self.parse_static_expr,
+            "T_ATTRIBUTE": self.parse_closure,
+        }
+        self.primary_parsers = {
+            "T_VARIABLE": self.parse_variable,
+            "$": self.parse_variable,
+            "T_STRING": self.parse_name_expr,
+            "T_NAME_QUALIFIED": self.parse_name_expr,
+            "T_NAME_FULLY_QUALIFIED": self.parse_name_expr,
+            "T_NAME_RELATIVE": self.parse_name_expr,
+            "static": self.parse_name_expr,
+            "(": self.parse_parenthesized,
+            "[": self.parse_short_array,
+            "array": self.parse_long_array,
+            "list": self.parse_list,
+            "isset": self.parse_isset,
+            "empty": self.parse_empty,
+            "eval": self.parse_eval,
+            "exit": self.parse_exit,
+            "match": self.parse_match,
+            "T_LNUMBER": self.parse_lnumber,
+            "T_DNUMBER": self.parse_dnumber,
+            "T_CONSTANT_ENCAPSED_STRING": self.parse_constant_string,
+            '"': self.parse_encapsed,
+            "`": self.parse_shell_exec,
+            "T_START_HEREDOC": self.parse_heredoc,
+        }
+        for kind in MAGIC_CONSTANTS:
+            self.primary_parsers[kind] = self.parse_magic_constant
+
+    #
+    # Token stream
+    #
+    def seek(self, pos: int):
+        self.pos = pos
+        self.token = self.tokens[pos]
+        self.kind = self.token.kind
+
+    def advance(self) -> Token:
+        token = self.token
+        if self.pos < len(self.tokens) - 1:
+            self.seek(self.pos + 1)
+        return token
+
+    def peek(self, offset: int = 1) -> str:
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)].kind
+
+    def accept(self, kind: str) -> bool:
+        if self.kind == kind:
+            self.advance()
+            return True
+        return False
+
+    def expect(self, kind: str) -> Token:
+        if self.kind != kind:
+            raise self.error(kind)
+        return self.advance()
+
+    def error(self, expecting: str | None = None) -> ParseError:
+        token = self.token
+        if token.kind == "EOF":
+            unexpected = "EOF"
+        elif token.kind.startswith("T_"):
+            unexpected = f"{token.kind} '{token.text}'"
+        else:
+            unexpected = f"'{token.text}'"
+        message = f"Syntax error, unexpected {unexpected}"
+        if expecting:
+            message += f", expecting '{expecting}'"
+        return ParseError(f"{message} on line {token.line}")
+
+    def semicolon(self):
+        # `?>` is lexed as a `;`.
+        self.expect(";")
+
+    #
+    # Statements
+    #
+    def parse_file(self) -> list[Node]:
+        stmts = self.parse_statements(END_OF_FILE)
+        return self.handle_namespaces(stmts)
+
+    def parse_statements(self, end_kinds) -> list[Node]:
+        stmts = []
+        while self.kind not in end_kinds:
+            if self.kind == "EOF":
+                raise self.error()
+            stmt = self.parse_statement()
+            if type(stmt) is list:
+                stmts += stmt
+            elif stmt is not None:
+                stmts.append(stmt)
+        self.add_trailing_nop(stmts)
+        return stmts
+
+    def add_trailing_nop(self, stmts: list[Node]):
+        # Comments at the end of a statement list are kept as a `Stmt_Nop`.
+        if self.token.comment_line:
+            stmts.append(Stmt_Nop(lineno=self.token.comment_line))
+
+    def parse_statement(self) -> Node | list[Node] | None:
+        parser = self.statement_parsers.get(self.kind)
+        if parser is not None:
+            return parser()
+        if self.kind == "T_STRING":
+            if self.peek() == ":":
+                return self.parse_label()
+            if self.is_enum_declaration():
+                return self.parse_enum()
+        return self.parse_expression_statement()
+
+    def parse_body(self) -> list[Node]:
+        """Parse the body of a control structure (a statement or a block)."""
+        stmt = self.parse_statement()
+        if type(stmt) is list:
+            return stmt
+        return [] if stmt is None else [stmt]
+
+    def parse_block(self) -> list[Node]:
+        self.expect("{")
+        stmts = self.parse_statements(END_OF_BLOCK)
+        self.expect("}")
+        return stmts
+
+    def parse_empty_statement(self) -> Stmt_Nop | None:
+        token = self.advance()
+        if token.comment_line:
+            return Stmt_Nop(lineno=token.line)
+        return None
+
+    def parse_inline_html(self) -> Stmt_InlineHTML:
+        token = self.advance()
+        return Stmt_InlineHTML(value=token.text, lineno=token.line)
+
+    def parse_expression_statement(self) -> Stmt_Expression:
+        line = self.token.line
+        expr = self.parse_expr()
+        self.semicolon()
+        return Stmt_Expression(expr=expr, lineno=line)
+
+    def parse_label(self) -> Stmt_Label:
+        token = self.advance()
+        self.expect(":")
+        name = Identifier(name=token.text, lineno=token.line)
+        return Stmt_Label(name=name, lineno=token.line)
+
+    def parse_goto(self) -> Stmt_Goto:
+        line = self.advance().line
+        name = self.parse_identifier()
+        self.semicolon()
+        return Stmt_Goto(name=name, lineno=line)
+
+    def parse_if(self) -> Stmt_If:
+        line = self.advance().line
+        cond = self.parse_parenthesized()
+        if self.accept(":"):
+            return self.parse_alternative_if(cond, line)
+
+        stmts = self.parse_body()
+        elseifs = []
+        while self.kind == "elseif":
+            elseif_line = self.advance().line
+            elseif_cond = self.parse_parenthesized()
+            elseif_stmts = self.parse_body()
+            elseifs.append(
+                Stmt_ElseIf(cond=elseif_cond, stmts=elseif_stmts, lineno=elseif_line)
+            )
+        else_ = None
+        if self.kind == "else":
+            else_line = self.advance().line
+            else_ = Stmt_Else(stmts=self.parse_body(), lineno=else_line)
+        return Stmt_If(
+            cond=cond, stmts=stmts, elseifs=elseifs, else_=else_, lineno=line
+        )
+
+    def parse_alternative_if(self, cond: Node, line: int) -> Stmt_If:
+        end_kinds = frozenset(["elseif", "else", "endif"])
+        stmts = self.parse_statements(end_kinds)
+        elseifs = []
+        while self.kind == "elseif":
+            elseif_line = self.advance().line
+            elseif_cond = self.parse_parenthesized()
+            self.expect(":")
+            elseif_stmts = self.parse_statements(end_kinds)
+            elseifs.append(
+                Stmt_ElseIf(cond=elseif_cond, stmts=elseif_stmts, lineno=elseif_line)
+            )
+        else_ = None
+        if self.kind == "else":
+            else_line = self.advance().line
+            self.expect(":")
+            else_stmts = self.parse_statements(frozenset(["endif"]))
+            else_ = Stmt_Else(stmts=else_stmts, lineno=else_line)
+        self.expect("endif")
+        self.semicolon()
+        return Stmt_If(
+            cond=cond, stmts=stmts, elseifs=elseifs, else_=else_, lineno=line
+        )
+
+    def parse_loop_body(self, end_kind: str) -> list[Node]:
+        if not self.accept(":"):
+            return self.parse_body()
+        stmts = self.parse_statements(frozenset([end_kind]))
+        self.expect(end_kind)
+        self.semicolon()
+        return stmts
+
+    def parse_while(self) -> Stmt_While:
+        line = self.advance().line
+        cond = self.parse_parenthesized()
+        stmts = self.parse_loop_body("endwhile")
+        return Stmt_While(cond=cond, stmts=stmts, lineno=line)
+
+    def parse_do(self) -> Stmt_Do:
+        line = self.advance().line
+        stmts = self.parse_body()
+        self.expect("while")
+        cond = self.parse_parenthesized()
+        self.semicolon()
+        return Stmt_Do(stmts=stmts, cond=cond, lineno=line)
+
+    def parse_for(self) -> Stmt_For:
+        line = self.advance().line
+        self.expect("(")
+        init = self.parse_expr_list(";")
+        self.expect(";")
+        cond = self.parse_expr_list(";")
+        self.expect(";")
+        loop = self.parse_expr_list(")")
+        self.expect(")")
+        stmts = self.parse_loop_body("endfor")
+        return Stmt_For(init=init, cond=cond, loop=loop, stmts=stmts, lineno=line)
+
+    def parse_expr_list(self, end_kind: str) -> list[Node]:
+        exprs = []
+        if self.kind != end_kind:
+            exprs.append(self.parse_expr())
+            while self.accept(","):
+                exprs.append(self.parse_expr())
+        return exprs
+
+    def parse_foreach(self) -> Stmt_Foreach:
+        line = self.advance().line
+        self.expect("(")
+        expr = self.parse_expr()
+        self.expect("as")
+
+        key_var = None
+        by_ref = self.accept("&")
+        value_var = self.parse_foreach_variable()
+        if not by_ref and self.accept("=>"):
+            key_var = value_var
+            by_ref = self.accept("&")
+            value_var = self.parse_foreach_variable()
+        self.expect(")")
+
+        stmts = self.parse_loop_body("endforeach")
+        return Stmt_Foreach(
+            expr=expr,
+            keyVar=key_var,
+            byRef=by_ref,
+            valueVar=value_var,
+            stmts=stmts,
+            lineno=line,
+        )
+
+    def parse_foreach_variable(self) -> Node:
+        var = self.parse_expr()
+        if isinstance(var, Expr_Array):
+            var = fixup_array_destructuring(var)
+        return var
+
+    def parse_switch(self) -> Stmt_Switch:
+        line = self.advance().line
+        cond = self.parse_parenthesized()
+        alternative = self.accept(":")
+        if not alternative:
+            self.expect("{")
+        self.accept(";")
+
+        cases = []
+        while self.kind in ("case", "default"):
+            case_line = self.token.line
+            if self.advance().kind == "case":
+                case_cond = self.parse_expr()
+            else:
+                case_cond = None
+            if not self.accept(";"):
+                self.expect(":")
+            case_stmts = self.parse_statements(END_OF_CASE)
+            cases.append(Stmt_Case(cond=case_cond, stmts=case_stmts, lineno=case_line))
+
+        if alternative:
+            self.expect("endswitch")
+            self.semicolon()
+        else:
+            self.expect("}")
+        return Stmt_Switch(cond=cond, cases=cases, lineno=line)
+
+    def parse_optional_expr(self) -> Node | None:
+        if self.kind == ";":
+            return None
+        return self.parse_expr()
+
+    def parse_break(self) -> Stmt_Break:
+        line = self.advance().line
+        num = self.parse_optional_expr()
+        self.semicolon()
+        return Stmt_Break(num=num, lineno=line)
+
+    def parse_continue(self) -> Stmt_Continue:
+        line = self.advance().line
+        num = self.parse_optional_expr()
+        self.semicolon()
+        return Stmt_Continue(num=num, lineno=line)
+
+    def parse_return(self) -> Stmt_Return:
+        line = self.advance().line
+        expr = self.parse_optional_expr()
+        self.semicolon()
+        return Stmt_Return(expr=expr, lineno=line)
+
+    def parse_global(self) -> Stmt_Global:
+        line = self.advance().line
+        vars = self.parse_expr_list(";")
+        self.semicolon()
+        return Stmt_Global(vars=vars, lineno=line)
+
+    def parse_static(self) -> Node:
+        if self.peek() != "T_VARIABLE":
+            return self.parse_expression_statement()
+
+        line = self.advance().line
+        vars = []
+        while True:
+            token = self.expect("T_VARIABLE")
+            var = Expr_Variable(name=token.text[1:], lineno=token.line)
+            default = self.parse_expr() if self.accept("=") else None
+            vars.append(Stmt_StaticVar(var=var, default=default, lineno=token.line))
+            if not self.accept(","):
+                break
+        self.semicolon()
+        return Stmt_Static(vars=vars, lineno=line)
+
+    def parse_echo(self) -> Stmt_Echo:
+        line = self.advance().line
+        exprs = self.parse_expr_list(";")
+        self.semicolon()
+        return Stmt_Echo(exprs=exprs, lineno=line)
+
+    def parse_unset(self) -> Stmt_Unset:
+        line = self.advance().line
+        vars = self.parse_call_like_list()
+        self.semicolon()
+        return Stmt_Unset(vars=vars, lineno=line)
+
+    def parse_try(self) -> Stmt_TryCatch:
+        line = self.advance().line
+        stmts = self.parse_block()
+
+        catches = []
+        while self.kind == "catch":
+            catch_line = self.advance().line
+            self.expect("(")
+            types = [self.parse_name()]
+            while self.accept("|"):
+                types.append(self.parse_name())
+            var = None
+            if self.kind == "T_VARIABLE":
+                token = self.advance()
+                var = Expr_Variable(name=token.text[1:], lineno=token.line)
+            self.expect(")")
+            catch_stmts = self.parse_block()
+            catches.append(
+                Stmt_Catch(types=types, var=var, stmts=catch_stmts, lineno=catch_line)
+            )
+
+        finally_ = None
+        if self.kind == "finally":
+            finally_line = self.advance().line
+            finally_ = Stmt_Finally(stmts=self.parse_block(), lineno=finally_line)
+
+        if not catches and finally_ is None:
+            raise ParseError(f"Cannot use try without catch or finally on line {line}")
+        return Stmt_TryCatch(
+            stmts=stmts, catches=catches, finally_=finally_, lineno=line
+        )
+
+    def parse_throw(self) -> Stmt_Throw:
+        line = self.advance().line
+        expr = self.parse_expr()
+        self.semicolon()
+        return Stmt_Throw(expr=expr, lineno=line)
+
+    def parse_declare(self) -> Stmt_Declare:
+        line = self.advance().line
+        self.expect("(")
+        declares = []
+        while True:
+            key = self.parse_identifier()
+            self.expect("=")
+            value = self.parse_expr()
+            declares.append(
+                Stmt_DeclareDeclare(key=key, value=value, lineno=key._lineno)
+            )
+            if not self.accept(","):
+                break
+        self.expect(")")
+
+        if self.accept(";"):
+            stmts = None
+        else:
+            stmts = self.parse_loop_body("enddeclare")
+        return Stmt_Declare(declares=declares, stmts=stmts, lineno=line)
+
+    def parse_halt_compiler(self):
+        raise ParseError("Unsupported node type: Stmt_HaltCompiler")
+
+    def parse_attributed_statement(self) -> Node:
+        start = self.pos
+        attr_groups = self.parse_attribute_groups()
+        if self.kind == "function" and self.peek() not in ("(", "&"):
+            return self.parse_function(attr_groups, start)
+        if self.kind == "function" and self.peek() == "&" and self.peek(2) != "(":
+            return self.parse_function(attr_groups, start)
+        if self.kind in CLASS_DECLARATION_KINDS:
+            return self.parse_class(attr_groups, start)
+        if self.kind == "interface":
+            return self.parse_interface(attr_groups, start)
+        if self.kind == "trait":
+            return self.parse_trait(attr_groups, start)
+        if self.is_enum_declaration():
+            return self.parse_enum(attr_groups, start)
+
+        # An attributed closure.
+        self.seek(start)
+        return self.parse_expression_statement()
+
+    #
+    # Declarations
+    #
+    def start_line(self, start: int | None) -> int:
+        """Return the line of the declaration starting at token `start`."""
+        return self.token.line if start is None else self.tokens[start].line
+
+    def parse_function(self, attr_groups=(), start=None) -> Node:
+        if start is None and (
+            self.peek() == "(" or (self.peek() == "&" and self.peek(2) == "(")
+        ):
+            return self.parse_expression_statement()
+
+        line = self.start_line(start)
+        self.expect("function")
+        by_ref = self.accept("&")
+        name = self.parse_identifier()
+        params = self.parse_params()
+        return_type = self.parse_return_type()
+        stmts = self.parse_block()
+        return Stmt_Function(
+            byRef=by_ref,
+            name=name,
+            params=params,
+            returnType=return_type,
+            stmts=stmts,
+            attrGroups=list(attr_groups),
+            namespacedName=None,
+            lineno=line,
+        )
+
+    def parse_class(self, attr_groups=(), start=None) -> Stmt_Class:
+        line = self.start_line(start)
+        flags = 0
+        while self.kind in ("abstract", "final", "readonly"):
+            flags |= MODIFIERS[self.advance().kind]
+        self.expect("class")
+        name = self.parse_identifier()
+        extends = self.parse_name() if self.accept("extends") else None
+        implements = self.parse_name_list() if self.accept("implements") else []
+        stmts = self.parse_class_body()
+        return Stmt_Class(
+            name=name,
+            flags=flags,
+            extends=extends,
+            implements=implements,
+            stmts=stmts,
+            attrGroups=list(attr_groups),
+            namespacedName=None,
+            lineno=line,
+        )
+
+    def parse_interface(self, attr_groups=(), start=None) -> Stmt_Interface:
+        line = self.start_line(start)
+        self.expect("interface")
+        name = self.parse_identifier()
+        extends = self.parse_name_list() if self.accept("extends") else []
+        stmts = self.parse_class_body()
+        return Stmt_Interface(
+            name=name,
+            extends=extends,
+            stmts=stmts,
+            attrGroups=list(attr_groups),
+            namespacedName=None,
+            lineno=line,
+        )
+
+    def parse_trait(self, attr_groups=(), start=None) -> Stmt_Trait:
+        line = self.start_line(start)
+        self.expect("trait")
+        name = self.parse_identifier()
+        stmts = self.parse_class_body()
+        return Stmt_Trait(
+            name=name,
+            stmts=stmts,
+            attrGroups=list(attr_groups),
+            namespacedName=None,
+            lineno=line,
+        )
+
+    def is_enum_declaration(self) -> bool:
+        # `enum` is only a keyword when followed by a name.
+        return (
+            self.kind == "T_STRING"
+            and self.token.text.lower() == "enum"
+            and self.peek() in IDENTIFIER_KINDS
+            and self.peek() not in ("extends", "implements")
+        )
+
+    def parse_enum(self, attr_groups=(), start=None) -> Stmt_Enum:
+        line = self.start_line(start)
+        self.advance()
+        name = self.parse_identifier()
+        scalar_type = self.parse_type() if self.accept(":") else None
+        implements = self.parse_name_list() if self.accept("implements") else []
+        stmts = self.parse_class_body()
+        return Stmt_Enum(
+            name=name,
+            scalarType=scalar_type,
+            implements=implements,
+            stmts=stmts,
+            attrGroups=list(attr_groups),
+            namespacedName=None,
+            lineno=line,
+        )
+
+    def parse_class_body(self) -> list[Node]:
+        self.expect("{")
+        stmts = []
+        while self.kind != "}":
+            stmts.append(self.parse_class_statement())
+        self.add_trailing_nop(stmts)
+        self.advance()
+        return stmts
+
+    def parse_class_statement(self) -> Node:
+        line = self.token.line
+        attr_groups = self.parse_attribute_groups()
+        if self.kind == "use":
+            return self.parse_trait_use()
+        if self.kind == "case":
+            return self.parse_enum_case(attr_groups, line)
+
+        flags = 0
+        if not self.accept("var"):
+            while self.kind in MODIFIERS:
+                flags |= MODIFIERS[self.advance().kind]
+
+        if self.accept("const"):
+            consts = self.parse_consts()
+            self.semicolon()
+            return Stmt_ClassConst(
+                flags=flags, consts=consts, attrGroups=attr_groups, lineno=line
+            )
+
+        if self.accept("function"):
+            by_ref = self.accept("&")
+            name = self.parse_identifier()
+            params = self.parse_params()
+            return_type = self.parse_return_type()
+            stmts = None if self.accept(";") else self.parse_block()
+            return Stmt_ClassMethod(
+                flags=flags,
+                byRef=by_ref,
+                name=name,
+                params=params,
+                returnType=return_type,
+                stmts=stmts,
+                attrGroups=attr_groups,
+                lineno=line,
+            )
+
+        type = None if self.kind == "T_VARIABLE" else self.parse_type()
+        props = []
+        while True:
+            token = self.expect("T_VARIABLE")
+            name = php_ast.VarLikeIdentifier(name=token.text[1:], lineno=token.line)
+            default = self.parse_expr() if self.accept("=") else None
+            props.append(
+                Stmt_PropertyProperty(name=name, default=default, lineno=token.line)
+            )
+            if not self.accept(","):
+                break
+        self.semicolon()
+        return Stmt_Property(
+            flags=flags, props=props, type=type, attrGroups=attr_groups, lineno=line
+        )
+
+    def parse_enum_case(self, attr_groups, line: int) -> Stmt_EnumCase:
+        self.expect("case")
+        name = self.parse_identifier()
+        expr = self.parse_expr() if self.accept("=") else None
+        self.semicolon()
+        return Stmt_EnumCase(name=name, expr=expr, attrGroups=attr_groups, lineno=line)
+
+    def parse_trait_use(self) -> Stmt_TraitUse:
+        line = self.advance().line
+        traits = self.parse_name_list()
+        adaptations = []
+        if not self.accept(";"):
+            self.expect("{")
+            while self.kind != "}":
+                adaptations.append(self.parse_trait_adaptation())
+            self.advance()
+        return Stmt_TraitUse(traits=traits, adaptations=adaptations, lineno=line)
+
+    def parse_trait_adaptation(self) -> Node:
+        line = self.token.line
+        trait = None
+        if self.peek() == "::":
+            trait = self.parse_name()
+            self.advance()
+        method = self.parse_identifier()
+        if self.kind == "insteadof":
+            raise ParseError(
+                "Unsupported node type: Stmt_TraitUseAdaptation_Precedence"
+            )
+
+        self.expect("as")
+        new_modifier = None
+        if self.kind in VISIBILITY:
+            new_modifier = MODIFIERS[self.advance().kind]
+        new_name = None if self.kind == ";" else self.parse_identifier()
+        self.semicolon()
+        return Stmt_TraitUseAdaptation_Alias(
+            trait=trait,
+            method=method,
+            newModifier=new_modifier,
+            newName=new_name,
+            lineno=line,
+        )
+
+    def parse_consts(self) -> list[Const]:
+        consts = []
+        while True:
+            name = self.parse_identifier()
+            self.expect("=")
+            value = self.parse_expr()
+            consts.append(
+                Const(name=name, value=value, namespacedName=None, lineno=name._lineno)
+            )
+            if not self.accept(","):
+                return consts
+
+    def parse_const(self) -> Stmt_Const:
+        line = self.advance().line
+        consts = self.parse_consts()
+        self.semicolon()
+        return Stmt_Const(consts=consts, lineno=line)
+
+    def parse_params(self) -> list[Param]:
+        self.expect("(")
+        params = []
+        while self.kind != ")":
+            params.append(self.parse_param())
+            if not self.accept(","):
+                break
+        self.expect(")")
+        return params
+
+    def parse_param(self) -> Param:
+        line = self.token.line
+        attr_groups = self.parse_attribute_groups()
+        flags = 0
+        while self.kind in VISIBILITY or self.kind == "readonly":
+            flags |= MODIFIERS[self.advance().kind]
+        type = None
+        if self.kind not in ("&", "...", "T_VARIABLE"):
+            type = self.parse_type()
+        by_ref = self.accept("&")
+        variadic = self.accept("...")
+        token = self.expect("T_VARIABLE")
+        var = Expr_Variable(name=token.text[1:], lineno=token.line)
+        default = self.parse_expr() if self.accept("=") else None
+        return Param(
+            type=type,
+            byRef=by_ref,
+            variadic=variadic,
+            var=var,
+            default=default,
+            flags=flags,
+            attrGroups=attr_groups,
+            lineno=line,
+        )
+
+    def parse_return_type(self) -> Node | None:
+        return self.parse_type() if self.accept(":") else None
+
+    def parse_type(self) -> Node:
+        line = self.token.line
+        if self.accept("?"):
+            return NullableType(type=self.parse_simple_type(), lineno=line)
+
+        type = self.parse_simple_type()
+        if self.kind == "|":
+            types = [type]
+            while self.accept("|"):
+                types.append(self.parse_simple_type())
+            return php_ast.UnionType(types=types, lineno=line)
+        if self.kind == "&" and self.peek() not in ("T_VARIABLE", "...", "&"):
+            raise ParseError("Unsupported node type: IntersectionType")
+        return type
+
+    def parse_simple_type(self) -> Node:
+        token = self.token
+        match token.kind:
+            case "array" | "callable":
+                self.advance()
+                return Identifier(name=token.kind, lineno=token.line)
+            case "static":
+                self.advance()
+                return Name(parts=[token.text], lineno=token.line)
+            case "(":
+                raise ParseError("Unsupported node type: IntersectionType")
+        name = self.parse_name()
+        if type(name) is Name and len(name.parts) == 1:
+            lower_name = name.parts[0].lower()
+            if lower_name in BUILTIN_TYPES:
+                return Identifier(name=lower_name, lineno=token.line)
+        return name
+
+    def parse_attribute_groups(self) -> list[AttributeGroup]:
+        groups = []
+        while self.kind == "T_ATTRIBUTE":
+            line = self.advance().line
+            attrs = []
+            while self.kind != "]":
+                attr_line = self.token.line
+                name = self.parse_name()
+                args = self.parse_args() if self.kind == "(" else []
+                attrs.append(Attribute(name=name, args=args, lineno=attr_line))
+                if not self.accept(","):
+                    break
+            self.expect("]")
+            groups.append(AttributeGroup(attrs=attrs, lineno=line))
+        return groups
+
+    #
+    # Namespaces and imports
+    #
+    def parse_namespace(self) -> Stmt_Namespace:
+        line = self.advance().line
+        name = None if self.kind == "{" else self.parse_name()
+        if self.kind == "{":
+            stmts = self.parse_block()
+        else:
+            # Filled by `handle_namespaces()`.
+            stmts = None
+            self.semicolon()
+        return Stmt_Namespace(name=name, stmts=stmts, lineno=line)
+
+    def handle_namespaces(self, stmts: list[Node]) -> list[Node]:
+        """Move the statements after `namespace Foo;` into the namespace."""
+        result = target = []
+        for stmt in stmts:
+            if isinstance(stmt, Stmt_Namespace):
+                result.append(stmt)
+                if stmt.stmts is None:
+                    stmt.stmts = target = []
+                else:
+                    target = result
+            else:
+                target.append(stmt)
+        return result
+
+    def parse_use(self) -> Node:
+        line = self.advance().line
+        type = USE_NORMAL
+        if self.kind in ("function", "const"):
+            type = USE_FUNCTION if self.advance().kind == "function" else USE_CONSTANT
+
+        prefix = self.parse_name()
+        if self.accept("\\"):
+            return self.parse_group_use(prefix, type, line)
+
+        uses = [self.parse_use_use(prefix, USE_UNKNOWN)]
+        while self.accept(","):
+            uses.append(self.parse_use_use(self.parse_name(), USE_UNKNOWN))
+        self.semicolon()
+        return Stmt_Use(uses=uses, type=type, lineno=line)
+
+    def parse_group_use(self, prefix: Node, type: int, line: int) -> Stmt_GroupUse:
+        prefix = Name(parts=prefix.parts, lineno=prefix._lineno)
+        self.expect("{")
+        uses = []
+        while self.kind != "}":
+            if type != USE_NORMAL:
+                use_type = USE_UNKNOWN
+            elif self.kind in ("function", "const"):
+                kind = self.advance().kind
+                use_type = USE_FUNCTION if kind == "function" else USE_CONSTANT
+            else:
+                use_type = USE_NORMAL
+            uses.append(self.parse_use_use(self.parse_name(), use_type))
+            if not self.accept(","):
+                break
+        self.expect("}")
+        self.semicolon()
+        group_type = USE_UNKNOWN if type == USE_NORMAL else type
+        return Stmt_GroupUse(prefix=prefix, uses=uses, type=group_type, lineno=line)
+
+    def parse_use_use(self, name: Node, type: int) -> Stmt_UseUse:
+        name = Name(parts=name.parts, lineno=name._lineno)
+        alias = self.parse_identifier() if self.accept("as") else None
+        return Stmt_UseUse(name=name, alias=alias, type=type, lineno=name._lineno)
+
+    #
+    # Names
+    #
+    def parse_identifier(self) -> Identifier:
+        """Parse an identifier, which may be a reserved word."""
+        token = self.token
+        if token.kind not in IDENTIFIER_KINDS:
+            raise self.error("T_STRING")
+        self.advance()
+        return Identifier(name=token.text, lineno=token.line)
+
+    def parse_name(self) -> Node:
+        token = self.token
+        match token.kind:
+            case "T_STRING" | "T_NAME_QUALIFIED":
+                cls, text = Name, token.text
+            case "T_NAME_FULLY_QUALIFIED":
+                cls, text = Name_FullyQualified, token.text[1:]
+            case "T_NAME_RELATIVE":
+                cls, text = Name_Relative, token.text[10:]
+            case "static":
+                cls, text = Name, token.text
+            case _:
+                raise self.error("T_STRING")
+        self.advance()
+        return cls(parts=text.split("\\"), lineno=token.line)
+
+    def parse_name_list(self) -> list[Node]:
+        names = [self.parse_name()]
+        while self.accept(","):
+            names.append(self.parse_name())
+        return names
+
+    #
+    # Expressions
+    #
+    def parse_expr(self, min_prec: int = 0) -> Node:
+        line = self.token.line
+        left = self.parse_unary()
+        while True:
+            kind = self.kind
+            op = BINARY_OPS.get(kind)
+            if op is None:
+                if kind == "?" and min_prec <= TERNARY_PREC:
+                    left = self.parse_ternary(left, line)
+                    continue
+                return left
+
+            prec, assoc, cls = op
+            if prec < min_prec:
+                return left
+            self.advance()
+            if cls is Expr_Instanceof:
+                left = Expr_Instanceof(
+                    expr=left, class_=self.parse_class_reference(), lineno=line
+                )
+            else:
+                right = self.parse_expr(prec if assoc == RIGHT else prec + 1)
+                left = cls(left=left, right=right, lineno=line)
+            if assoc == NONASSOC:
+                next_op = BINARY_OPS.get(self.kind)
+                if next_op is not None and next_op[0] == prec:
+                    raise self.error()
+
+    def parse_ternary(self, cond: Node, line: int) -> Expr_Ternary:
+        self.expect("?")
+        if_ = None if self.accept(":") else self.parse_ternary_middle()
+        else_ = self.parse_expr(TERNARY_PREC + 1)
+        return Expr_Ternary(cond=cond, if_=if_, else_=else_, lineno=line)
+
+    def parse_ternary_middle(self) -> Node:
+        expr = self.parse_expr()
+        self.expect(":")
+        return expr
+
+    def parse_unary(self) -> Node:
+        parser = self.prefix_parsers.get(self.kind)
+        if parser is not None:
+            return parser()
+
+        line = self.token.line
+        expr = self.parse_postfix_expr()
+        kind = self.kind
+        if kind == "=" or kind in ASSIGN_OPS:
+            if isinstance(expr, ASSIGNABLE):
+                return self.parse_assign(expr, line)
+        elif kind == "++" and isinstance(expr, ASSIGNABLE):
+            self.advance()
+            return Expr_PostInc(var=expr, lineno=line)
+        elif kind == "--" and isinstance(expr, ASSIGNABLE):
+            self.advance()
+            return Expr_PostDec(var=expr, lineno=line)
+        return expr
+
+    def parse_assign(self, var: Node, line: int) -> Node:
+        kind = self.advance().kind
+        if kind != "=":
+            expr = self.parse_expr(ASSIGN_PREC)
+            return node_class(ASSIGN_OPS[kind])(var=var, expr=expr, lineno=line)
+
+        if self.accept("&"):
+            expr = self.parse_expr(ASSIGN_PREC)
+            return Expr_AssignRef(var=var, expr=expr, lineno=line)
+
+        if isinstance(var, Expr_Array):
+            var = fixup_array_destructuring(var)
+        expr = self.parse_expr(ASSIGN_PREC)
+        return Expr_Assign(var=var, expr=expr, lineno=line)
+
+    def parse_not(self) -> Expr_BooleanNot:
+        line = self.advance().line
+        return Expr_BooleanNot(expr=self.parse_expr(NOT_PREC + 1), lineno=line)
+
+    def parse_unary_op(self) -> Node:
+        token = self.advance()
+        cls = {
+            "-": Expr_UnaryMinus,
+            "+": Expr_UnaryPlus,
+            "~": Expr_BitwiseNot,
+            "@": Expr_ErrorSuppress,
+        }[token.kind]
+        return cls(expr=self.parse_expr(UNARY_PREC + 1), lineno=token.line)
+
+    def parse_cast(self) -> Node:
+        token = self.advance()
+        cls = node_class(CASTS[token.text])
+        return cls(expr=self.parse_expr(UNARY_PREC + 1), lineno=token.line)
+
+    def parse_pre_inc_dec(self) -> Node:
+        token = self.advance()
+        cls = Expr_PreInc if token.kind == "++" else Expr_PreDec
+        return cls(var=self.parse_postfix_expr(), lineno=token.line)
+
+    def parse_clone(self) -> Expr_Clone:
+        line = self.advance().line
+        return Expr_Clone(expr=self.parse_expr(CLONE_PREC), lineno=line)
+
+    def parse_print(self) -> Expr_Print:
+        line = self.advance().line
+        return Expr_Print(expr=self.parse_expr(PRINT_PREC + 1), lineno=line)
+
+    def parse_yield(self) -> Expr_Yield:
+        line = self.advance().line
+        if self.kind in YIELD_END_KINDS:
+            return Expr_Yield(key=None, value=None, lineno=line)
+        key = None
+        value = self.parse_expr(YIELD_PREC + 1)
+        if self.accept("=>"):
+            key = value
+            value = self.parse_expr(YIELD_PREC + 1)
+        return Expr_Yield(key=key, value=value, lineno=line)
+
+    def parse_yield_from(self) -> Expr_YieldFrom:
+        line = self.advance().line
+        return Expr_YieldFrom(expr=self.parse_expr(YIELD_FROM_PREC + 1), lineno=line)
+
+    def parse_throw_expr(self) -> Expr_Throw:
+        line = self.advance().line
+        return Expr_Throw(expr=self.parse_expr(THROW_PREC), lineno=line)
+
+    def parse_include(self) -> Expr_Include:
+        token = self.advance()
+        expr = self.parse_expr(INCLUDE_PREC)
+        return Expr_Include(
+            expr=expr, type=INCLUDE_TYPES[token.kind], lineno=token.line
+        )
+
+    def parse_static_expr(self) -> Node:
+        if self.peek() in ("function", "fn"):
+            return self.parse_closure()
+        return self.parse_postfix_expr()
+
+    def parse_closure(self) -> Node:
+        line = self.token.line
+        attr_groups = self.parse_attribute_groups()
+        static = self.accept("static")
+        if self.accept("fn"):
+            by_ref = self.accept("&")
+            params = self.parse_params()
+            return_type = self.parse_return_type()
+            self.expect("=>")
+            expr = self.parse_expr(ARROW_FN_PREC)
+            return Expr_ArrowFunction(
+                static=static,
+                byRef=by_ref,
+                params=params,
+                returnType=return_type,
+                expr=expr,
+                attrGroups=attr_groups,
+                lineno=line,
+            )
+
+        self.expect("function")
+        by_ref = self.accept("&")
+        params = self.parse_params()
+        uses = []
+        if self.accept("use"):
+            self.expect("(")
+            while self.kind != ")":
+                use_line = self.token.line
+                use_by_ref = self.accept("&")
+                token = self.expect("T_VARIABLE")
+                var = Expr_Variable(name=token.text[1:], lineno=token.line)
+                uses.append(Expr_ClosureUse(var=var, byRef=use_by_ref, lineno=use_line))
+                if not self.accept(","):
+                    break
+            self.expect(")")
+        return_type = self.parse_return_type()
+        stmts = self.parse_block()
+        return Expr_Closure(
+            static=static,
+            byRef=by_ref,
+            params=params,
+            uses=uses,
+            returnType=return_type,
+            stmts=stmts,
+            attrGroups=attr_groups,
+            lineno=line,
+        )
+
+    def parse_new(self) -> Expr_New:
+        line = self.advance().line
+        if self.kind == "class" or self.kind == "T_ATTRIBUTE":
+            return self.parse_anonymous_class(line)
+
+        if self.kind == "(":
+            class_ = self.parse_parenthesized()
+        elif self.kind in NAME_KINDS or self.kind == "static":
+            class_ = self.parse_name()
+        else:
+            class_ = self.parse_simple_variable()
+        class_ = self.parse_new_dereferences(class_, line)
+        args = self.parse_args() if self.kind == "(" else []
+        return Expr_New(class_=class_, args=args, lineno=line)
+
+    def parse_new_dereferences(self, expr: Node, line: int) -> Node:
+        """Parse the property and array accesses in `new $a->b['c']`."""
+        if isinstance(expr, (Name, Name_FullyQualified, Name_Relative)):
+            return expr
+        while True:
+            match self.kind:
+                case "[" | "{":
+                    expr = self.parse_dim_fetch(expr, line)
+                case "->" | "?->":
+                    nullsafe = self.advance().kind == "?->"
+                    name = self.parse_member_name()
+                    cls = Expr_NullsafePropertyFetch if nullsafe else Expr_PropertyFetch
+                    expr = cls(var=expr, name=name, lineno=line)
+                case "::" if self.peek() in ("T_VARIABLE", "$"):
+                    self.advance()
+                    expr = Expr_StaticPropertyFetch(
+                        class_=expr, name=self.parse_static_property_name(), lineno=line
+                    )
+                case _:
+                    return expr
+
+    def parse_anonymous_class(self, line: int) -> Expr_New:
+        class_line = self.token.line
+        attr_groups = self.parse_attribute_groups()
+        self.expect("class")
+        args = self.parse_args() if self.kind == "(" else []
+        extends = self.parse_name() if self.accept("extends") else None
+        implements = self.parse_name_list() if self.accept("implements") else []
+        stmts = self.parse_class_body()
+        class_ = Stmt_Class(
+            name=None,
+            flags=0,
+            extends=extends,
+            implements=implements,
+            stmts=stmts,
+            attrGroups=attr_groups,
+            namespacedName=None,
+            lineno=class_line,
+        )
+        return Expr_New(class_=class_, args=args, lineno=line)
+
+    def parse_class_reference(self) -> Node:
+        """Parse the right-hand side of `instanceof`."""
+        if self.kind in NAME_KINDS or self.kind == "static":
+            return self.parse_name()
+        if self.kind == "(":
+            return self.parse_parenthesized()
+        line = self.token.line
+        return self.parse_new_dereferences(self.parse_simple_variable(), line)
+
+    #
+    # Primary and postfix expressions
+    #
+    def parse_postfix_expr(self) -> Node:
+        line = self.token.line
+        parser = self.primary_parsers.get(self.kind)
+        if parser is None:
+            raise self.error()
+        expr = parser()
+
+        while True:
+            match self.kind:
+                case "[":
+                    expr = self.parse_dim_fetch(expr, line)
+                case "{" if isinstance(expr, ASSIGNABLE[:5]):
+                    expr = self.parse_dim_fetch(expr, line)
+                case "->" | "?->":
+                    expr = self.parse_member_access(expr, line)
+                case "::":
+                    expr = self.parse_static_access(expr, line)
+                case "(":
+                    args = self.parse_args()
+                    expr = Expr_FuncCall(name=expr, args=args, lineno=line)
+                case _:
+                    return expr
+
+    def parse_dim_fetch(self, var: Node, line: int) -> Expr_ArrayDimFetch:
+        close = "]" if self.advance().kind == "[" else "}"
+        dim = None if self.kind == close else self.parse_expr()
+        self.expect(close)
+        return Expr_ArrayDimFetch(var=var, dim=dim, lineno=line)
+
+    def parse_member_access(self, var: Node, line: int) -> Node:
+        nullsafe = self.advance().kind == "?->"
+        name = self.parse_member_name()
+        if self.kind == "(":
+            args = self.parse_args()
+            cls = Expr_NullsafeMethodCall if nullsafe else Expr_MethodCall
+            return cls(var=var, name=name, args=args, lineno=line)
+        cls = Expr_NullsafePropertyFetch if nullsafe else Expr_PropertyFetch
+        return cls(var=var, name=name, lineno=line)
+
+    def parse_member_name(self) -> Node:
+        if self.kind in IDENTIFIER_KINDS:
+            return self.parse_identifier()
+        if self.kind == "{":
+            self.advance()
+            expr = self.parse_expr()
+            self.expect("}")
+            return expr
+        return self.parse_simple_variable()
+
+    def parse_static_access(self, class_: Node, line: int) -> Node:
+        self.expect("::")
+        match self.kind:
+            case "T_VARIABLE" | "$":
+                if self.kind == "T_VARIABLE" and self.peek() == "(":
+                    token = self.advance()
+                    name = Expr_Variable(name=token.text[1:], lineno=token.line)
+                    args = self.parse_args()
+                    return Expr_StaticCall(
+                        class_=class_, name=name, args=args, lineno=line
+                    )
+                name = self.parse_static_property_name()
+                return Expr_StaticPropertyFetch(class_=class_, name=name, lineno=line)
+            case "{":
+                self.advance()
+                name = self.parse_expr()
+                self.expect("}")
+                args = self.parse_args()
+                return Expr_StaticCall(class_=class_, name=name, args=args, lineno=line)
+
+        name = self.parse_identifier()
+        if self.kind == "(":
+            args = self.parse_args()
+            return Expr_StaticCall(class_=class_, name=name, args=args, lineno=line)
+        return Expr_ClassConstFetch(class_=class_, name=name, lineno=line)
+
+    def parse_static_property_name(self) -> Node:
+        if self.kind == "T_VARIABLE":
+            token = self.advance()
+            return php_ast.VarLikeIdentifier(name=token.text[1:], lineno=token.line)
+        return self.parse_simple_variable()
+
+    def parse_args(self) -> list[Node]:
+        self.expect("(")
+        args = []
+        while self.kind != ")":
+            args.append(self.parse_arg())
+            if not self.accept(","):
+                break
+        self.expect(")")
+        return args
+
+    def parse_arg(self) -> Node:
+        token = self.token
+        name = None
+        by_ref = unpack = False
+        if token.kind == "...":
+            if self.peek() == ")":
+                raise ParseError("Unsupported node type: VariadicPlaceholder")
+            self.advance()
+            unpack = True
+        elif token.kind == "&":
+            self.advance()
+            by_ref = True
+        elif token.kind in IDENTIFIER_KINDS and self.peek() == ":":
+            name = self.parse_identifier()
+            self.advance()
+        value = self.parse_expr()
+        return Arg(
+            name=name, value=value, byRef=by_ref, unpack=unpack, lineno=token.line
+        )
+
+    def parse_call_like_list(self) -> list[Node]:
+        """Parse `(expr, ...)`, with an optional trailing comma."""
+        self.expect("(")
+        exprs = []
+        while self.kind != ")":
+            exprs.append(self.parse_expr())
+            if not self.accept(","):
+                break
+        self.expect(")")
+        return exprs
+
+    def parse_variable(self) -> Expr_Variable:
+        return self.parse_simple_variable()
+
+    def parse_simple_variable(self) -> Expr_Variable:
+        """Parse `$a`, `$$a` or `${expr}`."""
+        token = self.advance()
+        if token.kind == "T_VARIABLE":
+            return Expr_Variable(name=token.text[1:], lineno=token.line)
+        if token.kind != "$":
+            self.seek(self.pos - 1)
+            raise self.error("T_VARIABLE")
+        if self.accept("{"):
+            name = self.parse_expr()
+            self.expect("}")
+        else:
+            name = self.parse_simple_variable()
+        return Expr_Variable(name=name, lineno=token.line)
+
+    def parse_name_expr(self) -> Node:
+        name = self.parse_name()
+        if self.kind == "(" or self.kind == "::":
+            # A function call or a static access, parsed as postfixes.
+            return name
+        return Expr_ConstFetch(name=name, lineno=name._lineno)
+
+    def parse_parenthesized(self) -> Node:
+        self.expect("(")
+        expr = self.parse_expr()
+        self.expect(")")
+        return expr
+
+    def parse_short_array(self) -> Expr_Array:
+        line = self.advance().line
+        items = self.parse_array_items("]")
+        return Expr_Array(items=items, lineno=line)
+
+    def parse_long_array(self) -> Expr_Array:
+        line = self.advance().line
+        self.expect("(")
+        items = self.parse_array_items(")")
+        return Expr_Array(items=items, lineno=line)
+
+    def parse_list(self) -> Expr_List:
+        line = self.advance().line
+        self.expect("(")
+        items = self.parse_array_items(")")
+        return Expr_List(items=items, lineno=line)
+
+    def parse_array_items(self, close: str) -> list[Node | None]:
+        items = []
+        while self.kind != close:
+            if self.kind == ",":
+                self.advance()
+                items.append(None)
+                continue
+            items.append(self.parse_array_item())
+            if not self.accept(","):
+                break
+        self.expect(close)
+        return items
+
+    def parse_array_item(self) -> Expr_ArrayItem:
+        line = self.token.line
+        if self.accept("..."):
+            value = self.parse_expr()
+            return Expr_ArrayItem(
+                key=None, value=value, byRef=False, unpack=True, lineno=line
+            )
+
+        key = None
+        by_ref = self.accept("&")
+        value = self.parse_expr()
+        if not by_ref and self.accept("=>"):
+            key = value
+            by_ref = self.accept("&")
+            value = self.parse_expr()
+        return Expr_ArrayItem(
+            key=key, value=value, byRef=by_ref, unpack=False, lineno=line
+        )
+
+    def parse_isset(self) -> Expr_Isset:
+        line = self.advance().line
+        return Expr_Isset(vars=self.parse_call_like_list(), lineno=line)
+
+    def parse_empty(self) -> Expr_Empty:
+        line = self.advance().line
+        return Expr_Empty(expr=self.parse_parenthesized(), lineno=line)
+
+    def parse_eval(self) -> Expr_Eval:
+        line = self.advance().line
+        return Expr_Eval(expr=self.parse_parenthesized(), lineno=line)
+
+    def parse_exit(self) -> Expr_Exit:
+        line = self.advance().line
+        expr = None
+        if self.accept("("):
+            if self.kind != ")":
+                expr = self.parse_expr()
+            self.expect(")")
+        return Expr_Exit(expr=expr, lineno=line)
+
+    def parse_match(self) -> Expr_Match:
+        line = self.advance().line
+        cond = self.parse_parenthesized()
+        self.expect("{")
+        arms = []
+        while self.kind != "}":
+            arm_line = self.token.line
+            if self.kind == "default":
+                self.advance()
+                self.accept(",")
+                conds = None
+            else:
+                conds = [self.parse_expr()]
+                while self.accept(",") and self.kind != "=>":
+                    conds.append(self.parse_expr())
+            self.expect("=>")
+            body = self.parse_expr()
+            arms.append(MatchArm(conds=conds, body=body, lineno=arm_line))
+            if not self.accept(","):
+                break
+        self.expect("}")
+        return Expr_Match(cond=cond, arms=arms, lineno=line)
+
+    #
+    # Scalars
+    #
+    def parse_lnumber(self) -> Node:
+        token = self.advance()
+        value = parse_int(token.text)
+        if value > PHP_INT_MAX:
+            return Scalar_DNumber(value=float(value), lineno=token.line)
+        return Scalar_LNumber(value=value, lineno=token.line)
+
+    def parse_dnumber(self) -> Scalar_DNumber:
+        token = self.advance()
+        return Scalar_DNumber(value=parse_float(token.text), lineno=token.line)
+
+    def parse_constant_string(self) -> Scalar_String:
+        token = self.advance()
+        return Scalar_String(value=parse_string(token.text), lineno=token.line)
+
+    def parse_magic_constant(self) -> Node:
+        token = self.advance()
+        return node_class(MAGIC_CONSTANTS[token.kind])(lineno=token.line)
+
+    def parse_encapsed(self) -> Scalar_Encapsed:
+        line = self.advance().line
+        parts = self.parse_encaps_list('"')
+        self.expect('"')
+        return Scalar_Encapsed(parts=self.unescape_parts(parts, '"'), lineno=line)
+
+    def parse_shell_exec(self) -> Expr_ShellExec:
+        line = self.advance().line
+        parts = self.parse_encaps_list("`")
+        self.expect("`")
+        return Expr_ShellExec(parts=self.unescape_parts(parts, "`"), lineno=line)
+
+    def unescape_parts(self, parts: list[Node], quote: str) -> list[Node]:
+        return [
+            (
+                Scalar_EncapsedStringPart(
+                    value=parse_escape_sequences(part.value, quote), lineno=part._lineno
+                )
+                if type(part) is Scalar_EncapsedStringPart
+                else part
+            )
+            for part in parts
+        ]
+
+    def parse_heredoc(self) -> Node:
+        start = self.advance()
+        parts = self.parse_encaps_list("T_END_HEREDOC")
+        end = self.advance()
+
+        indentation = get_doc_indentation(end.text)
+        nowdoc = "'" in start.text
+        if not parts:
+            return Scalar_String(value="", lineno=start.line)
+
+        if len(parts) == 1 and type(parts[0]) is Scalar_EncapsedStringPart:
+            value = strip_indentation(
+                parts[0].value, indentation, True, True, start.line
+            )
+            value = strip_trailing_newline(value)
+            if not nowdoc:
+                value = parse_escape_sequences(value, None)
+            return Scalar_String(value=value, lineno=start.line)
+
+        if type(parts[0]) is not Scalar_EncapsedStringPart:
+            # Checks the indentation before the first interpolation.
+            strip_indentation("", indentation, True, False, start.line)
+
+        new_parts = []
+        last = len(parts) - 1
+        for i, part in enumerate(parts):
+            if type(part) is Scalar_EncapsedStringPart:
+                value = strip_indentation(
+                    part.value, indentation, i == 0, i == last, part._lineno
+                )
+                value = parse_escape_sequences(value, None)
+                if i == last:
+                    value = strip_trailing_newline(value)
+                if not value:
+                    continue
+                part = Scalar_EncapsedStringPart(value=value, lineno=part._lineno)
+            new_parts.append(part)
+        return Scalar_Encapsed(parts=new_parts, lineno=start.line)
+
+    def parse_encaps_list(self, end_kind: str) -> list[Node]:
+        """Parse the parts of a string with interpolation (not unescaped)."""
+        parts = []
+        while self.kind != end_kind:
+            token = self.advance()
+            match token.kind:
+                case "T_ENCAPSED_AND_WHITESPACE":
+                    part = Scalar_EncapsedStringPart(
+                        value=token.text, lineno=token.line
+                    )
+                case "T_VARIABLE":
+                    part = self.parse_encaps_var(token)
+                case "T_CURLY_OPEN":
+                    part = self.parse_expr()
+                    self.expect("}")
+                case "T_DOLLAR_OPEN_CURLY_BRACES":
+                    part = self.parse_dollar_brace(token)
+                case _:
+                    self.seek(self.pos - 1)
+                    raise self.error()
+            parts.append(part)
+        return parts
+
+    def parse_encaps_var(self, token: Token) -> Node:
+        var = Expr_Variable(name=token.text[1:], lineno=token.line)
+        match self.kind:
+            case "[":
+                self.advance()
+                dim = self.parse_encaps_offset()
+                self.expect("]")
+                return Expr_ArrayDimFetch(var=var, dim=dim, lineno=token.line)
+            case "->" | "?->":
+                nullsafe = self.advance().kind == "?->"
+                name_token = self.expect("T_STRING")
+                name = Identifier(name=name_token.text, lineno=name_token.line)
+                cls = Expr_NullsafePropertyFetch if nullsafe else Expr_PropertyFetch
+                return cls(var=var, name=name, lineno=token.line)
+        return var
+
+    def parse_encaps_offset(self) -> Node:
+        token = self.advance()
+        match token.kind:
+            case "T_STRING":
+                return Scalar_String(value=token.text, lineno=token.line)
+            case "T_VARIABLE":
+                return Expr_Variable(name=token.text[1:], lineno=token.line)
+            case "T_NUM_STRING":
+                return num_string(token.text, token.line)
+            case "-":
+                number = self.expect("T_NUM_STRING")
+                return num_string("-" + number.text, token.line)
+        self.seek(self.pos - 1)
+        raise self.error()
+
+    def parse_dollar_brace(self, token: Token) -> Node:
+        if self.kind == "T_STRING_VARNAME":
+            name = self.advance()
+            var = Expr_Variable(name=name.text, lineno=token.line)
+            if self.accept("["):
+                dim = self.parse_expr()
+                self.expect("]")
+                var = Expr_ArrayDimFetch(var=var, dim=dim, lineno=token.line)
+        else:
+            var = Expr_Variable(name=self.parse_expr(), lineno=token.line)
+        self.expect("}")
+        return var
+
+
+def num_string(text: str, line: int) -> Node:
+    value = parse_num_string(text)
+    if isinstance(value, int):
+        return Scalar_LNumber(value=value, lineno=line)
+    return Scalar_String(value=value, lineno=line)
+
+
+def fixup_array_destructuring(node: Expr_Array) -> Expr_List:
+    """Turn `[$a, [$b]]` on the left of `=` into (nested) `Expr_List`s."""
+    items = []
+    for item in node.items:
+        if item is not None and isinstance(item.value, Expr_Array):
+            item = Expr_ArrayItem(
+                key=item.key,
+                value=fixup_array_destructuring(item.value),
+                byRef=item.byRef,
+                unpack=item.unpack,
+                lineno=item._lineno,
+            )
+        items.append(item)
+    return Expr_List(items=items, lineno=node._lineno)
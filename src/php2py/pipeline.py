@@ -0,0 +1,156 @@
+"""A pipeline of threads connected by bounded queues.
+
+Used by `convert` so that parsing (mostly waiting on the PHP process),
+translation and writing the output overlap. When a stage falls behind, the
+queue in front of it fills up and the stages before it block, so memory use
+stays flat however many files there are.
+"""
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+
+# Items buffered between two stages.
+DEFAULT_QUEUE_SIZE = 16
+
+# How often blocked threads check whether the pipeline was stopped (seconds).
+POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class _Failure:
+    """An unexpected exception in a stage, re-raised on the consumer side."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        # Time spent working on items (not waiting on the queues).
+        self.busy = 0.0
+
+
+class Pipeline:
+    """Feed the items of `source` through `stages`, each in its own thread.
+
+    `source` (typically a generator) is the first stage, named
+    `source_name`. Each of `stages` is a `(name, func)` pair, `func` mapping
+    the items of the previous stage to the items of the next. The results
+    are yielded by `run()` in order; the time the consumer spends between
+    two results is accounted to a last stage, named `sink_name`.
+    """
+
+    def __init__(
+        self,
+        source: Iterable,
+        stages: Sequence[tuple[str, Callable]],
+        source_name: str = "source",
+        sink_name: str = "sink",
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        names = [source_name, *(name for name, _ in stages), sink_name]
+        self.stats = [StageStats(name) for name in names]
+        self.elapsed = 0.0
+        self._stopped = threading.Event()
+
+    def run(self) -> Iterator:
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [
+            threading.Thread(target=self._run_source, args=(queues[0],), daemon=True)
+        ]
+        for i, (_, func) in enumerate(self.stages):
+            threads.append(
+                threading.Thread(
+                    target=self._run_stage,
+                    args=(func, self.stats[i + 1], queues[i], queues[i + 1]),
+                    daemon=True,
+                )
+            )
+
+        sink = self.stats[-1]
+        t0 = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while (item := self._get(queues[-1])) is not _DONE:
+                if isinstance(item, _Failure):
+                    raise item.error
+                t1 = time.perf_counter()
+                yield item
+                sink.busy += time.perf_counter() - t1
+                sink.items += 1
+        finally:
+            self._stopped.set()
+            for thread in threads:
+                thread.join()
+            self.elapsed = time.perf_counter() - t0
+
+    def summary(self, unit: str = "items") -> str:
+        """Return a one-line report of how busy each stage was."""
+        elapsed = self.elapsed or 1e-9
+        stages = ", ".join(
+            f"{stats.name} {stats.busy / elapsed:.0%}" for stats in self.stats
+        )
+        items = self.stats[-1].items
+        return f"{items} {unit} in {self.elapsed:.2f}s, busy: {stages}"
+
+    def _run_source(self, output: queue.Queue):
+        stats = self.stats[0]
+        iterator = iter(self.source)
+        try:
+            while not self._stopped.is_set():
+                t0 = time.perf_counter()
+                item = next(iterator, _DONE)
+                stats.busy += time.perf_counter() - t0
+                if item is _DONE:
+                    break
+                stats.items += 1
+                self._put(output, item)
+        except BaseException as e:  # noqa: BLE001
+            self._put(output, _Failure(e))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        self._put(output, _DONE)
+
+    def _run_stage(
+        self, func: Callable, stats: StageStats, input: queue.Queue, output: queue.Queue
+    ):
+        while (item := self._get(input)) is not _DONE:
+            if isinstance(item, _Failure):
+                break
+            t0 = time.perf_counter()
+            try:
+                result = func(item)
+            except BaseException as e:  # noqa: BLE001
+                item = _Failure(e)
+                break
+            stats.busy += time.perf_counter() - t0
+            stats.items += 1
+            self._put(output, result)
+        self._put(output, item)
+
+    def _put(self, q: queue.Queue, item):
+        while not self._stopped.is_set():
+            try:
+                q.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def _get(self, q: queue.Queue):
+        while not self._stopped.is_set():
+            try:
+                return q.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _DONE
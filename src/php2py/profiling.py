@@ -0,0 +1,184 @@
+"""Per-phase, per-file timing and memory profile of a conversion (`--profile`).
+
+Each file goes through these phases:
+
+- `read`: reading the source file;
+- `parse`: the round trip to the PHP process (or a parse cache lookup), or
+  the whole parse with `--parser=python`;
+- `decode`: building the AST from the parser output (`json.loads()` and
+  `decode_compact()`/`make_ast()`);
+- `translate`: `Translator.translate()` (and optimizing and writing the
+  code, with the translation cache);
+- `optimize`: the optimization passes (`-O`);
+- `unparse`: `ast.unparse()`;
+- `write`: writing the output file.
+
+The hits and misses of the parse and translation caches are reported too.
+
+Peak memory is measured with `tracemalloc`, so it only covers Python
+allocations (not the PHP process), and tracing slows the Python phases down:
+compare the phases of a profile with each other, not with an unprofiled run.
+"""
+import cProfile
+import json
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+PHASES = ("read", "parse", "decode", "translate", "optimize", "unparse", "write")
+
+DEFAULT_PROFILE_REPORT = "php2py-profile.json"
+
+# Number of files listed in the summary.
+SLOWEST_FILES = 10
+
+
+class FileProfile:
+    def __init__(self, source_file: str | Path):
+        self.source_file = source_file
+        # Phase -> wall time (seconds) and peak memory (bytes).
+        self.wall: dict[str, float] = {}
+        self.peak_memory: dict[str, int] = {}
+        self.error: str | None = None
+
+    @property
+    def total_wall(self) -> float:
+        return sum(self.wall.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "file": str(self.source_file),
+            "wall": self.total_wall,
+            "peak_memory": max(self.peak_memory.values(), default=0),
+            "error": self.error,
+            "phases": {
+                phase: {"wall": wall, "peak_memory": self.peak_memory[phase]}
+                for phase, wall in self.wall.items()
+            },
+        }
+
+
+class Profiler:
+    """Collects the phases of the files converted, one file at a time.
+
+    With a `cprofile_path`, the translate phase also runs under cProfile,
+    and the stats are dumped there (for `pstats` or snakeviz) by `save()`.
+
+    `caches` are the caches used by the conversion, by name, for their hit
+    rates (anything with `hits` and `misses` counters).
+    """
+
+    def __init__(
+        self, cprofile_path: str | Path | None = None, caches: dict | None = None
+    ):
+        self.files: list[FileProfile] = []
+        self.caches = caches or {}
+        self.cprofile_path = cprofile_path
+        self.cprofile = cProfile.Profile() if cprofile_path is not None else None
+        self.elapsed = 0.0
+        self._t0 = time.perf_counter()
+
+    def start(self):
+        tracemalloc.start()
+        self._t0 = time.perf_counter()
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self._t0
+        tracemalloc.stop()
+
+    def begin_file(self, source_file: str | Path) -> FileProfile:
+        """Start profiling a file: the next phases are accounted to it."""
+        self.files.append(FileProfile(source_file))
+        return self.files[-1]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        file = self.files[-1]
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        profile = self.cprofile if name == "translate" else None
+        if profile is not None:
+            profile.enable()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - t0
+            if profile is not None:
+                profile.disable()
+            peak = tracemalloc.get_traced_memory()[1] - base
+            file.wall[name] = file.wall.get(name, 0.0) + wall
+            file.peak_memory[name] = max(file.peak_memory.get(name, 0), peak)
+
+    def report(self) -> dict:
+        phases = {}
+        for phase in PHASES:
+            walls = [f.wall[phase] for f in self.files if phase in f.wall]
+            if walls:
+                phases[phase] = {
+                    "wall": sum(walls),
+                    "peak_memory": max(
+                        f.peak_memory[phase] for f in self.files if phase in f.wall
+                    ),
+                }
+        caches = {}
+        for name, cache in self.caches.items():
+            lookups = cache.hits + cache.misses
+            caches[name] = {
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "hit_rate": cache.hits / lookups if lookups else None,
+            }
+        return {
+            "elapsed": self.elapsed,
+            "phases": phases,
+            "caches": caches,
+            "files": [f.as_dict() for f in self.files],
+        }
+
+    def save(self, path: str | Path):
+        Path(path).write_text(json.dumps(self.report(), indent=2))
+        if self.cprofile is not None:
+            self.cprofile.dump_stats(self.cprofile_path)
+
+    def summary(self, slowest: int = SLOWEST_FILES) -> str:
+        """Return a table of the phases, and the slowest files."""
+        report = self.report()
+        total = sum(p["wall"] for p in report["phases"].values()) or 1e-9
+        lines = [f"{'Phase':<10} {'Time':>9} {'Share':>6} {'Peak memory':>12}"]
+        for phase, stats in report["phases"].items():
+            lines.append(
+                f"{phase:<10} {stats['wall']:>8.3f}s {stats['wall'] / total:>6.0%}"
+                f" {format_size(stats['peak_memory']):>12}"
+            )
+
+        if report["caches"]:
+            lines.append("")
+            lines.append(f"{'Cache':<12} {'Hits':>8} {'Misses':>8} {'Hit rate':>9}")
+            for name, stats in report["caches"].items():
+                hit_rate = stats["hit_rate"]
+                lines.append(
+                    f"{name:<12} {stats['hits']:>8} {stats['misses']:>8}"
+                    f" {'-' if hit_rate is None else f'{hit_rate:.0%}':>9}"
+                )
+
+        files = sorted(self.files, key=lambda f: f.total_wall, reverse=True)
+        lines.append("")
+        lines.append(f"Slowest files ({min(slowest, len(files))} of {len(files)}):")
+        for file in files[:slowest]:
+            slowest_phase = max(file.wall, key=file.wall.get, default="-")
+            lines.append(
+                f"{file.total_wall:>8.3f}s  {file.source_file}"
+                f" (mostly {slowest_phase})"
+            )
+        return "\n".join(lines)
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
@@ -0,0 +1,126 @@
+"""Deeply nested code in recursive code.
+
+The translator handles deeply nested PHP code (e.g. a 100,000-deep array,
+or a long `+` chain) without recursion, but the PHP parser, `ast.unparse()`
+and `ast.NodeTransformer` (the optimizer) recurse several times per level of
+nesting, and hit the recursion limit. `deep_recursion()` runs them again in a
+thread with a large stack and recursion limit when they do.
+
+The recursion limit is global: while it is raised, deep recursion in another
+thread (with a small stack) would crash the process instead of raising
+`RecursionError`. So code which may recurse deeply runs in a
+`recursion_section()` (as `deep_recursion()` does), and the limit is only
+raised while no other thread is in one.
+
+There is still a limit (`RECURSION_LIMIT` calls, i.e. a few hundred
+thousand levels): code nested deeper raises `RecursionError`.
+"""
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# Address space, only used as the recursion goes deeper.
+STACK_SIZE = 512 * 1024 * 1024
+RECURSION_LIMIT = 1_000_000
+
+_condition = threading.Condition()
+# Threads in a `recursion_section()`.
+_sections = 0
+# Whether the recursion limit is raised.
+_raised = False
+# `depth`: nesting of the sections of the thread. `deep`: whether the thread
+# runs with a large stack.
+_local = threading.local()
+
+
+@contextmanager
+def recursion_section() -> Iterator[None]:
+    """Run the code of the block (which may recurse deeply) with the default
+    recursion limit, waiting for `call_with_deep_stack()` to restore it."""
+    global _sections
+    if getattr(_local, "deep", False):
+        yield
+        return
+    depth = getattr(_local, "depth", 0)
+    if not depth:
+        with _condition:
+            _condition.wait_for(lambda: not _raised)
+            _sections += 1
+    _local.depth = depth + 1
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        if not depth:
+            with _condition:
+                _sections -= 1
+                _condition.notify_all()
+
+
+def deep_recursion(func: Callable[..., T], *args) -> T:
+    """Return `func(*args)`, called again with a large stack if it hits the
+    recursion limit (`func` must not have side effects by then)."""
+    try:
+        with recursion_section():
+            return func(*args)
+    except RecursionError:
+        pass
+    return call_with_deep_stack(func, *args)
+
+
+def call_with_deep_stack(func: Callable[..., T], *args) -> T:
+    """Return `func(*args)`, called in a thread with a large stack and
+    recursion limit, once no other thread is in a `recursion_section()`."""
+    global _sections, _raised
+    if getattr(_local, "deep", False):
+        return func(*args)
+    result = []
+    error = []
+
+    def run():
+        _local.deep = True
+        try:
+            result.append(func(*args))
+        except BaseException as e:  # noqa: BLE001
+            error.append(e)
+
+    thread = threading.Thread(target=run, name="deep-recursion")
+    # The section of this thread (if any) waits too.
+    in_section = bool(getattr(_local, "depth", 0))
+    with _condition:
+        if in_section:
+            _sections -= 1
+            _condition.notify_all()
+        try:
+            _condition.wait_for(lambda: not _raised and not _sections)
+        except BaseException:
+            if in_section:
+                _sections += 1
+            raise
+        _raised = True
+    try:
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(RECURSION_LIMIT)
+        try:
+            # Used when the thread starts.
+            stack_size = threading.stack_size(STACK_SIZE)
+            try:
+                thread.start()
+            finally:
+                threading.stack_size(stack_size)
+            thread.join()
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+    finally:
+        with _condition:
+            _raised = False
+            if in_section:
+                _sections += 1
+            _condition.notify_all()
+    if error:
+        raise error[0]
+    return result[0]
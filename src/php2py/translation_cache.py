@@ -0,0 +1,60 @@
+"""Cache of the Python code of top-level PHP declarations.
+
+Functions, classes, interfaces, traits, enums and `const` blocks are cached
+by their structure (the node types and values of their AST, not their line
+numbers), for a given version of php2py. When a huge file changes, only the
+declarations that changed are translated again; the code of the others is
+read from the cache and spliced in (see `emitter.write_translation()`).
+
+The entries are stored in a `ParseCache` (the same content-addressed,
+size-bounded store as the parse cache), in its own directory.
+"""
+from pathlib import Path
+
+from . import php_ast
+from .cache import ParseCache, default_cache_dir
+from .manifest import translator_fingerprint
+from .parser import DEFAULT_PARSER, NODE_SPECS
+
+CACHED_DECLARATIONS = (
+    php_ast.Stmt_Function,
+    php_ast.Stmt_Class,
+    php_ast.Stmt_Interface,
+    php_ast.Stmt_Trait,
+    php_ast.Stmt_Enum,
+    php_ast.Stmt_Const,
+)
+
+
+def translation_cache_dir() -> Path:
+    return default_cache_dir().parent / "translation-cache"
+
+
+def get_translation_cache(parser: str = DEFAULT_PARSER) -> ParseCache:
+    """Return the translation cache of the current php2py code."""
+    return ParseCache(
+        translation_cache_dir(), version=f"translation:{translator_fingerprint(parser)}"
+    )
+
+
+def structural_key(node: php_ast.Node) -> bytes:
+    """Return a serialization of `node` that ignores its position.
+
+    Two declarations with the same key translate to the same code. The tree
+    is walked with an explicit stack, so that deep ASTs don't recurse.
+    """
+    parts = []
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, php_ast.Node):
+            name = value.__class__.__name__
+            parts.append(name)
+            stack.extend(getattr(value, field) for field in NODE_SPECS[name].fields)
+        elif isinstance(value, list):
+            parts.append(f"[{len(value)}")
+            stack.extend(value)
+        else:
+            parts.append(repr(value))
+    # `repr()` escapes NUL characters, so the separator is unambiguous.
+    return "\0".join(parts).encode("utf8", "surrogateescape")
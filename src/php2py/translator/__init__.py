@@ -1,3 +1,4 @@
+from .instrumentation import InstrumentedTranslator, TranslationStats
 from .translator import Translator
 
-__all__ = ["Translator"]
+__all__ = ["InstrumentedTranslator", "TranslationStats", "Translator"]
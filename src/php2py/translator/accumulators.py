@@ -0,0 +1,124 @@
+"""Lowering of string accumulators in loops to list buffers.
+
+PHP code often builds its output with `$out .= ...` in a loop. Translated to
+`out += ...`, each iteration may copy the whole string, so the loop can be
+quadratic. When a variable is only appended to in a loop (`$out .= ...;` as
+a statement, and no other use of `$out` in the loop), the loop is
+translated as:
+
+    out_parts = ['' if out is None else str(out)]
+    for ...:
+        out_parts.append(...)
+    out = ''.join(out_parts)
+
+Loops inside a `try` are left alone: an exception caught there would
+otherwise see `out` without the appends of the loop. So are the loops at
+the top level and the variables shared with other code (`global`,
+`static`, references): a call in the loop could read them, and an `exit`
+would lose the appends.
+"""
+import ast as py
+import functools
+from collections import Counter
+
+from php2py.ast_utils import walk
+from php2py.php_ast import Expr_AssignOp_Concat, Expr_Variable, Node, Stmt_Expression
+
+from .loops import used_names
+from .utils import pos
+
+
+def find_accumulators(loop: Node) -> list[str]:
+    """Return the variables only appended to (with `.=` statements) in `loop`."""
+    appends = Counter()
+    appended = set()
+    for node in walk(loop):
+        match node:
+            case Stmt_Expression(
+                expr=Expr_AssignOp_Concat(var=Expr_Variable(name=str(name)) as var)
+            ):
+                appends[name] += 1
+                appended.add(id(var))
+
+    used = {
+        node.name
+        for node in walk(loop)
+        if isinstance(node, Expr_Variable) and id(node) not in appended
+    }
+    return [name for name in appends if name not in used]
+
+
+def buffer_name(name: str, used: set[str]) -> str:
+    """Return a name for the buffer of `name`, not in `used`."""
+    candidate = f"{name}_parts"
+    i = 1
+    while candidate in used:
+        candidate = f"{name}_parts{i}"
+        i += 1
+    return candidate
+
+
+def string_value(name: str) -> py.expr:
+    """Return the start value of the accumulator `name`, as a string (it
+    could be e.g. an int, or `null`)."""
+    return py.IfExp(
+        py.Compare(py.Name(name, py.Load()), [py.Is()], [py.Constant(None)]),
+        py.Constant(""),
+        py.Call(py.Name("str", py.Load()), [py.Name(name, py.Load())], []),
+    )
+
+
+def string_builders(translate_loop):
+    """Decorate a loop handler to lower the string accumulators of the loop.
+
+    While the loop is translated, `translator.string_buffers` maps the
+    accumulators to their buffers (see `translate_assign_op()`).
+    """
+
+    @functools.wraps(translate_loop)
+    def wrapper(self, node: Node):
+        if self.try_depth or self.scope is None:
+            return translate_loop(self, node)
+        excluded = self.string_buffers.keys() | self.shared_variables()
+        accumulators = [
+            name for name in find_accumulators(node) if name not in excluded
+        ]
+        if not accumulators:
+            return translate_loop(self, node)
+
+        used = self.names_in_scope() | used_names(node)
+        buffers = {}
+        for name in accumulators:
+            buffers[name] = buffer_name(name, used)
+            used.add(buffers[name])
+        outer_buffers = self.string_buffers
+        self.string_buffers = {**outer_buffers, **buffers}
+        try:
+            loop = translate_loop(self, node)
+        finally:
+            self.string_buffers = outer_buffers
+
+        before = [
+            py.Assign(
+                [py.Name(buffer, py.Store())],
+                py.List([string_value(name)], py.Load()),
+                **pos(node),
+            )
+            for name, buffer in buffers.items()
+        ]
+        after = [
+            py.Assign(
+                [py.Name(name, py.Store())],
+                py.Call(
+                    py.Attribute(py.Constant(""), "join", py.Load()),
+                    [py.Name(buffer, py.Load())],
+                    [],
+                ),
+                **pos(node),
+            )
+            for name, buffer in buffers.items()
+        ]
+        loop = loop if isinstance(loop, list) else [loop]
+        return before + loop + after
+
+    return wrapper
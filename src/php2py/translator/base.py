@@ -1,3 +1,55 @@
+from collections.abc import Callable
+from typing import ClassVar
+
+
+def handles(*node_classes: type):
+    """Register the decorated method as the translator of `node_classes`.
+
+    The handler also applies to subclasses of `node_classes`, unless they
+    have their own. Subclasses of a translator can override a handler by
+    redefining the method (with or without the decorator).
+    """
+
+    def decorator(method):
+        method.handled_classes = node_classes
+        return method
+
+    return decorator
+
+
 class BaseTranslator:
+    # Node class -> name of its handler method (from the `@handles` methods).
+    handler_names: ClassVar[dict[type, str]] = {}
+    # Node class -> handler function, resolved on first use.
+    dispatch_table: ClassVar[dict[type, Callable]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handler_names = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                for node_class in getattr(value, "handled_classes", ()):
+                    handler_names[node_class] = name
+        cls.handler_names = handler_names
+        cls.dispatch_table = {}
+
+    @classmethod
+    def resolve_handler(cls, node_class: type) -> Callable:
+        """Return the handler of `node_class` (the one of its nearest base)."""
+        for klass in node_class.__mro__:
+            name = cls.handler_names.get(klass)
+            if name is not None:
+                break
+        else:
+            name = "translate_other"
+        handler = cls.dispatch_table[node_class] = getattr(cls, name)
+        return handler
+
     def translate(self, node):
+        handler = self.dispatch_table.get(node.__class__)
+        if handler is None:
+            handler = self.resolve_handler(node.__class__)
+        return handler(self, node)
+
+    def translate_other(self, node):
         """Implemented in subclass."""
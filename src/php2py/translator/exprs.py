@@ -1,4 +1,6 @@
 import ast as py
+from collections.abc import Mapping
+from types import MappingProxyType
 
 from devtools import debug
 
@@ -9,9 +11,11 @@ from php2py.php_ast import (
     Expr_Assign,
     Expr_AssignOp,
     Expr_AssignOp_Coalesce,
+    Expr_AssignOp_Concat,
     Expr_AssignRef,
     Expr_BinaryOp,
     Expr_BinaryOp_BooleanAnd,
+    Expr_BinaryOp_Concat,
     Expr_BooleanNot,
     Expr_Cast,
     Expr_Cast_Array,
@@ -42,8 +46,10 @@ from php2py.php_ast import (
     Expr_UnaryOp,
     Expr_Variable,
     Node,
+    Scalar_Encapsed,
 )
 
+from .base import handles
 from .scalars import ScalarTranslator
 from .utils import pos, store
 
@@ -97,421 +103,506 @@ compare_ops = {
 
 
 class ExprTranslator(ScalarTranslator):
-    def translate_expr(self, node: Node):
-        match node:
-            case Expr_Variable(name):
-                if name == "this":
-                    name = "self"
+    # PHP variable -> name of its list buffer, in lowered loops (see
+    # `accumulators`). Replaced, never updated in place.
+    string_buffers: Mapping[str, str] = MappingProxyType({})
+    # PHP constant -> value, substituted for its uses (see `optimizer`).
+    # Replaced, never updated in place.
+    constants: Mapping[str, object] = MappingProxyType({})
+
+    @handles(Expr_Variable)
+    def translate_variable(self, node: Expr_Variable):
+        name = node.name
+        if name == "this":
+            name = "self"
+        return py.Name(name, py.Load())
+
+    @handles(Expr_ConstFetch)
+    def translate_const_fetch(self, node: Expr_ConstFetch):
+        # FIXME: 'parts' should be directly addressable
+        parts = node.name.get_parts()
+        name = parts[0]
+        match name.lower():
+            case "true":
+                return py.Name("True", py.Load())
+            case "false":
+                return py.Name("False", py.Load())
+            case "null":
+                return py.Name("None", py.Load())
+        if len(parts) == 1 and name in self.constants:
+            return py.Constant(self.constants[name], **pos(node))
+        match name:
+            case "PHP_INT_MAX":
+                return py.Name("sys.maxsize", py.Load())
+            case "PHP_INT_MIN":
+                return py.Name("sys.minsize", py.Load())
+            case _:
                 return py.Name(name, py.Load())
 
-            case Expr_ConstFetch():
-                # FIXME: 'parts' should be directly addressable
-                parts = node.name.get_parts()
-                name = parts[0]
-                match name.lower():
-                    case "true":
-                        return py.Name("True", py.Load())
-                    case "false":
-                        return py.Name("False", py.Load())
-                    case "null":
-                        return py.Name("None", py.Load())
-                match name:
-                    case "PHP_INT_MAX":
-                        return py.Name("sys.maxsize", py.Load())
-                    case "PHP_INT_MIN":
-                        return py.Name("sys.minsize", py.Load())
-                    case _:
-                        return py.Name(name, py.Load())
-
-            case Expr_Array(items):
-                if not items:
-                    return py.List([], py.Load(**pos(node)), **pos(node))
-
-                elif items[0].key is None:
-                    return py.List(
-                        [self.translate(x.value) for x in items],
-                        py.Load(**pos(node)),
-                        **pos(node),
-                    )
-
-                else:
-                    keys = []
-                    values = []
-                    for elem in items:
-                        keys.append(self.translate(elem.key))
-                        values.append(self.translate(elem.value))
-                    return py.Dict(keys, values, **pos(node))
-
-            #
-            # Unary ops
-            #
-            case Expr_UnaryOp(expr):
-                op = unary_ops[node.op]()
-                return py.UnaryOp(op, self.translate(expr))
-
-            #
-            # Binary ops
-            #
-            case Expr_BinaryOp(left, right):
-                if node.op in binary_ops:
-                    op = binary_ops[node.op]()
-                    return py.BinOp(self.translate(left), op, self.translate(right))
-
-                elif node.op in compare_ops:
-                    op = compare_ops[node.op]()
-                    return py.Compare(
-                        self.translate(left),
-                        [op],
-                        [self.translate(node.right)],
-                        **pos(node),
-                    )
-
-                elif node.op in bool_ops:
-                    op = bool_ops[node.op]()
-                    return py.BoolOp(
-                        op, [self.translate(left), self.translate(right)], **pos(node)
-                    )
-
-                else:
-                    # TODO
-                    # return py.parse("None")
-                    debug(node)
-                    raise NotImplementedError(node.__class__.__name__)
-
-            # TODO: check this:
-            #         if node.op == ".":
-            #             pattern, pieces = build_format(node.left, node.right)
-            #             if pieces:
-            #                 return py.BinOp(
-            #                     py.Str(pattern, **pos(node)),
-            #                     py.Mod(**pos(node)),
-            #                     py.Tuple(
-            #                         list(map(from_phpast, pieces)),
-            #                         py.Load(**pos(node)),
-            #                         **pos(node),
-            #                     ),
-            #                     **pos(node),
-            #                 )
-            #             else:
-            #                 return py.Str(pattern % (), **pos(node))
-            #         op = binary_ops.get(node.op)
-            #         if node.op == "instanceof":
-            #             return py.Call(
-            #                 func=py.Name(id="isinstance", ctx=py.Load(**pos(node))),
-            #                 args=[from_phpast(node.left), from_phpast(node.right)],
-            #                 keywords=[],
-            #                 starargs=None,
-            #                 kwargs=None,
-            #             )
-            #         assert op is not None, f"unknown binary operator: '{node.op}'"
-            #         op = op(**pos(node))
-            #         return py.BinOp(
-            #             from_phpast(node.left), op, from_phpast(node.right), **pos(node)
-            #         )
-
-            # other ops
-            case Expr_Ternary(cond, if_, else_):
-                return py.IfExp(
-                    self.translate(cond),
-                    self.translate(if_),
-                    self.translate(else_),
-                    **pos(node),
-                )
-
-            case Expr_PostInc() | Expr_PreDec() | Expr_PreInc() | Expr_PostDec():
-                return py.Str(f"TODO: {node.__class__.__name__}")
-
-            # Casts
-            case Expr_Cast(expr):
-                # TODO: proper cast
-
-                cast_name = {
-                    Expr_Cast_Object: "TODO_cast_object",
-                    Expr_Cast_Array: "TODO_cast_array",
-                    Expr_Cast_Bool: "bool",
-                    Expr_Cast_Double: "float",
-                    Expr_Cast_Int: "int",
-                    Expr_Cast_String: "str",
-                }.get(node.__class__)
-
-                return py.Call(
-                    func=py.Name(cast_name, py.Load()),
-                    args=[self.translate(expr)],
-                    keywords=[],
-                )
-
-            #
-            # Assign ops
+    #
+    # Unary ops
+    #
+    @handles(Expr_UnaryOp)
+    def translate_unary_op(self, node: Expr_UnaryOp):
+        op = unary_ops[node.op]()
+        return py.UnaryOp(op, self.translate(node.expr))
+
+    # TODO: check this (binary ops):
+    #         if node.op == ".":
+    #             pattern, pieces = build_format(node.left, node.right)
+    #             if pieces:
+    #                 return py.BinOp(
+    #                     py.Str(pattern, **pos(node)),
+    #                     py.Mod(**pos(node)),
+    #                     py.Tuple(
+    #                         list(map(from_phpast, pieces)),
+    #                         py.Load(**pos(node)),
+    #                         **pos(node),
+    #                     ),
+    #                     **pos(node),
+    #                 )
+    #             else:
+    #                 return py.Str(pattern % (), **pos(node))
+    #         op = binary_ops.get(node.op)
+    #         if node.op == "instanceof":
+    #             return py.Call(
+    #                 func=py.Name(id="isinstance", ctx=py.Load(**pos(node))),
+    #                 args=[from_phpast(node.left), from_phpast(node.right)],
+    #                 keywords=[],
+    #                 starargs=None,
+    #                 kwargs=None,
+    #             )
+    #         assert op is not None, f"unknown binary operator: '{node.op}'"
+    #         op = op(**pos(node))
+    #         return py.BinOp(
+    #             from_phpast(node.left), op, from_phpast(node.right), **pos(node)
+    #         )
+
+    # other ops
+    @handles(Expr_Ternary)
+    def translate_ternary(self, node: Expr_Ternary):
+        return py.IfExp(
+            self.translate(node.cond),
+            self.translate(node.if_),
+            self.translate(node.else_),
+            **pos(node),
+        )
+
+    @handles(Expr_PostInc, Expr_PreDec, Expr_PreInc, Expr_PostDec)
+    def translate_inc_dec(self, node: Node):
+        return py.Str(f"TODO: {node.__class__.__name__}")
+
+    # Casts
+    @handles(Expr_Cast)
+    def translate_cast(self, node: Expr_Cast):
+        # TODO: proper cast
+
+        cast_name = {
+            Expr_Cast_Object: "TODO_cast_object",
+            Expr_Cast_Array: "TODO_cast_array",
+            Expr_Cast_Bool: "bool",
+            Expr_Cast_Double: "float",
+            Expr_Cast_Int: "int",
+            Expr_Cast_String: "str",
+        }.get(node.__class__)
+
+        return py.Call(
+            func=py.Name(cast_name, py.Load()),
+            args=[self.translate(node.expr)],
+            keywords=[],
+        )
+
+    #
+    # Assign ops
+    #
+    @handles(Expr_AssignRef)
+    def translate_assign_ref(self, node: Expr_AssignRef):
+        raise NotImplementedError()
+        # return f"""{self.parse(node['var'])} = {self.parse(node['expr'])}"""
+
+    @handles(Expr_AssignOp_Coalesce)
+    def translate_assign_op_coalesce(self, node: Expr_AssignOp_Coalesce):
+        raise NotImplementedError()
+        # # TODO
+        # lhs = self.parse(node['var'])
+        # rhs = self.parse(node['expr'])
+        # return f"""{lhs} = {lhs} if {lhs} is not None else {rhs}"""
+
+    @handles(Expr_AssignOp)
+    def translate_assign_op(self, node: Expr_AssignOp):
+        if isinstance(node, Expr_AssignOp_Concat) and isinstance(
+            node.var, Expr_Variable
+        ):
+            buffer = self.string_buffers.get(node.var.name)
+            if buffer is not None:
+                # Converted to a string, as `.=` does (`"".join()` wouldn't).
+                value = self.make_string(concat_pieces(node.expr), node.expr)
+                append = py.Attribute(py.Name(buffer, py.Load()), "append", py.Load())
+                return py.Call(append, [value], [], **pos(node))
+
+        lhs = self.translate(node.var)
+        # if not isinstance(var.name, str):
+        #     debug(type(var.name), var.name, pos(node))
+        #     raise ValueError("var.name is not str")
+
+        op = binary_ops[node.op[0:-1]]()
+        return py.AugAssign(
+            target=lhs,
+            op=op,
+            value=self.translate(node.expr),
+            **pos(node),
+        )
+
+    @handles(Expr_Assign)
+    def translate_assign(self, node: Expr_Assign):
+        # if isinstance(node.node, php.ArrayOffset) and node.node.expr is None:
+        #     return py.Call(
+        #         py.Attribute(
+        #             self.translate(node.node.node),
+        #             "append",
+        #             py.Load(**pos(node)),
+        #             **pos(node),
+        #         ),
+        #         [self.translate(node.expr)],
+        #         [],
+        #         None,
+        #         None,
+        #         **pos(node),
+        #     )
+
+        # if isinstance(node.node, php.ObjectProperty) and isinstance(
+        #     node.node.name, php.BinaryOp
+        # ):
+        #     return to_stmt(
+        #         py.Call(
+        #             py.Name("setattr", py.Load(**pos(node)), **pos(node)),
+        #             [
+        #                 self.translate(node.node.node),
+        #                 self.translate(node.node.name),
+        #                 self.translate(node.expr),
+        #             ],
+        #             [],
+        #             None,
+        #             None,
+        #             **pos(node),
+        #         )
+        #     )
+        return py.Assign(
+            [store(self.translate(node.var))],
+            self.translate(node.expr),
+            **pos(node),
+        )
+
+    @handles(Expr_Exit)
+    def translate_exit(self, node: Expr_Exit):
+        args = []
+        if node.expr is not None:
+            args.append(self.translate(node.expr))
+
+        return py.Raise(
+            py.Call(
+                func=py.Name("SystemExit", py.Load()),
+                args=args,
+                keywords=[],
+            ),
+            None,
+            **pos(node),
+        )
+
+    @handles(Expr_PropertyFetch)
+    def translate_property_fetch(self, node: Expr_PropertyFetch):
+        name = node.name.name
+        # if isinstance(node.name, (Variable, BinaryOp)):
+        #     return py.Call(
+        #         py.Name("getattr", py.Load()),
+        #         [self.translate(node.node), self.translate(node.name)],
+        #         [],
+        #     )
+        return py.Attribute(
+            value=self.translate(node.var), attr=name, ctx=py.Load(), **pos(node)
+        )
+
+    @handles(Expr_Isset)
+    def translate_isset(self, node: Expr_Isset):
+        vars = node.vars
+        assert len(vars) == 1
+        var = vars[0]
+        match var:
+            # case Expr_ArrayOffset():
+            #     return py.Compare(
+            #         self.translate(node.nodes[0].expr),
+            #         [py.In(**pos(node))],
+            #         [self.translate(node.nodes[0].node)],
+            #         **pos(node),
+            #     )
             #
-            case Expr_AssignRef():
-                raise NotImplementedError()
-                # return f"""{self.parse(node['var'])} = {self.parse(node['expr'])}"""
-
-            case Expr_AssignOp_Coalesce():
-                raise NotImplementedError()
-                # # TODO
-                # lhs = self.parse(node['var'])
-                # rhs = self.parse(node['expr'])
-                # return f"""{lhs} = {lhs} if {lhs} is not None else {rhs}"""
-
-            case Expr_AssignOp(var, expr):
-                lhs = self.translate(var)
-                # if not isinstance(var.name, str):
-                #     debug(type(var.name), var.name, pos(node))
-                #     raise ValueError("var.name is not str")
-
-                op = binary_ops[node.op[0:-1]]()
-                return py.AugAssign(
-                    target=lhs,
-                    op=op,
-                    value=self.translate(expr),
-                    **pos(node),
-                )
-
-            case Expr_Assign(var=var, expr=expr):
-                # if isinstance(node.node, php.ArrayOffset) and node.node.expr is None:
-                #     return py.Call(
-                #         py.Attribute(
-                #             self.translate(node.node.node),
-                #             "append",
-                #             py.Load(**pos(node)),
-                #             **pos(node),
-                #         ),
-                #         [self.translate(node.expr)],
-                #         [],
-                #         None,
-                #         None,
-                #         **pos(node),
-                #     )
-
-                # if isinstance(node.node, php.ObjectProperty) and isinstance(
-                #     node.node.name, php.BinaryOp
-                # ):
-                #     return to_stmt(
-                #         py.Call(
-                #             py.Name("setattr", py.Load(**pos(node)), **pos(node)),
-                #             [
-                #                 self.translate(node.node.node),
-                #                 self.translate(node.node.name),
-                #                 self.translate(node.expr),
-                #             ],
-                #             [],
-                #             None,
-                #             None,
-                #             **pos(node),
-                #         )
-                #     )
-                return py.Assign(
-                    [store(self.translate(var))],
-                    self.translate(expr),
-                    **pos(node),
-                )
-
-            case Expr_Exit(expr):
-                args = []
-                if expr is not None:
-                    args.append(self.translate(expr))
-
-                return py.Raise(
-                    py.Call(
-                        func=py.Name("SystemExit", py.Load()),
-                        args=args,
-                        keywords=[],
-                    ),
-                    None,
-                    **pos(node),
-                )
-
-            case Expr_PropertyFetch(var, name):
-                name = name.name
-                # if isinstance(node.name, (Variable, BinaryOp)):
-                #     return py.Call(
-                #         py.Name("getattr", py.Load()),
-                #         [self.translate(node.node), self.translate(node.name)],
-                #         [],
-                #     )
-                return py.Attribute(
-                    value=self.translate(var), attr=name, ctx=py.Load(), **pos(node)
-                )
-
-            case Expr_Isset(vars):
-                assert len(vars) == 1
-                var = vars[0]
-                match var:
-                    # case Expr_ArrayOffset():
-                    #     return py.Compare(
-                    #         self.translate(node.nodes[0].expr),
-                    #         [py.In(**pos(node))],
-                    #         [self.translate(node.nodes[0].node)],
-                    #         **pos(node),
-                    #     )
-                    #
-                    # case Expr_ObjectProperty():
-                    #     return py.Call(
-                    #         func=py.Name("hasattr", py.Load()),
-                    #         args=[
-                    #             self.translate(node.nodes[0].node),
-                    #             self.translate(node.nodes[0].name),
-                    #         ],
-                    #         keywords=[],
-                    #         **pos(node),
-                    #     )
-
-                    case Expr_Variable():
-                        return py.Compare(
-                            py.Str(var.name),
-                            [py.In()],
-                            [
-                                py.Call(
-                                    func=py.Name("vars", py.Load()),
-                                    args=[],
-                                    keywords=[],
-                                )
-                            ],
-                            **pos(node),
-                        )
-
-                    case _:
-                        return py.Compare(
-                            self.translate(var),
-                            [py.IsNot()],
-                            [py.Name("None", py.Load())],
+            # case Expr_ObjectProperty():
+            #     return py.Call(
+            #         func=py.Name("hasattr", py.Load()),
+            #         args=[
+            #             self.translate(node.nodes[0].node),
+            #             self.translate(node.nodes[0].name),
+            #         ],
+            #         keywords=[],
+            #         **pos(node),
+            #     )
+
+            case Expr_Variable():
+                return py.Compare(
+                    py.Str(var.name),
+                    [py.In()],
+                    [
+                        py.Call(
+                            func=py.Name("vars", py.Load()),
+                            args=[],
+                            keywords=[],
                         )
-
-            case Expr_Empty(expr):
-                return self.translate(
-                    Expr_BooleanNot(Expr_BinaryOp_BooleanAnd(Expr_Isset([expr]), expr))
-                )
-
-            case Expr_FuncCall(name, args):
-                if hasattr(name, "name"):
-                    name = name.name
-                else:
-                    name = name.get_parts()[0]
-                func = py.Name(name, py.Load())
-
-                # if isinstance(name, str):
-                #     name = py.Name(name, py.Load())
-                # else:
-                #     name = py.Subscript(
-                #         py.Call(
-                #             func=py.Name("vars", py.Load()),
-                #             args=[],
-                #             keywords=[],
-                #             **pos(node),
-                #         ),
-                #         py.Index(self.translate(node.name)),
-                #         py.Load(),
-                #     )
-                args, kwargs = self.build_args(args)
-                return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
-
-            case Expr_New(class_, args):
-                args, kwargs = self.build_args(args)
-                func = self.translate(class_)
-                # match class_:
-                #     case Expr_Variable(name):
-                #
-                #         pass
-                #     case _:
-                #         debug(class_)
-                #         name = class_.get_parts()[0]
-                # func = py.Name(name, py.Load())
-                return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
-
-            case Expr_MethodCall(var, name, args):
-                name = name.name
-                args, kwargs = self.build_args(args)
-                func = py.Attribute(value=self.translate(var), attr=name, ctx=py.Load())
-                return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
-
-            case Expr_StaticCall(class_, name, args):
-                class_name = class_.get_parts()[0]
-                if class_name == "self":
-                    class_name = "cls"
-                args, kwargs = self.build_args(args)
-                func = py.Attribute(
-                    value=py.Name(class_name, py.Load()), attr=name.name, ctx=py.Load()
-                )
-                assert isinstance(func.attr, str)
-
-                return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
-
-            case Expr_ArrayDimFetch(var, dim):
-                if dim:
-                    return py.Subscript(
-                        value=self.translate(var),
-                        slice=py.Index(self.translate(dim)),
-                        ctx=py.Load(),
-                        **pos(node),
-                    )
-                else:
-                    # TODO
-                    debug(node)
-                    raise NotImplementedError(node)
-                    # return py.Name("TODO")
-                    # return py.Subscript(
-                    #     value=self.translate(var),
-                    #     slice=py.Index(self.translate(dim)),
-                    #     ctx=py.Load(),
-                    #     **pos(node),
-                    # )
-
-            case Expr_ClassConstFetch(name, class_):
-                class_name = class_.get_parts()[0]
-                return py.Attribute(
-                    value=py.Name(id=class_name, ctx=py.Load()),
-                    attr=name.name,
-                    ctx=py.Load(),
-                    **pos(node),
-                )
-
-            case Expr_Closure():
-                # TODO
-                # return py.parse("None", mode="eval")
-                # debug(node, node._json)
-                # Exemple
-                #     node: (
-                #         Expr_Closure(attrGroups=[], uses=[], byRef=False, returnType=None,
-                #         stmts=[Stmt_Return(expr=Expr_MethodCall(var=Expr_Variable(name='nt'),
-                #         name=Identifier(name='getPropertyDefinitions'), args=[]))],
-                #         params=[
-                #            Param(flags=0, attrGroups=[], default=None,
-                #            byRef=False, variadic=False, var=Expr_Variable(name='nt'),
-                #            type=Name(parts=[None]))
-                #         ],
-                #         static=False)
-                #     ) (Expr_Closure)
-                raise NotImplementedError(node.__class__.__name__)
-
-            case Expr_List(items):
-                return py.List(
-                    elts=[self.translate(item) for item in items],
-                    ctx=py.Store(),
-                )
-
-            case Expr_Instanceof(expr, class_):
-                return py.Call(
-                    func=py.Name("isinstance", py.Load()),
-                    args=[self.translate(expr), self.translate(class_)],
-                    keywords=[],
-                )
-
-            case Expr_StaticPropertyFetch(class_, name):
-                class_name = class_.get_parts()[0]
-                return py.Attribute(
-                    value=py.Name(id=class_name, ctx=py.Load()),
-                    attr=name.name,
-                    ctx=py.Load(),
+                    ],
                     **pos(node),
                 )
 
             case _:
-                debug(node)
-                raise NotImplementedError(
-                    f"Don't know how to translate node {node.__class__}"
+                return py.Compare(
+                    self.translate(var),
+                    [py.IsNot()],
+                    [py.Name("None", py.Load())],
                 )
 
+    @handles(Expr_Empty)
+    def translate_empty(self, node: Expr_Empty):
+        expr = node.expr
+        return self.translate(
+            Expr_BooleanNot(Expr_BinaryOp_BooleanAnd(Expr_Isset([expr]), expr))
+        )
+
+    @handles(Expr_FuncCall)
+    def translate_func_call(self, node: Expr_FuncCall):
+        name = node.name
+        if hasattr(name, "name"):
+            name = name.name
+        else:
+            name = name.get_parts()[0]
+        func = py.Name(name, py.Load())
+
+        # if isinstance(name, str):
+        #     name = py.Name(name, py.Load())
+        # else:
+        #     name = py.Subscript(
+        #         py.Call(
+        #             func=py.Name("vars", py.Load()),
+        #             args=[],
+        #             keywords=[],
+        #             **pos(node),
+        #         ),
+        #         py.Index(self.translate(node.name)),
+        #         py.Load(),
+        #     )
+        args, kwargs = self.build_args(node.args)
+        return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
+
+    @handles(Expr_New)
+    def translate_new(self, node: Expr_New):
+        args, kwargs = self.build_args(node.args)
+        func = self.translate(node.class_)
+        # match class_:
+        #     case Expr_Variable(name):
+        #
+        #         pass
+        #     case _:
+        #         debug(class_)
+        #         name = class_.get_parts()[0]
+        # func = py.Name(name, py.Load())
+        return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
+
+    @handles(Expr_MethodCall)
+    def translate_method_call(self, node: Expr_MethodCall):
+        name = node.name.name
+        args, kwargs = self.build_args(node.args)
+        func = py.Attribute(value=self.translate(node.var), attr=name, ctx=py.Load())
+        return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
+
+    @handles(Expr_StaticCall)
+    def translate_static_call(self, node: Expr_StaticCall):
+        class_name = node.class_.get_parts()[0]
+        if class_name == "self":
+            class_name = "cls"
+        args, kwargs = self.build_args(node.args)
+        func = py.Attribute(
+            value=py.Name(class_name, py.Load()), attr=node.name.name, ctx=py.Load()
+        )
+        assert isinstance(func.attr, str)
+
+        return py.Call(func=func, args=args, keywords=kwargs, **pos(node))
+
+    @handles(Expr_ArrayDimFetch)
+    def translate_array_dim_fetch(self, node: Expr_ArrayDimFetch):
+        if node.dim:
+            return py.Subscript(
+                value=self.translate(node.var),
+                slice=py.Index(self.translate(node.dim)),
+                ctx=py.Load(),
+                **pos(node),
+            )
+        else:
+            # TODO
+            debug(node)
+            raise NotImplementedError(node)
+            # return py.Name("TODO")
+            # return py.Subscript(
+            #     value=self.translate(var),
+            #     slice=py.Index(self.translate(dim)),
+            #     ctx=py.Load(),
+            #     **pos(node),
+            # )
+
+    @handles(Expr_ClassConstFetch)
+    def translate_class_const_fetch(self, node: Expr_ClassConstFetch):
+        class_name = node.class_.get_parts()[0]
+        return py.Attribute(
+            value=py.Name(id=class_name, ctx=py.Load()),
+            attr=node.name.name,
+            ctx=py.Load(),
+            **pos(node),
+        )
+
+    @handles(Expr_Closure)
+    def translate_closure(self, node: Expr_Closure):
+        # TODO
+        # return py.parse("None", mode="eval")
+        # debug(node, node._json)
+        # Exemple
+        #     node: (
+        #         Expr_Closure(attrGroups=[], uses=[], byRef=False, returnType=None,
+        #         stmts=[Stmt_Return(expr=Expr_MethodCall(var=Expr_Variable(name='nt'),
+        #         name=Identifier(name='getPropertyDefinitions'), args=[]))],
+        #         params=[
+        #            Param(flags=0, attrGroups=[], default=None,
+        #            byRef=False, variadic=False, var=Expr_Variable(name='nt'),
+        #            type=Name(parts=[None]))
+        #         ],
+        #         static=False)
+        #     ) (Expr_Closure)
+        raise NotImplementedError(node.__class__.__name__)
+
+    @handles(Expr_List)
+    def translate_list(self, node: Expr_List):
+        return py.List(
+            elts=[self.translate(item) for item in node.items],
+            ctx=py.Store(),
+        )
+
+    @handles(Expr_Instanceof)
+    def translate_instanceof(self, node: Expr_Instanceof):
+        return py.Call(
+            func=py.Name("isinstance", py.Load()),
+            args=[self.translate(node.expr), self.translate(node.class_)],
+            keywords=[],
+        )
+
+    @handles(Expr_StaticPropertyFetch)
+    def translate_static_property_fetch(self, node: Expr_StaticPropertyFetch):
+        class_name = node.class_.get_parts()[0]
+        return py.Attribute(
+            value=py.Name(id=class_name, ctx=py.Load()),
+            attr=node.name.name,
+            ctx=py.Load(),
+            **pos(node),
+        )
+
+    #
+    # Binary ops
+    #
+    @handles(Expr_BinaryOp)
+    def translate_binary_op(self, node: Expr_BinaryOp):
+        # Walk down the left operands first, so that long left-deep chains
+        # (e.g. `$a . $b . $c . ...`) are translated without recursing once
+        # per operand.
+        chain = []
+        while isinstance(node, Expr_BinaryOp) and not isinstance(
+            node, Expr_BinaryOp_Concat
+        ):
+            chain.append(node)
+            node = node.left
+
+        result = self.translate(node)
+        for node in reversed(chain):
+            result = self.make_binary_op(node, result, self.translate(node.right))
+        return result
+
+    @handles(Expr_BinaryOp_Concat)
+    def translate_concat(self, node: Expr_BinaryOp_Concat):
+        return self.make_string(concat_pieces(node), node)
+
+    def make_binary_op(self, node: Expr_BinaryOp, left, right):
+        if node.op in binary_ops:
+            op = binary_ops[node.op]()
+            return py.BinOp(left, op, right)
+
+        elif node.op in compare_ops:
+            op = compare_ops[node.op]()
+            return py.Compare(left, [op], [right], **pos(node))
+
+        elif node.op in bool_ops:
+            op = bool_ops[node.op]()
+            return py.BoolOp(op, [left, right], **pos(node))
+
+        else:
+            # TODO
+            # return py.parse("None")
+            debug(node)
+            raise NotImplementedError(node.__class__.__name__)
+
+    @handles(Expr_Array)
+    def translate_array(self, root: Expr_Array):
+        # Nested array literals are translated inner-most first, with an
+        # explicit stack, so that deeply nested arrays don't recurse once per
+        # level.
+        translated = {}
+
+        def translate_value(value):
+            if isinstance(value, Expr_Array):
+                return translated.pop(id(value))
+            return self.translate(value)
+
+        todo = [root]
+        while todo:
+            array = todo[-1]
+            nested = [
+                item.value
+                for item in array.items
+                if item is not None
+                and isinstance(item.value, Expr_Array)
+                and id(item.value) not in translated
+            ]
+            if nested:
+                todo.extend(nested)
+                continue
+
+            todo.pop()
+            translated[id(array)] = self.make_array(array, translate_value)
+
+        return translated.pop(id(root))
+
+    def make_array(self, node: Expr_Array, translate_value):
+        items = node.items
+        if not items:
+            return py.List([], py.Load(**pos(node)), **pos(node))
+
+        elif items[0].key is None:
+            return py.List(
+                [translate_value(x.value) for x in items],
+                py.Load(**pos(node)),
+                **pos(node),
+            )
+
+        else:
+            keys = []
+            values = []
+            for elem in items:
+                keys.append(self.translate(elem.key))
+                values.append(translate_value(elem.value))
+            return py.Dict(keys, values, **pos(node))
+
     def build_args(self, php_args: list[Node]):
         args = []
         kwargs = []
@@ -527,3 +618,19 @@ class ExprTranslator(ScalarTranslator):
                     raise NotImplementedError("Should not happen")
 
         return args, kwargs
+
+
+def concat_pieces(node: Node) -> list[Node]:
+    """Return the operands of a `.` chain (and the parts of the interpolated
+    strings in it), in order."""
+    pieces = []
+    todo = [node]
+    while todo:
+        piece = todo.pop()
+        if isinstance(piece, Expr_BinaryOp_Concat):
+            todo += [piece.right, piece.left]
+        elif isinstance(piece, Scalar_Encapsed):
+            todo += reversed(piece.parts)
+        else:
+            pieces.append(piece)
+    return pieces
@@ -0,0 +1,100 @@
+"""Opt-in counters and timings of the translator, per PHP node class.
+
+`InstrumentedTranslator` wraps `translate()`: for each node class, it counts
+the nodes and accumulates the time spent translating them, both including
+their children ("total") and excluding them ("self"). Self times add up to
+the whole translation time, so they show which constructs dominate it.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+
+from php2py.php_ast import Node
+
+from .translator import Translator
+
+# Rows of the table printed by default (the JSON export has them all).
+TABLE_ROWS = 25
+
+
+class NodeStats:
+    __slots__ = ("count", "self_time", "total_time")
+
+    def __init__(self):
+        self.count = 0
+        self.self_time = 0.0
+        self.total_time = 0.0
+
+
+class TranslationStats:
+    def __init__(self):
+        self.nodes: dict[str, NodeStats] = {}
+
+    def add(self, node_type: str, total_time: float, self_time: float):
+        stats = self.nodes.get(node_type)
+        if stats is None:
+            stats = self.nodes[node_type] = NodeStats()
+        stats.count += 1
+        stats.self_time += self_time
+        stats.total_time += total_time
+
+    def sorted(self) -> list[tuple[str, NodeStats]]:
+        return sorted(
+            self.nodes.items(), key=lambda item: item[1].self_time, reverse=True
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            node_type: {
+                "count": stats.count,
+                "self_time": stats.self_time,
+                "total_time": stats.total_time,
+            }
+            for node_type, stats in self.sorted()
+        }
+
+    def save(self, path):
+        with open(path, "w") as fp:
+            json.dump(self.as_dict(), fp, indent=2)
+
+    def table(self, rows: int | None = TABLE_ROWS) -> str:
+        """Return the node types as a table, by decreasing self time."""
+        items = self.sorted()
+        total = sum(stats.self_time for _, stats in items) or 1e-9
+        header = (
+            f"{'Node type':<32} {'Count':>8} {'Self time':>10} {'Share':>6}"
+            f" {'Total time':>11} {'Per node':>9}"
+        )
+        lines = [header]
+        for node_type, stats in items[:rows]:
+            lines.append(
+                f"{node_type:<32} {stats.count:>8} {stats.self_time:>9.4f}s"
+                f" {stats.self_time / total:>6.1%} {stats.total_time:>10.4f}s"
+                f" {stats.self_time / stats.count * 1e6:>6.1f} µs"
+            )
+        if rows is not None and len(items) > rows:
+            lines.append(f"... and {len(items) - rows} more node types")
+        return "\n".join(lines)
+
+
+@dataclass
+class InstrumentedTranslator(Translator):
+    stats: TranslationStats = field(default_factory=TranslationStats)
+    # Time spent in the children of the nodes being translated.
+    _child_times: list[float] = field(default_factory=list, repr=False)
+
+    def translate(self, node):
+        if not isinstance(node, Node):
+            return super().translate(node)
+
+        child_times = self._child_times
+        child_times.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return super().translate(node)
+        finally:
+            elapsed = time.perf_counter() - t0
+            self_time = elapsed - child_times.pop()
+            if child_times:
+                child_times[-1] += elapsed
+            self.stats.add(node.__class__.__name__, elapsed, self_time)
@@ -0,0 +1,382 @@
+"""Recognition of counting for-loops, translated to `for ... in range()`.
+
+`for ($i = A; $i < B; $i++)` (also with `<=`, `>`, `>=`, `--` and constant
+steps, like `$i += 2`) becomes `for i in range(A, B)`, when:
+
+- `$i` isn't written in the body (assigned, incremented, unset...);
+- `B` is a number, a constant, a variable not modified in the body, or the
+  length (`count()`, `sizeof()`, `strlen()`) of such a variable (`range()`
+  evaluates it once, PHP on each iteration);
+- the loop is in a function, and `$i` isn't used elsewhere in it (after a
+  `range()` loop, `i` is the last value, not the first one out of range).
+
+Other loops are translated as `while` loops (see
+`StmtTranslator.translate_for()`), with the lengths in their condition
+computed once before the loop when the body doesn't modify the variable
+(`hoistable_lengths()`).
+
+A variable is modified if it's written (assigned, incremented, unset...),
+passed to a function (which may take it by reference, like `sort($a)`), or
+if one of its methods is called. Global, static and reference variables of
+the function may be modified anywhere, so they're never invariant. Passing
+`$i` by reference to a function in the body isn't detected, nor changes to
+a `Countable` object through another variable, and `A` and `B` are assumed
+to be integers.
+"""
+import ast as py
+import copy
+from typing import NamedTuple
+
+from php2py.ast_utils import walk
+from php2py.php_ast import (
+    Arg,
+    Expr,
+    Expr_Array,
+    Expr_ArrayDimFetch,
+    Expr_Assign,
+    Expr_AssignOp,
+    Expr_AssignOp_Minus,
+    Expr_AssignOp_Plus,
+    Expr_AssignRef,
+    Expr_BinaryOp,
+    Expr_BinaryOp_BooleanAnd,
+    Expr_BinaryOp_BooleanOr,
+    Expr_BinaryOp_Coalesce,
+    Expr_BinaryOp_Greater,
+    Expr_BinaryOp_GreaterOrEqual,
+    Expr_BinaryOp_LogicalAnd,
+    Expr_BinaryOp_LogicalOr,
+    Expr_BinaryOp_Smaller,
+    Expr_BinaryOp_SmallerOrEqual,
+    Expr_BooleanNot,
+    Expr_ClassConstFetch,
+    Expr_ClosureUse,
+    Expr_ConstFetch,
+    Expr_FuncCall,
+    Expr_List,
+    Expr_MethodCall,
+    Expr_New,
+    Expr_NullsafeMethodCall,
+    Expr_PostDec,
+    Expr_PostInc,
+    Expr_PreDec,
+    Expr_PreInc,
+    Expr_PropertyFetch,
+    Expr_StaticCall,
+    Expr_Ternary,
+    Expr_UnaryMinus,
+    Expr_Variable,
+    Name,
+    Name_FullyQualified,
+    Node,
+    Param,
+    Scalar_LNumber,
+    Stmt_ClassMethod,
+    Stmt_For,
+    Stmt_Foreach,
+    Stmt_Function,
+    Stmt_Global,
+    Stmt_StaticVar,
+    Stmt_Unset,
+)
+
+# Comparison with the bound -> (direction of the step, bound included).
+COMPARISONS = {
+    Expr_BinaryOp_Smaller: (1, False),
+    Expr_BinaryOp_SmallerOrEqual: (1, True),
+    Expr_BinaryOp_Greater: (-1, False),
+    Expr_BinaryOp_GreaterOrEqual: (-1, True),
+}
+
+# Functions whose result only depends on the length of their argument, with
+# the suffix of the variable holding it when hoisted out of a loop.
+LENGTH_FUNCTIONS = {"count": "count", "sizeof": "count", "strlen": "len"}
+
+# Operators whose right operand isn't always evaluated.
+SHORT_CIRCUITS = (
+    Expr_BinaryOp_BooleanAnd,
+    Expr_BinaryOp_BooleanOr,
+    Expr_BinaryOp_Coalesce,
+    Expr_BinaryOp_LogicalAnd,
+    Expr_BinaryOp_LogicalOr,
+)
+
+
+class RangeLoop(NamedTuple):
+    var: str
+    start: Expr
+    stop: Expr
+    step: int
+    inclusive: bool
+
+
+def range_loop(node: Stmt_For, shared: set[str] = frozenset()) -> RangeLoop | None:
+    """Return the shape of `node` if it's a counting loop, else `None`.
+
+    Only the loop itself is checked: the caller checks that the variable
+    isn't used outside the loop, and gives the `shared` variables of the
+    function (see `shared_variables()`).
+    """
+    match node:
+        case Stmt_For(
+            init=[Expr_Assign(var=Expr_Variable(name=str(var)), expr=start)],
+            cond=[cond],
+            loop=[update],
+        ) if type(cond) in COMPARISONS:
+            pass
+        case _:
+            return None
+    if not is_variable(cond.left, var):
+        return None
+
+    step = loop_step(update, var)
+    direction, inclusive = COMPARISONS[type(cond)]
+    if step is None or step * direction <= 0:
+        return None
+
+    written = written_variables(node.stmts)
+    if written is None or var in written:
+        return None
+    stop = cond.right
+    modified = written | passed_variables(node.stmts) | shared
+    if not is_invariant(stop, modified) or is_variable(stop, var):
+        return None
+    return RangeLoop(var, start, stop, step, inclusive)
+
+
+def loop_step(update: Expr, var: str) -> int | None:
+    """Return the constant step of the update expression of a loop."""
+    match update:
+        case Expr_PreInc(var=target) | Expr_PostInc(var=target):
+            step = 1
+        case Expr_PreDec(var=target) | Expr_PostDec(var=target):
+            step = -1
+        case Expr_AssignOp_Plus(var=target, expr=amount):
+            step = int_literal(amount)
+        case Expr_AssignOp_Minus(var=target, expr=amount):
+            step = int_literal(amount)
+            step = -step if step is not None else None
+        case _:
+            return None
+    if not is_variable(target, var):
+        return None
+    return step
+
+
+def int_literal(node: Expr) -> int | None:
+    match node:
+        case Scalar_LNumber(value=int(value)):
+            return value
+        case Expr_UnaryMinus(expr=Scalar_LNumber(value=int(value))):
+            return -value
+    return None
+
+
+def is_variable(node: Expr, name: str) -> bool:
+    return isinstance(node, Expr_Variable) and node.name == name
+
+
+def is_invariant(node: Expr, modified: set[str]) -> bool:
+    """Tell if `node` has the same value in each iteration of the loop."""
+    match node:
+        case Expr_Variable(name=str(name)):
+            return name not in modified
+        case Expr_ConstFetch() | Expr_ClassConstFetch():
+            return True
+        case Expr_FuncCall():
+            var = length_argument(node)
+            return var is not None and var not in modified
+    return int_literal(node) is not None
+
+
+def length_argument(node: Expr) -> str | None:
+    """Return `$a` if `node` is `count($a)`, `sizeof($a)` or `strlen($a)`."""
+    match node:
+        case Expr_FuncCall(
+            name=Name(parts=[str(func)]) | Name_FullyQualified(parts=[str(func)]),
+            args=[Arg(value=Expr_Variable(name=str(var)), unpack=False)],
+        ) if func.lower() in LENGTH_FUNCTIONS:
+            return var
+    return None
+
+
+def hoistable_lengths(
+    cond: Expr, loop: list, shared: set[str]
+) -> list[tuple[Expr_FuncCall, str]]:
+    """Return the lengths in `cond` that may be computed once before the
+    loop, with their variable.
+
+    `loop` is the part of the loop run between two evaluations of `cond`
+    (the body, the update expressions of a for-loop, and `cond` itself).
+    Only the lengths evaluated each time `cond` is are returned (not those
+    in the right operand of `&&`, for instance): computing the others before
+    the loop could raise an error PHP wouldn't.
+    """
+    modified = written_variables(loop)
+    if modified is None:
+        return []
+    modified |= passed_variables(loop) | shared
+    lengths = []
+    todo = [cond]
+    while todo:
+        node = todo.pop()
+        match node:
+            case Expr_FuncCall():
+                var = length_argument(node)
+                if var is not None and var not in modified:
+                    lengths.append((node, var))
+            case Expr_BinaryOp(left=left) if isinstance(node, SHORT_CIRCUITS):
+                todo.append(left)
+            case Expr_BinaryOp(left=left, right=right):
+                todo += [right, left]
+            case Expr_BooleanNot(expr=expr) | Expr_UnaryMinus(expr=expr):
+                todo.append(expr)
+            case Expr_Ternary(cond=expr):
+                todo.append(expr)
+    return lengths
+
+
+def written_variables(nodes: Node | list) -> set[str] | None:
+    """Return the variables that may be written in `nodes`.
+
+    Returns `None` if any variable may be (e.g. with `$$name = ...`).
+    """
+    written = set()
+    for node in walk(nodes):
+        match node:
+            case Expr_Variable(name=str()):
+                continue
+            case Expr_Variable():
+                return None
+            case Expr_Assign(var=target) | Expr_AssignOp(var=target):
+                targets = [target]
+            case Expr_AssignRef(var=target, expr=source):
+                targets = [target, source]
+            case Expr_PreInc(var=target) | Expr_PostInc(var=target):
+                targets = [target]
+            case Expr_PreDec(var=target) | Expr_PostDec(var=target):
+                targets = [target]
+            case Stmt_Foreach(keyVar=key, valueVar=value):
+                targets = [key, value]
+            case Stmt_Unset(vars=targets) | Stmt_Global(vars=targets):
+                pass
+            case Stmt_StaticVar(var=target):
+                targets = [target]
+            case Expr_ClosureUse(var=target, byRef=by_ref) if by_ref:
+                targets = [target]
+            case _:
+                continue
+        for target in targets:
+            written |= target_variables(target)
+    return written
+
+
+def passed_variables(nodes: Node | list) -> set[str]:
+    """Return the variables passed to functions (other than the length
+    functions), or whose methods are called, in `nodes`.
+
+    Passing `$a[$i]` by reference only changes the length of `$a` if
+    there's no such key, so it isn't counted.
+    """
+    passed = set()
+    for node in walk(nodes):
+        match node:
+            case Expr_FuncCall() if length_argument(node) is not None:
+                continue
+            case Expr_FuncCall(args=args) | Expr_New(args=args):
+                pass
+            case Expr_StaticCall(args=args):
+                pass
+            case Expr_MethodCall(var=var, args=args) | Expr_NullsafeMethodCall(
+                var=var, args=args
+            ):
+                args = [Arg(None, var, False, False), *args]
+            case _:
+                continue
+        for arg in args:
+            match arg:
+                case Arg(value=Expr_Variable(name=str(name))):
+                    passed.add(name)
+    return passed
+
+
+def shared_variables(function: Stmt_Function | Stmt_ClassMethod) -> set[str]:
+    """Return the variables of `function` that other code may modify: global
+    and static variables, parameters by reference and references."""
+    shared = set()
+    for node in walk([function.params, function.stmts]):
+        match node:
+            case Stmt_Global(vars=targets):
+                pass
+            case Stmt_StaticVar(var=target) | Param(var=target, byRef=True):
+                targets = [target]
+            case Expr_AssignRef(var=target, expr=source):
+                targets = [target, source]
+            case Expr_ClosureUse(var=target, byRef=True):
+                targets = [target]
+            case _:
+                continue
+        for target in targets:
+            shared |= target_variables(target)
+    return shared
+
+
+def used_names(nodes: Node | list) -> set[str]:
+    """Return the names of the variables and functions used in `nodes`."""
+    names = set()
+    for node in walk(nodes):
+        match node:
+            case Expr_Variable(name=str(name)):
+                names.add(name)
+            case Expr_FuncCall(name=Name(parts=[str(name)])):
+                names.add(name)
+    return names
+
+
+def target_variables(target: Expr | None) -> set[str]:
+    """Return the variables written when assigning to `target`.
+
+    That's the variable itself, the array of `$a[$i]` or the object of
+    `$o->p` (not `$i`), or the variables of `[$a, $b]`.
+    """
+    names = set()
+    todo = [target]
+    while todo:
+        match todo.pop():
+            case Expr_Variable(name=str(name)):
+                names.add(name)
+            case Expr_ArrayDimFetch(var=base) | Expr_PropertyFetch(var=base):
+                todo.append(base)
+            case Expr_List(items=items) | Expr_Array(items=items):
+                todo += [item.value for item in items if item is not None]
+    return names
+
+
+class ContinueWithUpdate(py.NodeTransformer):
+    """Run the update statements of a loop before its `continue` statements
+    (not those of nested loops)."""
+
+    def __init__(self, update: list[py.stmt]):
+        self.update = update
+
+    def visit_Continue(self, node: py.Continue):
+        return copy.deepcopy(self.update) + [node]
+
+    def skip(self, node: py.AST):
+        return node
+
+    visit_For = visit_While = visit_FunctionDef = visit_ClassDef = skip
+    visit_Lambda = skip
+
+
+class ReplaceExprs(py.NodeTransformer):
+    """Replace the expressions equal to the keys of `names` (compared with
+    `ast.dump()`) with the variable named by the value."""
+
+    def __init__(self, names: dict[str, str]):
+        self.names = names
+
+    def visit(self, node: py.AST):
+        if isinstance(node, py.expr) and py.dump(node) in self.names:
+            return py.Name(self.names[py.dump(node)], py.Load())
+        return super().visit(node)
@@ -1,9 +1,7 @@
 import ast as py
 
-from devtools import debug
-
 from php2py.php_ast import (
-    Expr_Variable,
+    Expr_ConstFetch,
     Node,
     Scalar_DNumber,
     Scalar_Encapsed,
@@ -12,7 +10,14 @@ from php2py.php_ast import (
     Scalar_String,
 )
 
-from .base import BaseTranslator
+from .base import BaseTranslator, handles
+from .utils import pos
+
+# String conversion of the PHP constants (`true . ""` is "1").
+CONSTANT_STRINGS = {"true": "1", "false": "", "null": ""}
+
+# Characters that need escaping or other quotes in a string literal.
+QUOTES = "'\"\\"
 
 # casts = {
 #     "double": "float",
@@ -22,35 +27,92 @@ from .base import BaseTranslator
 
 
 class ScalarTranslator(BaseTranslator):
-    def translate_scalar(self, node: Node):
-        match node:
-            case Scalar_String(value=value):
-                return py.Str(value)
-
-            case Scalar_LNumber(value=value):
-                return py.Num(value)
-
-            case Scalar_DNumber(value=value):
-                return py.Num(value)
-
-            case Scalar_Encapsed():
-                return self.translate_encapsed(node)
-
-            case _:
-                debug(node)
-                raise NotImplementedError()
-
-    def translate_encapsed(self, node: Node):
-        parts = node.parts
-        result = []
-        for part in parts:
-            match part:
-                case Scalar_EncapsedStringPart(value=value):
-                    result.append(value)
-                case Expr_Variable(name=name):
-                    result.append(f"{name}")
-                case _:
-                    debug(part)
-                    raise NotImplementedError()
-
-        return py.Str("".join(result))
+    @handles(Scalar_String)
+    def translate_string(self, node: Scalar_String):
+        return py.Str(node.value)
+
+    @handles(Scalar_LNumber, Scalar_DNumber)
+    def translate_number(self, node: Scalar_LNumber | Scalar_DNumber):
+        return py.Num(node.value)
+
+    @handles(Scalar_Encapsed)
+    def translate_encapsed(self, node: Scalar_Encapsed):
+        return self.make_string(node.parts, node)
+
+    def make_string(self, pieces: list[Node], node: Node):
+        """Return the concatenation of `pieces`, converted to strings.
+
+        Literals are merged into the text of a single f-string, and the other
+        pieces are formatted into it, so that a whole `.` chain or
+        interpolated string builds one string, instead of one per operand.
+        Expressions that can't be written in an f-string (e.g. strings with
+        backslashes, before Python 3.12) make it a `"".join([...])` instead.
+        """
+        parts = []
+        text = []
+        for piece in pieces:
+            value = literal_string(piece)
+            if value is not None:
+                text.append(value)
+                continue
+            if text:
+                parts.append(py.Constant("".join(text)))
+                text = []
+            parts.append(py.FormattedValue(self.translate(piece), -1, None))
+        if text:
+            parts.append(py.Constant("".join(text)))
+
+        if not parts:
+            return py.Constant("", **pos(node))
+        if len(parts) == 1 and isinstance(parts[0], py.Constant):
+            return py.Constant(parts[0].value, **pos(node))
+        if all(
+            isinstance(part, py.Constant) or fits_in_fstring(part.value)
+            for part in parts
+        ):
+            return py.JoinedStr(parts, **pos(node))
+
+        items = [
+            (
+                part
+                if isinstance(part, py.Constant)
+                else py.Call(py.Name("str", py.Load()), [part.value], [])
+            )
+            for part in parts
+        ]
+        join = py.Attribute(py.Constant(""), "join", py.Load())
+        return py.Call(join, [py.List(items, py.Load())], [], **pos(node))
+
+
+def literal_string(node: Node) -> str | None:
+    """Return the string a PHP literal converts to (`None` if not a literal)."""
+    match node:
+        case Scalar_String(value=value) | Scalar_EncapsedStringPart(value=value):
+            return value
+        case Scalar_LNumber(value=value):
+            return str(value)
+        case Scalar_DNumber(value=value) if float(value).is_integer():
+            # PHP writes integral floats without the ".0", up to 14 digits
+            # (`precision`): 1e14 is "1.0E+14".
+            if abs(value) < 1e14:
+                return str(int(value))
+        case Expr_ConstFetch():
+            return CONSTANT_STRINGS.get(node.name.get_parts()[0].lower())
+    return None
+
+
+def fits_in_fstring(expr: py.expr) -> bool:
+    """Tell if `expr` can be unparsed in an f-string on any Python version.
+
+    Before 3.12, the expressions of an f-string can't contain backslashes,
+    nor the quotes of the f-string itself, so string literals are only
+    allowed when they need neither, and nested f-strings not at all.
+    """
+    for child in py.walk(expr):
+        match child:
+            case py.JoinedStr() | py.Constant(value=bytes()):
+                return False
+            case py.Constant(value=str() as value):
+                if not value.isprintable() or any(c in value for c in QUOTES):
+                    return False
+    return True
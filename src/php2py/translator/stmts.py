@@ -3,13 +3,22 @@ import ast as py
 
 from devtools import debug
 
+from php2py.ast_utils import walk
 from php2py.php_ast import (
+    Expr,
+    Expr_PostDec,
+    Expr_PostInc,
+    Expr_PreDec,
+    Expr_PreInc,
+    Expr_Variable,
     Expr_Yield,
     Name,
+    Node,
     Stmt_Break,
     Stmt_Class,
     Stmt_ClassConst,
     Stmt_ClassMethod,
+    Stmt_Const,
     Stmt_Continue,
     Stmt_Do,
     Stmt_Echo,
@@ -35,8 +44,23 @@ from php2py.php_ast import (
 )
 from php2py.py_ast import py_parse_stmt
 
+from .accumulators import string_builders
+from .base import handles
 from .exprs import ExprTranslator
-from .utils import pos, to_stmt
+from .loops import (
+    LENGTH_FUNCTIONS,
+    ContinueWithUpdate,
+    RangeLoop,
+    ReplaceExprs,
+    hoistable_lengths,
+    int_literal,
+    range_loop,
+    shared_variables,
+    used_names,
+)
+from .utils import pos, store, to_stmt
+
+INC_DEC = (Expr_PreInc, Expr_PostInc, Expr_PreDec, Expr_PostDec)
 
 # casts = {
 #     "double": "float",
@@ -47,509 +71,664 @@ from .utils import pos, to_stmt
 
 class StmtTranslator(ExprTranslator):
     in_class: bool = False
-
-    def translate_stmt(self, node):
-        match node:
-            case Stmt_Nop():
-                return py.Pass(**pos(node))
-
-            case Stmt_Echo(exprs):
-                return py.Expr(
-                    value=py.Call(
-                        func=py.Name("print", py.Load()),
-                        args=[self.translate(n) for n in exprs],
-                        keywords=[],
-                        **pos(node),
-                    )
-                )
-
-            case Stmt_Expression(expr):
-                return py.Expr(value=self.translate(expr), **pos(node))
-
-            case Stmt_Namespace(stmts, name):
-                return self.translate(stmts)
-
-            case Stmt_Use(uses, type):
-                return self.translate(uses)
-
-            case Stmt_UseUse(name, alias, type):
-                parts = name.get_parts()
-                module_name = ".".join(parts)
-                if alias:
-                    alias_name = alias.name
-                    return py_parse_stmt(f"import {module_name} as {alias_name}")
-                else:
-                    return py_parse_stmt(f"from {module_name} import *")
-
-            case Stmt_InlineHTML(value):
-                args = [py.Str(value)]
-                return py.Call(
-                    func=py.Name("inline_html", py.Load()),
-                    args=args,
-                    keywords=[],
-                    **pos(node),
-                )
-
-            case Stmt_Unset(vars):
-                return py.Delete([self.translate(n) for n in vars], **pos(node))
-
-            #
-            # Control flow
-            #
-            case Stmt_If(cond, stmts, elseifs, else_):
-                if else_:
-                    orelse = [
-                        to_stmt(self.translate(stmt)) for stmt in node.else_.stmts
-                    ]
-                else:
-                    orelse = []
-
-                for elseif in reversed(elseifs):
-                    orelse = [
-                        py.If(
-                            test=self.translate(elseif.cond),
-                            body=[
-                                to_stmt(self.translate(stmt)) for stmt in elseif.stmts
-                            ],
-                            orelse=orelse,
-                        )
-                    ]
-
-                return py.If(
-                    test=self.translate(cond),
-                    body=[to_stmt(self.translate(stmt)) for stmt in stmts],
-                    orelse=orelse,
-                    **pos(node),
-                )
-
-            case Stmt_For(init, loop, cond, stmts):
-                assert (
-                    cond is None or len(cond) == 1
-                ), "only a single test is supported in for-loops"
-
-                test = self.translate(cond[0])
-                body = [
-                    to_stmt(n) for n in self.translate(stmts) + [self.translate(loop)]
-                ]
-                return self.translate(init) + [
-                    py.While(
-                        test=test,
-                        body=body,
-                        orelse=[],
-                    ),
-                ]
-
-                # return from_phpast(
-                #     php.Block(
-                #         (node.start or [])
-                #         + [
-                #             php.While(
-                #                 node.test[0] if node.test else 1,
-                #                 php.Block(
-                #                     deblock(node.node) + (node.count or []),
-                #                     lineno=node.lineno,
-                #                 ),
-                #                 lineno=node.lineno,
-                #             )
-                #         ],
-                #         lineno=node.lineno,
-                #     )
-                # )
-
-            case Stmt_Foreach(expr, value_var, stmts, by_ref, key_var):
-                if key_var is None:
-                    target = py.Name(value_var.name, py.Store())
-                else:
-                    target = py.Tuple(
-                        [
-                            py.Name(key_var.name[1:], py.Store()),
-                            py.Name(value_var.name[1:], py.Store()),
-                        ],
-                        py.Store(),
-                    )
-
-                return py.For(
-                    target,
-                    self.translate(expr),
-                    [to_stmt(self.translate(stmt)) for stmt in stmts],
-                    [],
-                    **pos(node),
-                )
-
-            case Stmt_While(cond, stmts):
-                return py.While(
-                    self.translate(cond),
-                    [to_stmt(self.translate(stmt)) for stmt in stmts],
-                    [],
-                    **pos(node),
-                )
-
-            case Stmt_Break(num):
-                assert num is None, "level on break not supported"
-                return py.Break(**pos(node))
-
-            case Stmt_Continue(num):
-                assert num is None, "level on continue not supported"
-                return py.Continue(**pos(node))
-
-            # case Stmt_DoWhile():
-            #     condition = php.If(
-            #         php.UnaryOp("!", node.expr, lineno=node.lineno),
-            #         php.Break(None, lineno=node.lineno),
-            #         [],
-            #         None,
-            #         lineno=node.lineno,
-            #     )
-            #     return from_phpast(
-            #         php.While(
-            #             1,
-            #             php.Block(deblock(node.node) + [condition], lineno=node.lineno),
-            #             lineno=node.lineno,
-            #         )
-            #     )
-
-            #
-            # Class definitions
-            #
-            case Stmt_Class(name, implements, extends, stmts):
-                self.in_class = True
-                name = name.name
-
-                if extends is None:
-                    extends = []
-                if isinstance(extends, Name):
-                    extends = [extends]
-                bases = []
-                for base_class in extends:
-                    base_class_name = base_class.get_parts()[0]
-                    bases.append(py.Name(base_class_name, py.Load()))
-                for interface in implements:
-                    interface_name = interface.get_parts()[0]
-                    bases.append(py.Name(interface_name, py.Load()))
-
-                body = [to_stmt(self.translate(stmt)) for stmt in stmts]
-                for stmt in body:
-                    if isinstance(stmt, py.FunctionDef) and stmt.name in (
-                        name,
-                        "__construct",
-                    ):
-                        stmt.name = "__init__"
-                if not body:
-                    body = [py.Pass()]
-
-                self.in_class = False
-                return py.ClassDef(
-                    name=name,
-                    bases=bases,
-                    keywords=[],
-                    body=body,
-                    decorator_list=[],
-                    **pos(node),
-                )
-
-            case Stmt_Interface(name=name, stmts=stmts, extends=extends):
-                # Example node: (
-                #     Stmt_Interface(attrGroups=[], extends=[], namespacedName=None, stmts=[],
-                #     name=Identifier(name='CredentialsInterface'))
-                # )
-                # debug(node)
-                self.in_class = True
-
-                name = name.name
-                if extends is None:
-                    extends = []
-                if isinstance(extends, Name):
-                    extends = [extends]
-                bases = []
-                for base_class in extends:
-                    base_class_name = base_class.get_parts()[0]
-                    bases.append(py.Name(base_class_name, py.Load()))
-
-                body = [to_stmt(self.translate_stmt(stmt)) for stmt in stmts]
-                for stmt in body:
-                    if isinstance(stmt, py.FunctionDef) and stmt.name in (
-                        name,
-                        "__construct",
-                    ):
-                        stmt.name = "__init__"
-                if not body:
-                    body = [py.Pass()]
-
-                self.in_class = False
-                return py.ClassDef(
-                    name=name,
-                    bases=bases,
-                    keywords=[],
-                    body=body,
-                    decorator_list=[],
-                    **pos(node),
-                )
-
-            case Stmt_ClassConst():
-                # TODO
-                return py.Pass(**pos(node))
-
-            #
-            # Functions / methods
-            #
-            case Stmt_Function(name=name, params=params, stmts=stmts):
-                args = []
-                defaults = []
-
-                if self.in_class:
-                    args.append(py.Name("self", py.Param(**pos(node)), **pos(node)))
-                for param in params:
-                    param_name = param.var.name
-                    args.append(py.Name(param_name, py.Param(), **pos(node)))
-                    if param.default is not None:
-                        defaults.append(self.translate(param.default))
-
-                body = [to_stmt(self.translate(stmt)) for stmt in stmts]
-                if not body:
-                    body = [py.Pass(**pos(node))]
-
-                arguments = py.arguments(
-                    posonlyargs=[],
-                    args=args,
-                    vararg=None,
-                    kwonlyargs=[],
-                    kw_defaults=[],
-                    kwarg=None,
-                    defaults=defaults,
-                    **pos(node),
-                )
-                return py.FunctionDef(name.name, arguments, body, [], **pos(node))
-
-            case Stmt_Return(expr):
-                if expr is None:
-                    return py.Return(
-                        None,
-                        **pos(node),
-                    )
-                else:
-                    return py.Return(
-                        self.translate(expr),
-                        **pos(node),
-                    )
-
-            case Expr_Yield(key=key, value=value):
-                # TODO: what do we do with 'key' ?
-                if value is None:
-                    return py.Yield(
-                        None,
-                        **pos(node),
-                    )
-                else:
-                    return py.Yield(
-                        self.translate(value),
-                        **pos(node),
-                    )
-
-            case Stmt_ClassMethod(name=name, params=params, stmts=stmts):
-                args = []
-                defaults = []
-                decorator_list = []
-                stmts = stmts or []
-
-                if self.in_class:
-                    args.append(py.Name("self", py.Param()))
-                for param in params:
-                    param_name = param.var.name
-                    args.append(py.Name(param_name, py.Param()))
-                    if param.default is not None:
-                        defaults.append(self.translate(param.default))
-
-                # if "static" in node.modifiers:
-                #     decorator_list.append(
-                #         py.Name("classmethod", py.Load(**pos(node)), **pos(node))
-                #     )
-                #     args.append(py.Name("cls", py.Param(**pos(node)), **pos(node)))
-                # else:
-                #     args.append(py.Name("self", py.Param(**pos(node)), **pos(node)))
-
-                # for param in node["args"]:
-                #     args.append(py.Name(param.name[1:], py.Param(**pos(node)), **pos(node)))
-                #     if param.default is not None:
-                #         defaults.append(self.translate(param.default))
-
-                body = [to_stmt(self.translate(stmt)) for stmt in stmts]
-                if not body:
-                    body = [py.Pass()]
-
-                arguments = py.arguments(
-                    posonlyargs=[],
-                    args=args,
-                    vararg=None,
-                    kwonlyargs=[],
-                    kw_defaults=[],
-                    kwarg=None,
-                    defaults=defaults,
-                    **pos(node),
-                )
-
-                return py.FunctionDef(
-                    name.name, arguments, body, decorator_list, **pos(node)
-                )
-
-            case Stmt_Switch():
-                # TODO: switch
-                return ast.Pass(
-                    **pos(node),
-                )
-
-            # case Stmt_Method():
-            #     args = []
-            #     defaults = []
-            #     decorator_list = []
-            #     if "static" in node.modifiers:
-            #         decorator_list.append(
-            #             py.Name("classmethod", py.Load(**pos(node)), **pos(node))
-            #         )
-            #         args.append(py.Name("cls", py.Param(**pos(node)), **pos(node)))
-            #     else:
-            #         args.append(py.Name("self", py.Param(**pos(node)), **pos(node)))
-            #     for param in node.params:
-            #         args.append(py.Name(param.name[1:], py.Param(**pos(node)), **pos(node)))
-            #         if param.default is not None:
-            #             defaults.append(from_phpast(param.default))
-            #     body = list(map(to_stmt, list(map(from_phpast, node.nodes))))
-            #     if not body:
-            #         body = [py.Pass(**pos(node))]
-            #     return py.FunctionDef(
-            #         node.name,
-            #         py.arguments(args, None, None, defaults),
-            #         body,
-            #         decorator_list,
-            #         **pos(node),
-            #     )
-
-            # if isinstance(node, php.Assignment):
-            #     if isinstance(node.node, php.ArrayOffset) and node.node.expr is None:
-            #         return py.Call(
-            #             py.Attribute(
-            #                 self.translate(node.node.node),
-            #                 "append",
-            #                 py.Load(**pos(node)),
-            #                 **pos(node),
-            #             ),
-            #             [self.translate(node.expr)],
-            #             [],
-            #             None,
-            #             None,
-            #             **pos(node),
-            #         )
-            #     if isinstance(node.node, php.ObjectProperty) and isinstance(
-            #         node.node.name, php.BinaryOp
-            #     ):
-            #         return to_stmt(
-            #             py.Call(
-            #                 py.Name("setattr", py.Load(**pos(node)), **pos(node)),
-            #                 [
-            #                     self.translate(node.node.node),
-            #                     self.translate(node.node.name),
-            #                     self.translate(node.expr),
-            #                 ],
-            #                 [],
-            #                 None,
-            #                 None,
-            #                 **pos(node),
-            #             )
-            #         )
-            #     return py.Assign(
-            #         [store(self.translate(node.node))], self.translate(node.expr), **pos(node)
-            #     )
-
-            #     if isinstance(node, (php.ClassConstants, php.ClassVariables)):
-            # case Stmt_ClassConst(consts=consts):
-            #     body = []
-            #     for const in consts:
-            #         pass
-            #
-            #     msg = "only one class-level assignment supported per line"
-            #     assert len(node.nodes) == 1, msg
-            #
-            #     if isinstance(node.nodes[0], php.ClassConstant):
-            #         name = php.Constant(node.nodes[0].name, lineno=node.lineno)
-            #     else:
-            #         name = php.Variable(node.nodes[0].name, lineno=node.lineno)
-            #     initial = node.nodes[0].initial
-            #     if initial is None:
-            #         initial = php.Constant("None", lineno=node.lineno)
-            #
-            #     return py.Assign(
-            #         [store(self.translate(name))], self.translate(initial), **pos(node)
-            #     )
-
-            case Stmt_Property(props=props):
-                # TODO
-                return py.Pass()
-                # # if isinstance(node.name, (php.Variable, php.BinaryOp)):
-                # #     return py.Call(
-                # #         func=py.Name("getattr", py.Load(**pos(node)), **pos(node)),
-                # #         args=[self.translate(node.node), self.translate(node.name)],
-                # #         keywords=[],
-                # #         **pos(node),
-                # #     )
-                #
-                # assert len(props) == 1
-                # prop = props[0]
-                # return py.Attribute(
-                #     self.translate(node.node),
-                #     node.name,
-                #     py.Load(),
-                #     **pos(node),
-                # )
-
-            #
-            # Exceptions
-            #
-            case Stmt_TryCatch(stmts, catches, finally_):
-                # handlers = [
-                #     py.ExceptHandler(
-                #         py.Name(catch.class_, py.Load(**pos(node)), **pos(node)),
-                #         store(self.translate(catches.var)),
-                #         [to_stmt(self.translate(node)) for node in catches],
-                #     )
-                #     for catch in node.catches
-                # ]
-                handlers = [
-                    py.ExceptHandler(
-                        py.Name("Exception", py.Load()),
-                        None,
-                        [py.Pass()],
-                        **pos(node),
-                    )
-                ]
-
-                return py.Try(
-                    body=[to_stmt(self.translate(node)) for node in stmts],
-                    handlers=handlers,
-                    orelse=[],
-                    finalbody=[],
-                    **pos(node),
-                )
-
-            case Stmt_Throw(expr):
-                return py.Raise(exc=self.translate(expr), cause=None, **pos(node))
-
-            case Stmt_Static():
-                debug(node)
-                raise NotImplementedError(
-                    f"Don't know how to translate node {node.__class__}"
-                )
-
-            case Stmt_Do(cond, stmts):
-                body = [to_stmt(self.translate(node)) for node in stmts]
-                inverted_cond = py.UnaryOp(py.Not(), self.translate(cond))
-                body += [py.If(inverted_cond, to_stmt(py.Break()), [])]
-                return py.While(
-                    test=py.Name("True", py.Load()),
-                    body=body,
-                    orelse=[],
-                )
-
+    # Number of `try` blocks around the statement being translated.
+    try_depth: int = 0
+    # The function or method being translated (`None` at the top level).
+    scope: Stmt_Function | Stmt_ClassMethod | None = None
+
+    def translate_stmts(self, stmts: list) -> list[py.stmt]:
+        """Translate a block, with the statements translated to several ones
+        (e.g. lowered loops) spliced in."""
+        body = []
+        for stmt in stmts:
+            translated = self.translate(stmt)
+            if isinstance(translated, list):
+                body += [to_stmt(item) for item in translated]
+            else:
+                body.append(to_stmt(translated))
+        return body
+
+    @handles(Stmt_Nop)
+    def translate_nop(self, node: Stmt_Nop):
+        return py.Pass(**pos(node))
+
+    @handles(Stmt_Echo)
+    def translate_echo(self, node: Stmt_Echo):
+        return py.Expr(
+            value=py.Call(
+                func=py.Name("print", py.Load()),
+                args=[self.translate(n) for n in node.exprs],
+                keywords=[],
+                **pos(node),
+            )
+        )
+
+    @handles(Stmt_Expression)
+    def translate_expression(self, node: Stmt_Expression):
+        if isinstance(node.expr, INC_DEC):
+            return self.translate_effect(node.expr)
+        return py.Expr(value=self.translate(node.expr), **pos(node))
+
+    def translate_effect(self, expr: Node) -> py.stmt:
+        """Translate an expression whose value is unused (e.g. `$i++;`)."""
+        match expr:
+            case Expr_PreInc(var=var) | Expr_PostInc(var=var):
+                op = py.Add()
+            case Expr_PreDec(var=var) | Expr_PostDec(var=var):
+                op = py.Sub()
             case _:
-                debug(node)
-                raise NotImplementedError(
-                    f"Don't know how to translate node {node.__class__}"
+                return to_stmt(self.translate(expr))
+        return py.AugAssign(store(self.translate(var)), op, py.Constant(1), **pos(expr))
+
+    @handles(Stmt_Namespace)
+    def translate_namespace(self, node: Stmt_Namespace):
+        return self.translate(node.stmts)
+
+    @handles(Stmt_Use)
+    def translate_use(self, node: Stmt_Use):
+        return self.translate(node.uses)
+
+    @handles(Stmt_UseUse)
+    def translate_use_use(self, node: Stmt_UseUse):
+        parts = node.name.get_parts()
+        module_name = ".".join(parts)
+        if node.alias:
+            alias_name = node.alias.name
+            return py_parse_stmt(f"import {module_name} as {alias_name}")
+        else:
+            return py_parse_stmt(f"from {module_name} import *")
+
+    @handles(Stmt_InlineHTML)
+    def translate_inline_html(self, node: Stmt_InlineHTML):
+        args = [py.Str(node.value)]
+        return py.Call(
+            func=py.Name("inline_html", py.Load()),
+            args=args,
+            keywords=[],
+            **pos(node),
+        )
+
+    @handles(Stmt_Const)
+    def translate_const(self, node: Stmt_Const):
+        return [
+            py.Assign(
+                [py.Name(const.name.name, py.Store())],
+                self.translate(const.value),
+                **pos(node),
+            )
+            for const in node.consts
+        ]
+
+    @handles(Stmt_Unset)
+    def translate_unset(self, node: Stmt_Unset):
+        return py.Delete([self.translate(n) for n in node.vars], **pos(node))
+
+    #
+    # Control flow
+    #
+    @handles(Stmt_If)
+    def translate_if(self, node: Stmt_If):
+        if node.else_:
+            orelse = self.translate_stmts(node.else_.stmts)
+        else:
+            orelse = []
+
+        for elseif in reversed(node.elseifs):
+            orelse = [
+                py.If(
+                    test=self.translate(elseif.cond),
+                    body=self.translate_stmts(elseif.stmts),
+                    orelse=orelse,
                 )
+            ]
+
+        return py.If(
+            test=self.translate(node.cond),
+            body=self.translate_stmts(node.stmts),
+            orelse=orelse,
+            **pos(node),
+        )
+
+    @handles(Stmt_For)
+    @string_builders
+    def translate_for(self, node: Stmt_For):
+        shape = range_loop(node, self.shared_variables())
+        if shape is not None and self.is_local_to_loop(shape.var, node):
+            return self.make_range_loop(node, shape)
+
+        cond = node.cond
+        assert len(cond) <= 1, "only a single test is supported in for-loops"
+        if cond:
+            lengths, test = self.hoist_lengths(
+                cond[0], [node.cond, node.loop, node.stmts]
+            )
+        else:
+            lengths, test = [], py.Constant(True)
+
+        # `continue` runs the update expressions too.
+        update = [self.translate_effect(expr) for expr in node.loop]
+        body = py.Module(self.translate_stmts(node.stmts), [])
+        body = ContinueWithUpdate(update).visit(body).body
+        # Unreachable after these.
+        if not body or not isinstance(
+            body[-1], (py.Continue, py.Break, py.Return, py.Raise)
+        ):
+            body += update
+        loop = py.While(
+            test=test,
+            body=body or [py.Pass()],
+            orelse=[],
+            **pos(node),
+        )
+        return [self.translate_effect(expr) for expr in node.init] + lengths + [loop]
+
+    def make_range_loop(self, node: Stmt_For, shape: RangeLoop):
+        start = int_literal(shape.start)
+        stop = int_literal(shape.stop)
+        direction = 1 if shape.step > 0 else -1
+        if not shape.inclusive:
+            stop_expr = self.translate(shape.stop)
+        elif stop is not None:
+            stop_expr = py.Constant(stop + direction)
+        else:
+            op = py.Add() if direction > 0 else py.Sub()
+            stop_expr = py.BinOp(self.translate(shape.stop), op, py.Constant(1))
+
+        if start == 0 and shape.step == 1:
+            args = [stop_expr]
+        elif shape.step == 1:
+            args = [self.translate(shape.start), stop_expr]
+        else:
+            args = [self.translate(shape.start), stop_expr, py.Constant(shape.step)]
+
+        return py.For(
+            py.Name(shape.var, py.Store()),
+            py.Call(py.Name("range", py.Load()), args, []),
+            self.translate_stmts(node.stmts) or [py.Pass()],
+            [],
+            **pos(node),
+        )
+
+    def is_local_to_loop(self, var: str, loop: Stmt_For) -> bool:
+        """Tell if `var` is only used in `loop`, in the current function."""
+        if self.scope is None:
+            return False
+
+        def count_uses(nodes) -> int:
+            return sum(
+                1
+                for node in walk(nodes)
+                if isinstance(node, Expr_Variable) and node.name == var
+            )
+
+        return count_uses([self.scope.params, self.scope.stmts]) == count_uses(loop)
+
+    def names_in_scope(self) -> set[str]:
+        """Return the names used in the function being translated."""
+        return used_names([self.scope.params, self.scope.stmts])
+
+    def shared_variables(self) -> set[str]:
+        if self.scope is None:
+            return set()
+        return shared_variables(self.scope)
+
+    def hoist_lengths(self, cond: Expr, loop: list) -> tuple[list[py.stmt], py.expr]:
+        """Translate the condition of a loop, with the lengths computed
+        once before the loop when possible (e.g. `$i < count($a)`).
+
+        Return the assignments of the lengths, and the condition. Lengths
+        are only hoisted in functions (`$a` could be modified by any call at
+        the top level).
+        """
+        test = self.translate(cond)
+        if self.scope is None:
+            return [], test
+        lengths = hoistable_lengths(cond, loop, self.shared_variables())
+        if not lengths:
+            return [], test
+
+        used = self.names_in_scope()
+        assignments = []
+        names = {}
+        for call, var in lengths:
+            value = self.translate(call)
+            if py.dump(value) in names:
+                continue
+            suffix = LENGTH_FUNCTIONS[call.name.parts[0].lower()]
+            name = f"{var}_{suffix}"
+            i = 1
+            while name in used:
+                name = f"{var}_{suffix}{i}"
+                i += 1
+            used.add(name)
+            names[py.dump(value)] = name
+            assignments.append(
+                py.Assign([py.Name(name, py.Store())], value, **pos(call))
+            )
+        return assignments, ReplaceExprs(names).visit(test)
+
+    @handles(Stmt_Foreach)
+    @string_builders
+    def translate_foreach(self, node: Stmt_Foreach):
+        value_var, key_var = node.valueVar, node.keyVar
+        if key_var is None:
+            target = py.Name(value_var.name, py.Store())
+        else:
+            target = py.Tuple(
+                [
+                    py.Name(key_var.name[1:], py.Store()),
+                    py.Name(value_var.name[1:], py.Store()),
+                ],
+                py.Store(),
+            )
+
+        return py.For(
+            target,
+            self.translate(node.expr),
+            self.translate_stmts(node.stmts),
+            [],
+            **pos(node),
+        )
+
+    @handles(Stmt_While)
+    @string_builders
+    def translate_while(self, node: Stmt_While):
+        lengths, test = self.hoist_lengths(node.cond, [node.cond, node.stmts])
+        loop = py.While(
+            test,
+            self.translate_stmts(node.stmts),
+            [],
+            **pos(node),
+        )
+        return lengths + [loop] if lengths else loop
+
+    @handles(Stmt_Break)
+    def translate_break(self, node: Stmt_Break):
+        assert node.num is None, "level on break not supported"
+        return py.Break(**pos(node))
+
+    @handles(Stmt_Continue)
+    def translate_continue(self, node: Stmt_Continue):
+        assert node.num is None, "level on continue not supported"
+        return py.Continue(**pos(node))
+
+    # case Stmt_DoWhile():
+    #     condition = php.If(
+    #         php.UnaryOp("!", node.expr, lineno=node.lineno),
+    #         php.Break(None, lineno=node.lineno),
+    #         [],
+    #         None,
+    #         lineno=node.lineno,
+    #     )
+    #     return from_phpast(
+    #         php.While(
+    #             1,
+    #             php.Block(deblock(node.node) + [condition], lineno=node.lineno),
+    #             lineno=node.lineno,
+    #         )
+    #     )
+
+    @handles(Stmt_Do)
+    @string_builders
+    def translate_do(self, node: Stmt_Do):
+        body = self.translate_stmts(node.stmts)
+        inverted_cond = py.UnaryOp(py.Not(), self.translate(node.cond))
+        body += [py.If(inverted_cond, to_stmt(py.Break()), [])]
+        return py.While(
+            test=py.Name("True", py.Load()),
+            body=body,
+            orelse=[],
+        )
+
+    #
+    # Class definitions
+    #
+    @handles(Stmt_Class)
+    def translate_class(self, node: Stmt_Class):
+        self.in_class = True
+        name = node.name.name
+
+        extends = node.extends
+        if extends is None:
+            extends = []
+        if isinstance(extends, Name):
+            extends = [extends]
+        bases = []
+        for base_class in extends:
+            base_class_name = base_class.get_parts()[0]
+            bases.append(py.Name(base_class_name, py.Load()))
+        for interface in node.implements:
+            interface_name = interface.get_parts()[0]
+            bases.append(py.Name(interface_name, py.Load()))
+
+        body = self.translate_stmts(node.stmts)
+        for stmt in body:
+            if isinstance(stmt, py.FunctionDef) and stmt.name in (
+                name,
+                "__construct",
+            ):
+                stmt.name = "__init__"
+        if not body:
+            body = [py.Pass()]
+
+        self.in_class = False
+        return py.ClassDef(
+            name=name,
+            bases=bases,
+            keywords=[],
+            body=body,
+            decorator_list=[],
+            **pos(node),
+        )
+
+    @handles(Stmt_Interface)
+    def translate_interface(self, node: Stmt_Interface):
+        # Example node: (
+        #     Stmt_Interface(attrGroups=[], extends=[], namespacedName=None, stmts=[],
+        #     name=Identifier(name='CredentialsInterface'))
+        # )
+        # debug(node)
+        self.in_class = True
+
+        name = node.name.name
+        extends = node.extends
+        if extends is None:
+            extends = []
+        if isinstance(extends, Name):
+            extends = [extends]
+        bases = []
+        for base_class in extends:
+            base_class_name = base_class.get_parts()[0]
+            bases.append(py.Name(base_class_name, py.Load()))
+
+        body = self.translate_stmts(node.stmts)
+        for stmt in body:
+            if isinstance(stmt, py.FunctionDef) and stmt.name in (
+                name,
+                "__construct",
+            ):
+                stmt.name = "__init__"
+        if not body:
+            body = [py.Pass()]
+
+        self.in_class = False
+        return py.ClassDef(
+            name=name,
+            bases=bases,
+            keywords=[],
+            body=body,
+            decorator_list=[],
+            **pos(node),
+        )
+
+    @handles(Stmt_ClassConst)
+    def translate_class_const(self, node: Stmt_ClassConst):
+        # TODO
+        return py.Pass(**pos(node))
+
+    #
+    # Functions / methods
+    #
+    @handles(Stmt_Function)
+    def translate_function(self, node: Stmt_Function):
+        args = []
+        defaults = []
+
+        if self.in_class:
+            args.append(py.Name("self", py.Param(**pos(node)), **pos(node)))
+        for param in node.params:
+            param_name = param.var.name
+            args.append(py.Name(param_name, py.Param(), **pos(node)))
+            if param.default is not None:
+                defaults.append(self.translate(param.default))
+
+        body = self.translate_function_body(node)
+        if not body:
+            body = [py.Pass(**pos(node))]
+
+        arguments = py.arguments(
+            posonlyargs=[],
+            args=args,
+            vararg=None,
+            kwonlyargs=[],
+            kw_defaults=[],
+            kwarg=None,
+            defaults=defaults,
+            **pos(node),
+        )
+        return py.FunctionDef(node.name.name, arguments, body, [], **pos(node))
+
+    def translate_function_body(self, node: Stmt_Function | Stmt_ClassMethod):
+        outer_scope = self.scope
+        self.scope = node
+        try:
+            return self.translate_stmts(node.stmts or [])
+        finally:
+            self.scope = outer_scope
+
+    @handles(Stmt_Return)
+    def translate_return(self, node: Stmt_Return):
+        if node.expr is None:
+            return py.Return(
+                None,
+                **pos(node),
+            )
+        else:
+            return py.Return(
+                self.translate(node.expr),
+                **pos(node),
+            )
+
+    @handles(Expr_Yield)
+    def translate_yield(self, node: Expr_Yield):
+        # TODO: what do we do with 'key' ?
+        if node.value is None:
+            return py.Yield(
+                None,
+                **pos(node),
+            )
+        else:
+            return py.Yield(
+                self.translate(node.value),
+                **pos(node),
+            )
+
+    @handles(Stmt_ClassMethod)
+    def translate_class_method(self, node: Stmt_ClassMethod):
+        args = []
+        defaults = []
+        decorator_list = []
+        if self.in_class:
+            args.append(py.Name("self", py.Param()))
+        for param in node.params:
+            param_name = param.var.name
+            args.append(py.Name(param_name, py.Param()))
+            if param.default is not None:
+                defaults.append(self.translate(param.default))
+
+        # if "static" in node.modifiers:
+        #     decorator_list.append(
+        #         py.Name("classmethod", py.Load(**pos(node)), **pos(node))
+        #     )
+        #     args.append(py.Name("cls", py.Param(**pos(node)), **pos(node)))
+        # else:
+        #     args.append(py.Name("self", py.Param(**pos(node)), **pos(node)))
+
+        # for param in node["args"]:
+        #     args.append(py.Name(param.name[1:], py.Param(**pos(node)), **pos(node)))
+        #     if param.default is not None:
+        #         defaults.append(self.translate(param.default))
+
+        body = self.translate_function_body(node)
+        if not body:
+            body = [py.Pass()]
+
+        arguments = py.arguments(
+            posonlyargs=[],
+            args=args,
+            vararg=None,
+            kwonlyargs=[],
+            kw_defaults=[],
+            kwarg=None,
+            defaults=defaults,
+            **pos(node),
+        )
+
+        return py.FunctionDef(
+            node.name.name, arguments, body, decorator_list, **pos(node)
+        )
+
+    @handles(Stmt_Switch)
+    def translate_switch(self, node: Stmt_Switch):
+        # TODO: switch
+        return ast.Pass(
+            **pos(node),
+        )
+
+    # case Stmt_Method():
+    #     args = []
+    #     defaults = []
+    #     decorator_list = []
+    #     if "static" in node.modifiers:
+    #         decorator_list.append(
+    #             py.Name("classmethod", py.Load(**pos(node)), **pos(node))
+    #         )
+    #         args.append(py.Name("cls", py.Param(**pos(node)), **pos(node)))
+    #     else:
+    #         args.append(py.Name("self", py.Param(**pos(node)), **pos(node)))
+    #     for param in node.params:
+    #         args.append(py.Name(param.name[1:], py.Param(**pos(node)), **pos(node)))
+    #         if param.default is not None:
+    #             defaults.append(from_phpast(param.default))
+    #     body = list(map(to_stmt, list(map(from_phpast, node.nodes))))
+    #     if not body:
+    #         body = [py.Pass(**pos(node))]
+    #     return py.FunctionDef(
+    #         node.name,
+    #         py.arguments(args, None, None, defaults),
+    #         body,
+    #         decorator_list,
+    #         **pos(node),
+    #     )
+
+    # if isinstance(node, php.Assignment):
+    #     if isinstance(node.node, php.ArrayOffset) and node.node.expr is None:
+    #         return py.Call(
+    #             py.Attribute(
+    #                 self.translate(node.node.node),
+    #                 "append",
+    #                 py.Load(**pos(node)),
+    #                 **pos(node),
+    #             ),
+    #             [self.translate(node.expr)],
+    #             [],
+    #             None,
+    #             None,
+    #             **pos(node),
+    #         )
+    #     if isinstance(node.node, php.ObjectProperty) and isinstance(
+    #         node.node.name, php.BinaryOp
+    #     ):
+    #         return to_stmt(
+    #             py.Call(
+    #                 py.Name("setattr", py.Load(**pos(node)), **pos(node)),
+    #                 [
+    #                     self.translate(node.node.node),
+    #                     self.translate(node.node.name),
+    #                     self.translate(node.expr),
+    #                 ],
+    #                 [],
+    #                 None,
+    #                 None,
+    #                 **pos(node),
+    #             )
+    #         )
+    #     return py.Assign(
+    #         [store(self.translate(node.node))], self.translate(node.expr), **pos(node)
+    #     )
+
+    #     if isinstance(node, (php.ClassConstants, php.ClassVariables)):
+    # case Stmt_ClassConst(consts=consts):
+    #     body = []
+    #     for const in consts:
+    #         pass
+    #
+    #     msg = "only one class-level assignment supported per line"
+    #     assert len(node.nodes) == 1, msg
+    #
+    #     if isinstance(node.nodes[0], php.ClassConstant):
+    #         name = php.Constant(node.nodes[0].name, lineno=node.lineno)
+    #     else:
+    #         name = php.Variable(node.nodes[0].name, lineno=node.lineno)
+    #     initial = node.nodes[0].initial
+    #     if initial is None:
+    #         initial = php.Constant("None", lineno=node.lineno)
+    #
+    #     return py.Assign(
+    #         [store(self.translate(name))], self.translate(initial), **pos(node)
+    #     )
+
+    @handles(Stmt_Property)
+    def translate_property(self, node: Stmt_Property):
+        # TODO
+        return py.Pass()
+        # # if isinstance(node.name, (php.Variable, php.BinaryOp)):
+        # #     return py.Call(
+        # #         func=py.Name("getattr", py.Load(**pos(node)), **pos(node)),
+        # #         args=[self.translate(node.node), self.translate(node.name)],
+        # #         keywords=[],
+        # #         **pos(node),
+        # #     )
+        #
+        # assert len(props) == 1
+        # prop = props[0]
+        # return py.Attribute(
+        #     self.translate(node.node),
+        #     node.name,
+        #     py.Load(),
+        #     **pos(node),
+        # )
+
+    #
+    # Exceptions
+    #
+    @handles(Stmt_TryCatch)
+    def translate_try_catch(self, node: Stmt_TryCatch):
+        # handlers = [
+        #     py.ExceptHandler(
+        #         py.Name(catch.class_, py.Load(**pos(node)), **pos(node)),
+        #         store(self.translate(catches.var)),
+        #         [to_stmt(self.translate(node)) for node in catches],
+        #     )
+        #     for catch in node.catches
+        # ]
+        handlers = [
+            py.ExceptHandler(
+                py.Name("Exception", py.Load()),
+                None,
+                [py.Pass()],
+                **pos(node),
+            )
+        ]
+
+        self.try_depth += 1
+        try:
+            body = self.translate_stmts(node.stmts)
+        finally:
+            self.try_depth -= 1
+        return py.Try(
+            body=body,
+            handlers=handlers,
+            orelse=[],
+            finalbody=[],
+            **pos(node),
+        )
+
+    @handles(Stmt_Throw)
+    def translate_throw(self, node: Stmt_Throw):
+        return py.Raise(exc=self.translate(node.expr), cause=None, **pos(node))
+
+    @handles(Stmt_Static)
+    def translate_static(self, node: Stmt_Static):
+        debug(node)
+        raise NotImplementedError(f"Don't know how to translate node {node.__class__}")
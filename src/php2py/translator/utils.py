@@ -29,18 +29,3 @@ def store(name):
     assert name
     name.ctx = py.Store(**pos(name))
     return name
-
-
-# def build_format(left, right):
-#     if isinstance(left, str):
-#         pattern, pieces = left.replace("%", "%%"), []
-#     elif isinstance(left, php.BinaryOp) and left.op == ".":
-#         pattern, pieces = build_format(left.left, left.right)
-#     else:
-#         pattern, pieces = "%s", [left]
-#     if isinstance(right, str):
-#         pattern += right.replace("%", "%%")
-#     else:
-#         pattern += "%s"
-#         pieces.append(right)
-#     return pattern, pieces
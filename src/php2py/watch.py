@@ -0,0 +1,312 @@
+"""`php2py watch`: convert PHP files again as soon as they are saved.
+
+The parser (the PHP worker process, or the Python parser) and the translator
+stay loaded between changes, so a save costs one parse and one translation.
+Changes are detected with inotify on Linux, by polling elsewhere (or with
+`--poll`). Bursts of events, like an editor's write-rename-chmod sequence or
+a `git checkout`, are merged: a batch is converted once no new event came in
+for the debounce delay.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+import traceback
+from collections.abc import Iterable
+from pathlib import Path
+
+from cleez.colors import blue
+
+from .discovery import DEFAULT_INCLUDE, OutputLayout, discover, matches
+from .main import Conversion, emit, translate
+from .manifest import file_hash
+from .optimizer import DEFAULT_LEVEL, Optimizer
+from .parser import (
+    DEFAULT_PARSER,
+    get_parse_cache,
+    get_worker,
+    install_parser,
+    parse,
+)
+from .translation_cache import get_translation_cache
+
+# Quiet time after the last event before a batch is converted (seconds).
+DEFAULT_DEBOUNCE = 0.1
+
+# Interval between two scans of the tree, when polling (seconds).
+POLL_INTERVAL = 0.5
+
+
+class PollingWatcher:
+    """Detect changes by comparing the mtime and size of files between scans."""
+
+    def __init__(self, roots: Iterable[str | Path], include, exclude):
+        self.roots = list(roots)
+        self.include = include
+        self.exclude = exclude
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for path in discover(self.roots, self.include, self.exclude):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[Path(path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        """Return the files changed within `timeout` seconds (`None`: any time)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = POLL_INTERVAL
+            if deadline is not None:
+                delay = min(delay, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+
+            snapshot = self.scan()
+            changed = {
+                path
+                for path, state in snapshot.items()
+                if self.snapshot.get(path) != state
+            }
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+# From <sys/inotify.h>.
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Detect changes with Linux's inotify (one watch per directory)."""
+
+    def __init__(self, roots: Iterable[str | Path], include, exclude):
+        self.roots = [Path(root) for root in roots]
+        self.include = include
+        self.exclude = exclude
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        # Watch descriptor -> (directory, path relative to its root).
+        self.watches: dict[int, tuple[Path, str]] = {}
+        for root in self.roots:
+            self.add_tree(root, "")
+
+    def add_tree(self, directory: Path, relative_dir: str) -> set[Path]:
+        """Watch `directory` and its subdirectories; return the files in it."""
+        files = set()
+        for dir_path, dir_names, file_names in os.walk(directory):
+            relative = os.path.relpath(dir_path, directory).replace(os.sep, "/")
+            if relative == ".":
+                relative = relative_dir
+            elif relative_dir:
+                relative = f"{relative_dir}/{relative}"
+            prefix = relative + "/" if relative else ""
+
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir_path), WATCH_MASK)
+            if wd < 0:
+                continue
+            self.watches[wd] = (Path(dir_path), relative)
+
+            dir_names[:] = [
+                name
+                for name in dir_names
+                if not matches(prefix + name, True, self.exclude)
+            ]
+            for name in file_names:
+                if self.is_watched_file(prefix + name):
+                    files.add(Path(dir_path) / name)
+        return files
+
+    def is_watched_file(self, relative_path: str) -> bool:
+        return matches(relative_path, False, self.include) and not matches(
+            relative_path, False, self.exclude
+        )
+
+    def wait(self, timeout: float | None) -> set[Path]:
+        """Return the files changed within `timeout` seconds (`None`: any time)."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: consider every file changed (the session
+                # skips those whose source is the same).
+                for root in self.roots:
+                    changed |= self.add_tree(root, "")
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if wd not in self.watches:
+                continue
+            directory, relative_dir = self.watches[wd]
+            relative_path = f"{relative_dir}/{name}" if relative_dir else name
+            written = mask & (IN_CLOSE_WRITE | IN_MOVED_TO)
+
+            if mask & IN_ISDIR:
+                # New (or moved in) directory: watch it, and convert its files.
+                if mask & (IN_CREATE | IN_MOVED_TO) and not matches(
+                    relative_path, True, self.exclude
+                ):
+                    changed |= self.add_tree(directory / name, relative_path)
+            elif written and self.is_watched_file(relative_path):
+                changed.add(directory / name)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(roots, include, exclude, polling: bool = False):
+    if not polling:
+        try:
+            return InotifyWatcher(roots, include, exclude)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(roots, include, exclude)
+
+
+class WatchSession:
+    """Converts changed files, with the parser and translator kept warm."""
+
+    def __init__(
+        self,
+        layout: OutputLayout,
+        parser: str = DEFAULT_PARSER,
+        use_cache: bool = True,
+        use_translation_cache: bool = False,
+        optimizer: Optimizer | None = None,
+    ):
+        self.layout = layout
+        self.parser = parser
+        self.optimizer = optimizer
+        self.cache = None
+        self.translation_cache = (
+            get_translation_cache(parser) if use_translation_cache else None
+        )
+        # Hash of the last converted source of each file, to skip saves that
+        # didn't change anything.
+        self.source_hashes: dict[Path, str] = {}
+
+        if parser == "nikic":
+            install_parser()
+            self.cache = get_parse_cache() if use_cache else None
+            get_worker().parse("<?php")
+
+    def convert(self, source_file: Path) -> float | None:
+        """Convert a file; return the seconds since it was saved (`None` if skipped)."""
+        try:
+            data = source_file.read_bytes()
+            saved_at = source_file.stat().st_mtime
+        except OSError:
+            # Deleted (or renamed away) since the event.
+            return None
+        source_hash = file_hash(data)
+        if self.source_hashes.get(source_file) == source_hash:
+            return None
+
+        try:
+            php_ast = parse(data.decode(), self.cache, self.parser)
+            output = translate(
+                php_ast,
+                translation_cache=self.translation_cache,
+                optimizer=self.optimizer,
+            )
+            conversion = Conversion(source_file, output=output)
+        except Exception as e:  # noqa: BLE001
+            # Unlike a batch conversion, a bug in the translator doesn't stop
+            # the session.
+            conversion = Conversion(
+                source_file, error=e, traceback=traceback.format_exc()
+            )
+        output_file = self.layout(source_file)
+        written = emit(conversion, output_file, ignore_errors=True, errors=Exception)
+        if written is not None:
+            self.source_hashes[source_file] = source_hash
+        return time.time() - saved_at
+
+    def run(self, watcher, debounce: float = DEFAULT_DEBOUNCE):
+        while True:
+            changed = watcher.wait(None)
+            while more := watcher.wait(debounce):
+                changed |= more
+
+            t0 = time.perf_counter()
+            latencies = []
+            for source_file in sorted(changed):
+                latency = self.convert(source_file)
+                if latency is not None:
+                    latencies.append(latency)
+            if latencies:
+                print(
+                    blue(
+                        f"Converted {len(latencies)} files in"
+                        f" {(time.perf_counter() - t0) * 1000:.0f} ms, latency from"
+                        f" save: max {max(latencies) * 1000:.0f} ms"
+                    )
+                )
+
+
+def watch(
+    roots: list[str | Path],
+    parser: str = DEFAULT_PARSER,
+    use_cache: bool = True,
+    include=DEFAULT_INCLUDE,
+    exclude=(),
+    output_dir=None,
+    debounce: float = DEFAULT_DEBOUNCE,
+    polling: bool = False,
+    use_translation_cache: bool = False,
+    optimize: int = DEFAULT_LEVEL,
+    constants=None,
+):
+    session = WatchSession(
+        OutputLayout(roots, output_dir),
+        parser,
+        use_cache,
+        use_translation_cache,
+        Optimizer(optimize, constants or {}),
+    )
+    watcher = make_watcher(roots, include, exclude, polling)
+    kind = "polling" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"Watching {', '.join(map(str, roots))} ({kind}), Ctrl-C to stop")
+    try:
+        session.run(watcher, debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
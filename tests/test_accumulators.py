@@ -0,0 +1,127 @@
+from ast import unparse
+
+from php2py.php_parser import parse
+from php2py.translator import Translator
+
+
+def translate(source: str) -> str:
+    return unparse(Translator().translate(parse(source)))
+
+
+def run(source: str, *args):
+    namespace = {}
+    exec(translate(source), namespace)  # noqa: S102
+    return namespace["render"](*args)
+
+
+def test_accumulator_is_lowered():
+    code = translate(
+        """<?php
+        function render($rows) {
+            $out = "<table>";
+            foreach ($rows as $row) {
+                $out .= "<tr>";
+                foreach ($row as $cell) { $out .= "<td>" . $cell . "</td>"; }
+                $out .= "</tr>";
+            }
+            return $out . "</table>";
+        }
+        """
+    )
+    assert "out_parts = ['' if out is None else str(out)]" in code
+    assert "out_parts.append(f'<td>{cell}</td>')" in code
+    assert code.count("out = ''.join(out_parts)") == 1
+    assert "out +=" not in code
+
+
+def test_lowered_code_runs():
+    source = """<?php
+    function render($n) {
+        $out = "";
+        $i = 0;
+        while ($i < $n) {
+            if ($i % 2) { $out .= "odd"; } else { $out .= $i; }
+            $out .= ",";
+            $i += 1;
+        }
+        return $out;
+    }
+    """
+    assert run(source, 0) == ""
+    assert run(source, 4) == "0,odd,2,odd,"
+
+
+def test_read_in_loop_is_not_lowered():
+    code = translate(
+        """<?php
+        function f($a) {
+            while ($i < 3) { $out .= "a"; echo $out; }
+            foreach ($a as $b) { $s .= $s; }
+            foreach ($a as $b) { $t = $t . "x"; }
+        }
+        """
+    )
+    assert "_parts" not in code
+
+
+def test_loop_in_try_is_not_lowered():
+    code = translate(
+        """<?php
+        function f($a) {
+            try { foreach ($a as $b) { $out .= $b; } } catch (Exception $e) {}
+            foreach ($a as $b) { $out .= $b; }
+        }
+        """
+    )
+    assert code.count("out +=") == 1
+    assert code.count("out_parts.append(f'{b}')") == 1
+
+
+def test_buffer_name_is_unused_in_loop():
+    code = translate(
+        """<?php
+        function f($out_parts) {
+            foreach ($out_parts as $part) { $out .= $part; }
+        }
+        """
+    )
+    assert "out_parts1 = ['' if out is None else str(out)]" in code
+    assert "for part in out_parts:" in code
+
+
+def test_buffer_name_is_unused_in_function():
+    source = """<?php
+    function render($items) {
+        $out_parts = ["head"];
+        $out = "";
+        foreach ($items as $x) { $out .= $x; }
+        return [$out, $out_parts];
+    }
+    """
+    assert "out_parts1.append" in translate(source)
+    assert run(source, ["a", "b"]) == ["ab", ["head"]]
+
+
+def test_shared_variables_are_not_lowered():
+    code = translate(
+        """<?php
+        foreach ($items as $x) { $out .= $x; show(); }
+        function f($items, &$ref) {
+            foreach ($items as $x) { $ref .= $x; show(); }
+        }
+        """
+    )
+    assert "_parts" not in code
+    assert "out +=" in code
+    assert "ref +=" in code
+
+
+def test_start_value_is_converted_to_string():
+    source = """<?php
+    function render($out, $items) {
+        foreach ($items as $x) { $out .= $x; }
+        return $out;
+    }
+    """
+    assert run(source, 1, ["a", "b"]) == "1ab"
+    assert run(source, None, ["a", "b"]) == "ab"
@@ -0,0 +1,238 @@
+import gc
+import json
+import tracemalloc
+
+from php2py.parser import (
+    NODE_SPECS,
+    OP_LIST,
+    OP_NULL,
+    OP_VALUE,
+    decode_compact,
+    make_ast,
+)
+
+# JSON AST, as output by `php-parse -j`, for:
+#
+#   <?php
+#   use Foo\Bar;
+#   class A extends B {
+#       function f($x = 1) {
+#           if ($x) { return "a" . $x; } else { echo 1.5; }
+#       }
+#   }
+JSON_AST = [
+    {
+        "nodeType": "Stmt_Use",
+        "type": 1,
+        "uses": [
+            {
+                "nodeType": "Stmt_UseUse",
+                "type": 0,
+                "name": {
+                    "nodeType": "Name",
+                    "parts": ["Foo", "Bar"],
+                    "attributes": {"startLine": 2, "endLine": 2},
+                },
+                "alias": None,
+                "attributes": {"startLine": 2, "endLine": 2},
+            }
+        ],
+        "attributes": {"startLine": 2, "endLine": 2},
+    },
+    {
+        "nodeType": "Stmt_Class",
+        "attrGroups": [],
+        "flags": 0,
+        "extends": {
+            "nodeType": "Name",
+            "parts": ["B"],
+            "attributes": {"startLine": 3, "endLine": 3},
+        },
+        "implements": [],
+        "name": {
+            "nodeType": "Identifier",
+            "name": "A",
+            "attributes": {"startLine": 3, "endLine": 3},
+        },
+        "stmts": [
+            {
+                "nodeType": "Stmt_ClassMethod",
+                "attrGroups": [],
+                "flags": 0,
+                "byRef": False,
+                "name": {
+                    "nodeType": "Identifier",
+                    "name": "f",
+                    "attributes": {"startLine": 4, "endLine": 4},
+                },
+                "params": [
+                    {
+                        "nodeType": "Param",
+                        "attrGroups": [],
+                        "flags": 0,
+                        "type": None,
+                        "byRef": False,
+                        "variadic": False,
+                        "var": {
+                            "nodeType": "Expr_Variable",
+                            "name": "x",
+                            "attributes": {"startLine": 4, "endLine": 4},
+                        },
+                        "default": {
+                            "nodeType": "Scalar_LNumber",
+                            "value": 1,
+                            "attributes": {"startLine": 4, "endLine": 4, "kind": 10},
+                        },
+                        "attributes": {"startLine": 4, "endLine": 4},
+                    }
+                ],
+                "returnType": None,
+                "stmts": [
+                    {
+                        "nodeType": "Stmt_If",
+                        "cond": {
+                            "nodeType": "Expr_Variable",
+                            "name": "x",
+                            "attributes": {"startLine": 5, "endLine": 5},
+                        },
+                        "stmts": [
+                            {
+                                "nodeType": "Stmt_Return",
+                                "expr": {
+                                    "nodeType": "Expr_BinaryOp_Concat",
+                                    "left": {
+                                        "nodeType": "Scalar_String",
+                                        "value": "a",
+                                        "attributes": {"startLine": 5, "kind": 2},
+                                    },
+                                    "right": {
+                                        "nodeType": "Expr_Variable",
+                                        "name": "x",
+                                        "attributes": {"startLine": 5},
+                                    },
+                                    "attributes": {"startLine": 5, "endLine": 5},
+                                },
+                                "attributes": {"startLine": 5, "endLine": 5},
+                            }
+                        ],
+                        "elseifs": [],
+                        "else": {
+                            "nodeType": "Stmt_Else",
+                            "stmts": [
+                                {
+                                    "nodeType": "Stmt_Echo",
+                                    "exprs": [
+                                        {
+                                            "nodeType": "Scalar_DNumber",
+                                            "value": 1.5,
+                                            "attributes": {"startLine": 5},
+                                        }
+                                    ],
+                                    "attributes": {"startLine": 5, "endLine": 5},
+                                }
+                            ],
+                            "attributes": {"startLine": 5, "endLine": 5},
+                        },
+                        "attributes": {"startLine": 5, "endLine": 7},
+                    }
+                ],
+                "attributes": {"startLine": 4, "endLine": 6},
+            }
+        ],
+        "namespacedName": None,
+        "attributes": {"startLine": 3, "endLine": 7},
+    },
+]
+
+
+def encode_compact(json_ast) -> list:
+    """Reference implementation of `etc/compact_dumper.php`, on JSON ASTs."""
+    ops = []
+    values = []
+
+    def dump(value):
+        match value:
+            case None:
+                ops.append(OP_NULL)
+            case {"nodeType": node_type}:
+                spec = NODE_SPECS[node_type]
+                for field in spec.json_fields:
+                    dump(value.get(field))
+                ops.extend([spec.id, value["attributes"]["startLine"]])
+            case [*_]:
+                for item in value:
+                    dump(item)
+                ops.extend([OP_LIST, len(value)])
+            case _:
+                ops.append(OP_VALUE)
+                values.append(value)
+
+    dump(json_ast)
+    return [ops, values]
+
+
+def linenos(nodes):
+    return [node._lineno for node in nodes]
+
+
+def test_compact_format_matches_json_format():
+    compact = json.loads(json.dumps(encode_compact(JSON_AST)))
+    result = decode_compact(compact)
+    expected = make_ast(JSON_AST)
+
+    assert result == expected
+    assert linenos(result) == linenos(expected) == [2, 3]
+    method = result[1].stmts[0]
+    assert method.stmts[0].stmts[0].expr._lineno == 5
+    assert result[0].uses[0].name.get_parts() == ["Foo", "Bar"]
+
+
+def test_compact_format_is_smaller():
+    compact = json.dumps(encode_compact(JSON_AST))
+    assert len(compact) < len(json.dumps(JSON_AST)) / 3
+
+
+def generate_json_ast(n: int) -> list:
+    """Return the JSON AST of `$vI = "I" . f($vI);`, repeated `n` times."""
+
+    def node(node_type, line, **fields):
+        attributes = {"startLine": line, "endLine": line, "comments": []}
+        return {"nodeType": node_type, **fields, "attributes": attributes}
+
+    stmts = []
+    for i in range(n):
+        var = node("Expr_Variable", i, name=f"v{i}")
+        call = node(
+            "Expr_FuncCall",
+            i,
+            name=node("Name", i, parts=["f"]),
+            args=[node("Arg", i, name=None, value=var, byRef=False, unpack=False)],
+        )
+        concat = node(
+            "Expr_BinaryOp_Concat",
+            i,
+            left=node("Scalar_String", i, value=str(i)),
+            right=call,
+        )
+        assign = node("Expr_Assign", i, var=var, expr=concat)
+        stmts.append(node("Stmt_Expression", i, expr=assign))
+    return stmts
+
+
+def test_json_is_not_retained():
+    payload = json.dumps(generate_json_ast(5_000))
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        json_ast = json.loads(payload)
+        php_ast = make_ast(json_ast)
+        with_json, _ = tracemalloc.get_traced_memory()
+        del json_ast
+        gc.collect()
+        without_json, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert php_ast[-1]._lineno == 4_999
+    assert without_json < 0.5 * with_json
@@ -0,0 +1,46 @@
+import os
+
+from php2py.cache import ParseCache
+
+
+def test_get_put(tmp_path):
+    cache = ParseCache(tmp_path, version="1")
+    assert cache.get(b"<?php 1;") is None
+    cache.put(b"<?php 1;", b"[1]")
+    assert cache.get(b"<?php 1;") == b"[1]"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_version_is_part_of_the_key(tmp_path):
+    ParseCache(tmp_path, version="1").put(b"<?php 1;", b"[1]")
+    assert ParseCache(tmp_path, version="2").get(b"<?php 1;") is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = ParseCache(tmp_path, max_size=350)
+    for i in range(3):
+        cache.put(b"%d" % i, 100 * b"x")
+        path = cache.path(cache.key(b"%d" % i))
+        os.utime(path, (i, i))
+
+    # Entry 0 is older than entry 1, but has just been used.
+    cache.get(b"0")
+    cache.put(b"3", 100 * b"x")
+
+    assert cache.get(b"0") is not None
+    assert cache.get(b"1") is None
+    assert cache.get(b"2") is not None
+    assert cache.get(b"3") is not None
+
+
+def test_stats_and_clear(tmp_path):
+    cache = ParseCache(tmp_path)
+    cache.put(b"a", b"1234")
+    cache.put(b"b", b"5678")
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["size"] == 8
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+    assert cache.get(b"a") is None
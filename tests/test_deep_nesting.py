@@ -0,0 +1,167 @@
+"""Stress tests for deeply nested (e.g. machine-generated) code."""
+import ast as py
+import time
+import tracemalloc
+
+import pytest
+
+from php2py.cache import ParseCache
+from php2py.main import main, translate
+from php2py.optimizer import Optimizer
+from php2py.parser import NODE_SPECS, OP_LIST, OP_VALUE, decode_compact, make_ast
+from php2py.translator import Translator
+
+N = 100_000
+# Through `ast.unparse()` and the optimizer, which recurse.
+END_TO_END_N = 20_000
+
+# Generous bounds: the point is to catch recursion and quadratic behaviour.
+MAX_SECONDS = 30
+MAX_BYTES_PER_TERM = 4096
+
+
+def node(node_type, **fields):
+    return {"nodeType": node_type, **fields, "attributes": {"startLine": 1}}
+
+
+def concat_chain_json(n: int) -> list:
+    """JSON AST of `"0" . "1" . ... . "n-1";` (left-deep)."""
+    expr = node("Scalar_String", value="0")
+    for i in range(1, n):
+        right = node("Scalar_String", value=str(i))
+        expr = node("Expr_BinaryOp_Concat", left=expr, right=right)
+    return [node("Stmt_Expression", expr=expr)]
+
+
+def sum_chain_json(n: int) -> list:
+    """JSON AST of `$x + 1 + ... + 1;` (left-deep)."""
+    expr = node("Expr_Variable", name="x")
+    for _ in range(1, n):
+        right = node("Scalar_LNumber", value=1)
+        expr = node("Expr_BinaryOp_Plus", left=expr, right=right)
+    return [node("Stmt_Expression", expr=expr)]
+
+
+def nested_array_json(n: int) -> list:
+    """JSON AST of `[[[...[1]...]]];`, `n` levels deep."""
+    item = node("Scalar_LNumber", value=1)
+    for _ in range(n):
+        array_item = node(
+            "Expr_ArrayItem", key=None, value=item, byRef=False, unpack=False
+        )
+        item = node("Expr_Array", items=[array_item])
+    return [node("Stmt_Expression", expr=item)]
+
+
+def concat_chain_compact(n: int) -> list:
+    """Compact encoding of `"0" . "1" . ... . "n-1";`."""
+    string = NODE_SPECS["Scalar_String"].id
+    concat = NODE_SPECS["Expr_BinaryOp_Concat"].id
+    stmt = NODE_SPECS["Stmt_Expression"].id
+
+    ops = [OP_VALUE, string, 1]
+    for _ in range(1, n):
+        ops += [OP_VALUE, string, 1, concat, 1]
+    ops += [stmt, 1, OP_LIST, 1]
+    return [ops, [str(i) for i in range(n)]]
+
+
+def array_depth(expr) -> int:
+    depth = 0
+    while isinstance(expr, py.List):
+        expr = expr.elts[0]
+        depth += 1
+    return depth
+
+
+def run_bounded(func, trace_memory=False):
+    # tracemalloc makes allocations several times slower, so memory is only
+    # checked where asked.
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        result = func()
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            assert peak < N * MAX_BYTES_PER_TERM
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    assert time.perf_counter() - t0 < MAX_SECONDS
+    return result
+
+
+def test_long_concatenation_from_json():
+    json_ast = concat_chain_json(N)
+
+    def convert():
+        return Translator().translate(make_ast(json_ast))
+
+    [stmt] = run_bounded(convert)
+    # The literals are merged into a single string.
+    assert stmt.value.value == "".join(str(i) for i in range(N))
+
+
+def test_long_concatenation_from_compact_format():
+    data = concat_chain_compact(N)
+
+    def convert():
+        return Translator().translate(decode_compact(data))
+
+    [stmt] = run_bounded(convert, trace_memory=True)
+    assert stmt.value.value == "".join(str(i) for i in range(N))
+
+
+def test_deeply_nested_arrays():
+    json_ast = nested_array_json(N)
+
+    def convert():
+        return Translator().translate(make_ast(json_ast))
+
+    [stmt] = run_bounded(convert)
+    assert array_depth(stmt.value) == N
+
+
+@pytest.mark.parametrize("level", [0, 1, 2])
+@pytest.mark.parametrize(
+    "json_ast, expected",
+    [
+        (nested_array_json(END_TO_END_N), "[" * END_TO_END_N + "1"),
+        (sum_chain_json(END_TO_END_N), "x" + " + 1" * (END_TO_END_N - 1)),
+    ],
+    ids=["array", "sum"],
+)
+def test_deeply_nested_code_end_to_end(json_ast, expected, level, tmp_path):
+    php_ast = make_ast(json_ast)
+    optimizer = Optimizer(level)
+
+    code = run_bounded(lambda: translate(php_ast, optimizer=optimizer))
+    assert code.startswith(expected)
+    # Streaming, through the translation cache.
+    cache = ParseCache(tmp_path)
+    assert translate(php_ast, translation_cache=cache, optimizer=optimizer) == code
+
+
+@pytest.mark.parametrize("stream", [False, True], ids=["pipeline", "stream"])
+def test_deeply_nested_file_in_pipeline(stream, tmp_path):
+    # While a thread recurses with a raised recursion limit, the others
+    # (parsing, translating, emitting) keep to the default one.
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"{i:02}.php"
+        if i % 5 == 2:
+            path.write_text("<?php $a = " + "[" * 5000 + "1" + "]" * 5000 + ";")
+        else:
+            path.write_text(f"<?php function f{i}($x) {{ return [$x, [$x + {i}]]; }}")
+        paths.append(path)
+
+    main(paths, ignore_errors=False, parser="python", stream=stream)
+
+    for i, path in enumerate(paths):
+        code = path.with_suffix(".py").read_text()
+        if i % 5 == 2:
+            assert code.lstrip().startswith("a = " + "[" * 5000 + "1")
+        else:
+            assert f"def f{i}(x):" in code
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+from php2py.discovery import OutputLayout, discover, matches
+from php2py.main import main
+
+
+def make_tree(root: Path, files: list[str]):
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"<?php ${path.stem} = 1;")
+
+
+@pytest.mark.parametrize(
+    "path, is_dir, pattern, expected",
+    [
+        ("vendor", True, "vendor/", True),
+        ("vendor", False, "vendor/", False),
+        ("lib/vendor", True, "vendor/", True),
+        ("a/b.inc.php", False, "*.inc.php", True),
+        ("lib/legacy/x.php", False, "lib/legacy/*", True),
+        ("src/lib/legacy/x.php", False, "lib/legacy/*", False),
+        ("src/lib/legacy/x.php", False, "/src/*", True),
+    ],
+)
+def test_matches(path, is_dir, pattern, expected):
+    assert matches(path, is_dir, [pattern]) is expected
+
+
+def test_discover(tmp_path):
+    make_tree(
+        tmp_path,
+        ["b.php", "a.php", "x.txt", "sub/c.php", "vendor/v.php", "tests/t.php"],
+    )
+    files = discover([tmp_path, "missing.php"], exclude=["vendor/", "tests/"])
+    assert [str(path) for path in files] == [
+        str(tmp_path / "a.php"),
+        str(tmp_path / "b.php"),
+        str(tmp_path / "sub" / "c.php"),
+        "missing.php",
+    ]
+
+
+def test_discover_is_lazy(tmp_path):
+    make_tree(tmp_path, ["a/1.php", "b/2.php"])
+    files = discover([tmp_path])
+    assert next(files) == tmp_path / "a" / "1.php"
+    # `b` was not walked yet.
+    make_tree(tmp_path, ["b/3.php"])
+    assert list(files) == [tmp_path / "b" / "2.php", tmp_path / "b" / "3.php"]
+
+
+def test_output_layout(tmp_path):
+    (tmp_path / "src").mkdir()
+    layout = OutputLayout([tmp_path / "src", "single.php"], "out")
+    assert layout(tmp_path / "src" / "a" / "b.php") == Path("out/a/b.py")
+    assert layout("dir/single.php") == Path("out/single.py")
+    assert OutputLayout()("dir/a.php") == Path("dir/a.py")
+
+
+def test_convert_directory(tmp_path):
+    make_tree(tmp_path / "src", ["a.php", "lib/b.php", "vendor/c.php"])
+    out = tmp_path / "out"
+
+    main(
+        [tmp_path / "src"],
+        ignore_errors=False,
+        parser="python",
+        exclude=["vendor/"],
+        output_dir=out,
+    )
+
+    outputs = sorted(str(path.relative_to(out)) for path in out.rglob("*.py"))
+    assert outputs == ["a.py", "lib/b.py"]
+    assert not list((tmp_path / "src").rglob("*.py"))
@@ -0,0 +1,53 @@
+import ast as py
+from dataclasses import dataclass
+
+import pytest
+
+from php2py import php_ast
+from php2py.translator import Translator
+from php2py.translator.base import handles
+
+
+def test_dispatch_table():
+    translator = Translator()
+    assert translator.translate(php_ast.Stmt_Nop()).__class__ is py.Pass
+
+    # Resolved once per class, including subclasses of a handled class.
+    assert Translator.dispatch_table[php_ast.Stmt_Nop] is Translator.translate_nop
+    assert (
+        Translator.resolve_handler(php_ast.Expr_BinaryOp_Plus)
+        is Translator.translate_binary_op
+    )
+    assert (
+        Translator.resolve_handler(php_ast.Expr_AssignOp_Coalesce)
+        is Translator.translate_assign_op_coalesce
+    )
+    assert (
+        Translator.resolve_handler(php_ast.Expr_AssignOp_Plus)
+        is Translator.translate_assign_op
+    )
+
+
+def test_unhandled_node():
+    with pytest.raises(NotImplementedError, match="Stmt_Goto"):
+        Translator().translate(php_ast.Stmt_Goto(None))
+
+
+def test_subclass_handlers():
+    @dataclass
+    class CustomTranslator(Translator):
+        def translate_nop(self, node):
+            return py.Expr(py.Name("nop", py.Load()))
+
+        @handles(php_ast.Stmt_Goto)
+        def translate_goto(self, node):
+            return py.Pass()
+
+    translator = CustomTranslator()
+    module = translator.translate_root(
+        [php_ast.Stmt_Nop(), php_ast.Stmt_Goto(None), php_ast.Stmt_Break(None)]
+    )
+    assert py.unparse(module) == "nop\npass\nbreak"
+    # The base class table is unaffected.
+    with pytest.raises(NotImplementedError):
+        Translator().translate(php_ast.Stmt_Goto(None))
@@ -0,0 +1,110 @@
+import io
+import os
+import tracemalloc
+from ast import unparse
+from pathlib import Path
+
+import pytest
+
+from php2py.emitter import write_translation
+from php2py.main import main
+from php2py.php_parser import parse
+from php2py.translator import Translator
+
+PROGRAMS = Path(__file__).parent / "programs"
+
+SOURCE = """<?php
+"docstring-like";
+use Foo\\Bar;
+function f($x, $y = 2) { return $x + $y; }
+$a = f(1) . "x";
+class A extends B {
+    function __construct($a) { $this->a = $a; }
+    function m() { if ($this->a) { return 1; } else { return [1, 'a' => 2]; } }
+}
+?>inline html<?php
+interface I {}
+while (true) { break; }
+"""
+
+
+def generated_source(functions: int) -> str:
+    body = "".join(
+        f"function f{i}($x) {{ $y = $x * {i} + 1; return f($y, [$x, {i}]); }}\n"
+        for i in range(functions)
+    )
+    return f"<?php\n{body}"
+
+
+def stream(php_ast) -> str:
+    output = io.StringIO()
+    write_translation(php_ast, output)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize(
+    "source",
+    [SOURCE, "<?php", "<?php $a = 1;", generated_source(3)]
+    + [path.read_text() for path in sorted(PROGRAMS.glob("*.php"))],
+)
+def test_byte_identical_to_unparse(source):
+    php_ast = parse(source)
+    assert stream(php_ast) == unparse(Translator().translate(php_ast))
+
+
+def peak_memory(func, *args) -> int:
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_memory_does_not_grow_with_file_size():
+    def streamed(php_ast):
+        with open(os.devnull, "w") as fp:
+            write_translation(php_ast, fp)
+
+    def unparsed(php_ast):
+        unparse(Translator().translate(php_ast))
+
+    small = parse(generated_source(50))
+    large = parse(generated_source(500))
+    # Warm up the caches (dispatch tables, interned strings...).
+    streamed(small)
+    unparsed(small)
+    streamed_growth = peak_memory(streamed, large) - peak_memory(streamed, small)
+    unparsed_growth = peak_memory(unparsed, large) - peak_memory(unparsed, small)
+    # 10 times more code: unparse() needs ~10 times more memory, streaming
+    # about the same (up to allocator noise).
+    assert unparsed_growth > 1_000_000
+    assert streamed_growth < unparsed_growth / 20
+
+
+def test_stream_option(tmp_path):
+    (tmp_path / "a.php").write_text(SOURCE)
+    main([tmp_path / "a.php"], ignore_errors=False, parser="python")
+    expected = (tmp_path / "a.py").read_text()
+    (tmp_path / "a.py").unlink()
+
+    main([tmp_path / "a.php"], ignore_errors=False, parser="python", stream=True)
+    assert (tmp_path / "a.py").read_text() == expected
+    assert (tmp_path / "a.py").stat().st_mode & 0o777 == 0o666 & ~current_umask()
+
+
+def test_stream_error_keeps_previous_output(tmp_path):
+    (tmp_path / "a.py").write_text("previous")
+    # Translation fails after the first statement was written.
+    (tmp_path / "a.php").write_text("<?php $a = 1; $b = function() {};")
+
+    main([tmp_path / "a.php"], ignore_errors=True, parser="python", stream=True)
+
+    assert (tmp_path / "a.py").read_text() == "previous"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.php", "a.py"]
+
+
+def current_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
@@ -0,0 +1,55 @@
+import json
+from ast import unparse
+
+from php2py.main import main
+from php2py.php_parser import parse
+from php2py.translator import InstrumentedTranslator, TranslationStats, Translator
+
+SOURCE = """<?php
+class A {
+    function f($x) { return $x + 1; }
+}
+$a = 1 + 2;
+echo $a;
+"""
+
+
+def test_instrumented_translator():
+    php_ast = parse(SOURCE)
+    stats = TranslationStats()
+    output = unparse(InstrumentedTranslator(stats=stats).translate_root(php_ast))
+
+    # Same output as without instrumentation.
+    assert output == unparse(Translator().translate_root(php_ast))
+
+    assert stats.nodes["Stmt_Class"].count == 1
+    assert stats.nodes["Stmt_ClassMethod"].count == 1
+    assert stats.nodes["Expr_BinaryOp_Plus"].count == 2
+    assert stats.nodes["Expr_Variable"].count == 3
+
+    stmt_class = stats.nodes["Stmt_Class"]
+    assert 0 <= stmt_class.self_time <= stmt_class.total_time
+    # Self times add up to the time of the top-level nodes (whose types
+    # don't appear deeper in this source).
+    top_level = sum(
+        stats.nodes[node_type].total_time
+        for node_type in {type(node).__name__ for node in php_ast}
+    )
+    self_times = sum(node.self_time for node in stats.nodes.values())
+    assert abs(top_level - self_times) < 1e-6
+
+    table = stats.table(rows=2)
+    assert table.splitlines()[0].startswith("Node type")
+    assert table.endswith("more node types")
+
+
+def test_node_stats_option(tmp_path, capsys):
+    (tmp_path / "a.php").write_text(SOURCE)
+    stats_path = tmp_path / "stats.json"
+
+    main([tmp_path], ignore_errors=False, parser="python", node_stats_path=stats_path)
+
+    assert "Stmt_ClassMethod" in capsys.readouterr().out
+    stats = json.loads(stats_path.read_text())
+    assert stats["Stmt_Echo"]["count"] == 1
+    assert set(stats["Stmt_Echo"]) == {"count", "self_time", "total_time"}
@@ -0,0 +1,74 @@
+import pytest
+
+from php2py.main import main
+
+
+def make_files(tmp_path, sources):
+    paths = []
+    for i, source in enumerate(sources):
+        path = tmp_path / f"{i:02d}.php"
+        path.write_text(source)
+        paths.append(path)
+    return paths
+
+
+def summary(output: str) -> list[str]:
+    """The per-file lines of `main()`'s output, without tracebacks."""
+    return [
+        line
+        for line in output.splitlines()
+        if "Transpiling" in line or "Error transpiling" in line
+    ]
+
+
+SOURCES = [f"<?php $a{i} = {i} + 1;" for i in range(20)]
+
+
+@pytest.mark.parametrize("jobs", [2, 4])
+def test_parallel_matches_serial(tmp_path, capsys, jobs):
+    sources = SOURCES[:]
+    sources[5] = "<?php $a = ;"
+    paths = make_files(tmp_path, sources)
+
+    main(paths, ignore_errors=True, parser="python")
+    serial_output = summary(capsys.readouterr().out)
+    serial_files = {path: path.with_suffix(".py").read_text() for path in paths[6:]}
+    for path in paths:
+        path.with_suffix(".py").unlink(missing_ok=True)
+
+    main(paths, ignore_errors=True, parser="python", jobs=jobs)
+    assert summary(capsys.readouterr().out) == serial_output
+    assert "Error transpiling" in serial_output[6]
+    for path, output in serial_files.items():
+        assert path.with_suffix(".py").read_text() == output
+
+
+def test_parallel_stops_at_first_error(tmp_path, capsys):
+    sources = SOURCES[:]
+    sources[3] = "<?php $a = ;"
+    sources[10] = "<?php $b = ;"
+    paths = make_files(tmp_path, sources)
+
+    with pytest.raises(SystemExit):
+        main(paths, ignore_errors=False, parser="python", jobs=4)
+
+    output = summary(capsys.readouterr().out)
+    assert output[-1] == "Error transpiling file."
+    assert len(output) == 5
+    assert [path.with_suffix(".py").exists() for path in paths[:4]] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    assert not any(path.with_suffix(".py").exists() for path in paths[4:])
+
+
+def test_parallel_converts_all_files(tmp_path, monkeypatch):
+    # A small window makes the pool run dry between batches.
+    monkeypatch.setattr("php2py.main.QUEUED_FILES_PER_JOB", 1)
+    paths = make_files(tmp_path, SOURCES)
+
+    main(paths, ignore_errors=False, parser="python", jobs=2)
+
+    assert all(path.with_suffix(".py").exists() for path in paths)
@@ -0,0 +1,217 @@
+from ast import unparse
+
+import pytest
+
+from php2py.php_parser import parse
+from php2py.translator import Translator
+from php2py.translator.loops import (
+    passed_variables,
+    shared_variables,
+    written_variables,
+)
+
+
+def translate(source: str) -> str:
+    return unparse(Translator().translate(parse(source)))
+
+
+@pytest.mark.parametrize(
+    "loop, expected",
+    [
+        ("for ($i = 0; $i < $n; $i++)", "for i in range(n):"),
+        ("for ($i = 1; $i <= 10; ++$i)", "for i in range(1, 11):"),
+        ("for ($i = 1; $i <= $n; $i += 3)", "for i in range(1, n + 1, 3):"),
+        ("for ($i = $n; $i > 0; $i--)", "for i in range(n, 0, -1):"),
+        ("for ($i = $n; $i >= -2; $i -= 2)", "for i in range(n, -3, -2):"),
+        ("for ($i = 0; $i < MAX; $i++)", "for i in range(MAX):"),
+    ],
+)
+def test_range_loop(loop, expected):
+    code = translate(f"<?php function f($n) {{ {loop} {{ g($i); }} }}")
+    assert expected in code
+    assert "while" not in code
+
+
+@pytest.mark.parametrize(
+    "loop",
+    [
+        # Not in a function.
+        "for ($i = 0; $i < 10; $i++) { g($i); }",
+        # Written in the body.
+        "function f() { for ($i = 0; $i < 10; $i++) { $i += 2; } }",
+        "function f($a) { for ($i = 0; $i < 10; $i++) { foreach ($a as $i) {} } }",
+        # Bound written in the body, or not a variable.
+        "function f($n) { for ($i = 0; $i < $n; $i++) { $n--; } }",
+        "function f($a) { for ($i = 0; $i < g($a); $i++) {} }",
+        # Step in the wrong direction, or not constant.
+        "function f() { for ($i = 0; $i < 10; $i--) {} }",
+        "function f($s) { for ($i = 0; $i < 10; $i += $s) {} }",
+        # Used after the loop.
+        "function f() { for ($i = 0; $i < 10; $i++) {} return $i; }",
+    ],
+)
+def test_other_loops_are_while_loops(loop):
+    code = translate(f"<?php {loop}")
+    assert "range(" not in code
+    assert "while" in code
+
+
+def test_range_loops_run():
+    code = translate(
+        """<?php
+        function f($n) {
+            for ($i = 0; $i < $n; $i++) {
+                for ($j = $i; $j >= 0; $j -= 2) {
+                    if ($j == 2) { continue; }
+                    echo $i * 10 + $j;
+                }
+            }
+        }
+        """
+    )
+    assert code.count("range(") == 2
+    printed = []
+    namespace = {"print": printed.append}
+    exec(code, namespace)  # noqa: S102
+    namespace["f"](4)
+    assert printed == [0, 11, 20, 33, 31]
+
+
+def test_continue_runs_the_update():
+    code = translate(
+        """<?php
+        for ($i = 0; $i < 5; $i++) {
+            if ($i % 2) { continue; }
+            for ($j = 0; $j < 2; $j++) { continue; }
+            echo $i;
+        }
+        """
+    )
+    printed = []
+    exec(code, {"print": printed.append})  # noqa: S102
+    assert printed == [0, 2, 4]
+    # Once before the `continue` of the loop, not the one of the inner loop.
+    assert code.count("i += 1") == 2
+
+
+def test_no_update_after_last_statement():
+    code = translate(
+        """<?php
+        for ($i = 0; $i < 5; $i++) { if ($i) { echo $i; } continue; }
+        for ($i = 0; $i < 5; $i++) { echo $i; break; }
+        function f($a) { for ($i = 0; $i < g($a); $i++) { return $i; } }
+        """
+    )
+    # Only before the `continue`.
+    assert code.count("i += 1") == 1
+    assert "i += 1\n    continue" in code
+
+
+def test_passed_variables():
+    source = "<?php sort($a); g($b[0], 1 + $x); $c->f($d); new C($e); count($f);"
+    assert passed_variables(parse(source)) == {"a", "c", "d", "e"}
+
+
+def test_shared_variables():
+    (function,) = parse(
+        """<?php
+        function f($a, &$b) {
+            global $c;
+            static $d = 0;
+            $e = &$f;
+            $g = function () use ($h, &$i) {};
+            $j = $k;
+        }
+        """
+    )
+    assert shared_variables(function) == {"b", "c", "d", "e", "f", "i"}
+
+
+def test_written_variables():
+    source = "<?php [$a, $b[$i]] = f(); $o->p = 1; $c += $d; unset($u); $e++;"
+    assert written_variables(parse(source)) == {"a", "b", "o", "c", "u", "e"}
+    assert written_variables(parse("<?php $$name = 1;")) is None
+
+
+def test_length_is_a_range_bound():
+    code = translate(
+        "<?php function f($a) { for ($i = 0; $i < count($a); $i++) { g($a[$i]); } }"
+    )
+    assert "for i in range(count(a)):" in code
+
+
+@pytest.mark.parametrize(
+    "cond, expected",
+    [
+        ("$i < count($a)", "a_count = count(a)"),
+        ("sizeof($a) > $i", "a_count = sizeof(a)"),
+        ("$i < strlen($s) - 1 && $ok", "s_len = strlen(s)"),
+        ("!($i >= strlen($s))", "s_len = strlen(s)"),
+    ],
+)
+def test_length_is_hoisted(cond, expected):
+    code = translate(
+        f"<?php function f($a, $s, $ok) {{ $i = 0; while ({cond}) {{ $i++; }} }}"
+    )
+    assert f"{expected}\n    while " in code
+    assert code.count("(a)") + code.count("(s)") == 1
+
+
+@pytest.mark.parametrize(
+    "loop",
+    [
+        # Modified in the loop.
+        "function f($a) { while (count($a) > 0) { array_pop($a); } }",
+        "function f($a) { while (count($a) < 10) { $a[$i] = 1; } }",
+        "function f($a) { while (count($a) < 10) { $a->add(1); } }",
+        "function f($s) { for ($i = 0; $i < strlen($s); $i++) { $s .= 'a'; } }",
+        # May be modified by any call.
+        "function f(&$a) { while ($i < count($a)) { g(); } }",
+        # Not always evaluated.
+        "function f($a) { while (is_array($a) && $i < count($a)) { $i++; } }",
+        # Not in a function.
+        "while ($i < count($a)) { $i++; }",
+    ],
+)
+def test_length_is_not_hoisted(loop):
+    code = translate(f"<?php {loop}")
+    assert "_count =" not in code
+    assert "_len =" not in code
+
+
+def test_hoisted_name_is_unused():
+    code = translate(
+        """<?php
+        function f($a, $a_count) {
+            for ($i = 0; $i < count($a); $i++) { echo $i; }
+            return $i + $a_count;
+        }
+        """
+    )
+    assert "a_count1 = count(a)" in code
+    assert "while i < a_count1:" in code
+
+
+def test_hoisted_loops_run():
+    code = translate(
+        """<?php
+        function f($s, $words) {
+            $i = 0;
+            while ($i < strlen($s)) {
+                for ($j = 0; $j < count($words); $j++) {
+                    if ($j == 1) { continue; }
+                    echo $i . $words[$j];
+                }
+                $i += 2;
+            }
+            return $j;
+        }
+        """
+    )
+    assert "s_len = strlen(s)" in code
+    assert "words_count = count(words)" in code
+    printed = []
+    namespace = {"print": printed.append, "strlen": len, "count": len}
+    exec(code, namespace)  # noqa: S102
+    assert namespace["f"]("abcd", ["x", "y", "z"]) == 3
+    assert printed == ["0x", "0z", "2x", "2z"]
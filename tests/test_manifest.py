@@ -0,0 +1,76 @@
+from php2py.main import main
+from php2py.manifest import Manifest, translator_fingerprint
+from php2py.optimizer import Optimizer
+
+
+def convert(paths, manifest_path, **kwargs):
+    main(
+        paths,
+        ignore_errors=True,
+        parser="python",
+        incremental=True,
+        manifest_path=manifest_path,
+        **kwargs,
+    )
+
+
+def converted(output: str) -> list[str]:
+    return [line.split()[-1] for line in output.splitlines() if "Transpiling" in line]
+
+
+def test_incremental(tmp_path, capsys):
+    manifest_path = tmp_path / "manifest.json"
+    a = tmp_path / "a.php"
+    b = tmp_path / "b.php"
+    a.write_text("<?php $a = 1;")
+    b.write_text("<?php $b = 1;")
+
+    convert([a, b], manifest_path)
+    assert converted(capsys.readouterr().out) == [f"{a}...", f"{b}..."]
+
+    # Nothing changed.
+    convert([a, b], manifest_path)
+    output = capsys.readouterr().out
+    assert converted(output) == []
+    assert "2 files up to date" in output
+
+    # Changed source, deleted output.
+    a.write_text("<?php $a = 2;")
+    b.with_suffix(".py").unlink()
+    convert([a, b], manifest_path)
+    assert converted(capsys.readouterr().out) == [f"{a}...", f"{b}..."]
+    assert a.with_suffix(".py").read_text().strip() == "a = 2"
+
+    # Edited output.
+    b.with_suffix(".py").write_text("b = 3")
+    convert([a, b], manifest_path)
+    assert converted(capsys.readouterr().out) == [f"{b}..."]
+
+    convert([a, b], manifest_path, force=True)
+    assert converted(capsys.readouterr().out) == [f"{a}...", f"{b}..."]
+
+
+def test_failed_files_are_retried(tmp_path, capsys):
+    manifest_path = tmp_path / "manifest.json"
+    a = tmp_path / "a.php"
+    a.write_text("<?php $a = ;")
+
+    convert([a], manifest_path)
+    convert([a], manifest_path)
+    output = capsys.readouterr().out
+    assert converted(output) == [f"{a}...", f"{a}..."]
+
+
+def test_converter_change(tmp_path, capsys):
+    manifest_path = tmp_path / "manifest.json"
+    a = tmp_path / "a.php"
+    a.write_text("<?php $a = 1;")
+    convert([a], manifest_path)
+
+    manifest = Manifest.load(manifest_path, "other fingerprint")
+    assert [entry.translator for entry in manifest.entries.values()] == [
+        f"{translator_fingerprint('python')}:{Optimizer().fingerprint()}"
+    ]
+    assert not manifest.is_up_to_date(
+        a, manifest.entries[Manifest.key(a)].source, a.with_suffix(".py")
+    )
@@ -0,0 +1,269 @@
+import argparse
+import ast
+import io
+
+import pytest
+
+from php2py.cache import ParseCache
+from php2py.cli import constant_definition
+from php2py.emitter import write_translation
+from php2py.main import main, translate
+from php2py.optimizer import Optimizer, file_constants
+from php2py.php_parser import parse
+
+SOURCE = """<?php
+define("TRACE", false);
+const GREETING = "hello";
+function f($x) {
+    if (DEBUG) {
+        echo "debug " . $x;
+    } elseif (PHP_VERSION_ID >= 80000) {
+        return $x * 60 * 60 * (12 + 12);
+        echo "unreachable";
+    }
+    if (TRACE) { echo "trace"; }
+    echo GREETING . ", " . NAME . "!";
+    return 1;
+}
+"""
+
+CONSTANTS = {"DEBUG": False, "PHP_VERSION_ID": 80100, "NAME": "world"}
+
+
+def optimize(code: str, level: int = 1) -> str:
+    return ast.unparse(Optimizer(level).optimize(ast.parse(code).body))
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        ("x = 60 * 60 * 24", "x = 86400"),
+        ("x = -(2 ** 3) + ~0", "x = -9"),
+        ("x = 'a' + 'b' * 3", "x = 'abbb'"),
+        ("x = 1 < 2 <= 2 != 3", "x = True"),
+        ("x = 'b' in 'abc'", "x = True"),
+        ("x = not None", "x = True"),
+        ("x = False or y", "x = y"),
+        ("x = True and 0 and y", "x = 0"),
+        ("x = y and True", "x = y and True"),
+        ("x = a if 1 + 1 == 2 else b", "x = a"),
+        ("x = f'{1}-{True}-{y}'", "x = f'1-True-{y}'"),
+        ("x = f\"{'a'}{'b'}\"", "x = 'ab'"),
+    ],
+)
+def test_constant_folding(code, expected):
+    assert optimize(code) == expected
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "x = 1 / 0",
+        "x = 'a' + 1",
+        "x = 2 ** 100000",
+        "x = 'x' * 1000000",
+        "x = 10.0 ** 400",
+        "x = 1e+308 * 10",
+    ],
+)
+def test_unfoldable(code):
+    assert optimize(code) == code
+
+
+def test_dead_branches():
+    code = """
+if False:
+    a()
+elif 2 > 1:
+    b()
+else:
+    c()
+while 0:
+    d()
+for x in y:
+    if None:
+        e()
+"""
+    assert optimize(code) == "b()\nfor x in y:\n    pass"
+
+
+def test_unreachable_code():
+    code = """
+def f():
+    for x in y:
+        continue
+        a()
+    return 1
+    b()
+"""
+    assert "a()" in optimize(code, 1)
+    assert "a()" not in optimize(code, 2)
+    assert "b()" not in optimize(code, 2)
+
+
+def test_yield_is_kept():
+    code = """
+def f():
+    if False:
+        yield 1
+    elif True:
+        a()
+    while False:
+        yield from g()
+    return
+    yield
+def h():
+    if False:
+        def i():
+            yield
+    i = None
+"""
+    assert optimize(code, 2) == (
+        "def f():\n"
+        "    if False:\n"
+        "        yield 1\n"
+        "    else:\n"
+        "        a()\n"
+        "    while False:\n"
+        "        yield from g()\n"
+        "    return\n"
+        "    yield\n\n"
+        "def h():\n"
+        "    i = None"
+    )
+
+
+def test_local_variables_are_kept():
+    code = """
+def f():
+    if False:
+        x = 1
+    return x
+def g():
+    return x
+    x = 1
+def h(x):
+    if False:
+        x = 2
+    while False:
+        for y in x:
+            pass
+    if False:
+        y = 1
+    return (x, y)
+class C:
+    if False:
+        x = 1
+"""
+    assert optimize(code, 2) == (
+        "def f():\n"
+        "    if False:\n"
+        "        x = 1\n"
+        "    return x\n\n"
+        "def g():\n"
+        "    return x\n"
+        "    x = 1\n\n"
+        "def h(x):\n"
+        "    if False:\n"
+        "        y = 1\n"
+        "    return (x, y)\n\n"
+        "class C:\n"
+        "    pass"
+    )
+
+
+def test_local_variables_are_kept_in_php_code():
+    php_ast = parse(
+        """<?php
+        define("DEBUG", false);
+        $x = "global";
+        function f() { if (DEBUG) { $x = "local"; } return $x; }
+        function g() { return $x; $x = 1; }
+        """
+    )
+    code = translate(php_ast, optimizer=Optimizer(2))
+    namespace = {"define": lambda name, value: None}
+    exec(code, namespace)  # noqa: S102
+    for name in ("f", "g"):
+        with pytest.raises(UnboundLocalError):
+            namespace[name]()
+
+
+def test_levels():
+    php_ast = parse(SOURCE)
+    assert translate(php_ast) == translate(php_ast, optimizer=Optimizer(0, CONSTANTS))
+
+    code = translate(php_ast, optimizer=Optimizer(1, CONSTANTS))
+    assert "return x * 60 * 60 * 24\n" in code
+    assert "DEBUG" not in code
+    assert "print('unreachable')" in code
+    assert "if TRACE:" in code
+    assert "print(f'{GREETING}, world!')" in code
+
+    code = translate(php_ast, optimizer=Optimizer(2, CONSTANTS))
+    assert "TRACE = False" not in code
+    assert "define('TRACE', False)" in code
+    assert "unreachable" not in code
+    assert "trace" not in code
+    assert "hello, world!" not in code  # After the `return`.
+
+
+def test_file_constants_are_substituted():
+    php_ast = parse('<?php define("A", 1); echo A * 3;')
+    assert translate(php_ast, optimizer=Optimizer(1)).endswith("print(A * 3)")
+    assert translate(php_ast, optimizer=Optimizer(2)).endswith("print(3)")
+    # The constants given by the user win.
+    code = translate(php_ast, optimizer=Optimizer(2, {"A": 2}))
+    assert code.endswith("print(6)")
+
+
+def test_file_constants():
+    php_ast = parse(
+        """<?php
+        namespace App;
+        define("A", -1.5);
+        const B = "b", C = true;
+        define("D", 1);
+        define("D", 2);
+        define("E", f());
+        if ($x) { define("F", 1); }
+        """
+    )
+    assert file_constants(php_ast) == {"A": -1.5, "B": "b", "C": True}
+
+
+def test_streaming_and_cache_output_is_the_same(tmp_path):
+    php_ast = parse(SOURCE)
+    cache = ParseCache(tmp_path)
+    for level in (0, 1, 2):
+        optimizer = Optimizer(level, CONSTANTS)
+        expected = translate(php_ast, optimizer=optimizer)
+        for _ in range(2):
+            output = io.StringIO()
+            write_translation(php_ast, output, cache=cache, optimizer=optimizer)
+            assert output.getvalue() == expected
+    # The code of the `const` and of `f()` is cached once per level.
+    assert (cache.hits, cache.misses) == (6, 6)
+
+
+def test_main(tmp_path):
+    source = tmp_path / "a.php"
+    source.write_text(SOURCE)
+    main([source], ignore_errors=False, parser="python", constants=CONSTANTS)
+    # Not optimized by default.
+    assert "print(f'debug {x}')" in source.with_suffix(".py").read_text()
+    main(
+        [source], ignore_errors=False, parser="python", optimize=1, constants=CONSTANTS
+    )
+    assert "print('debug" not in source.with_suffix(".py").read_text()
+
+
+def test_constant_definition():
+    assert constant_definition("DEBUG=false") == ("DEBUG", False)
+    assert constant_definition("VERSION=8.1") == ("VERSION", 8.1)
+    assert constant_definition("NAME=world") == ("NAME", "world")
+    assert constant_definition("EMPTY=") == ("EMPTY", "")
+    with pytest.raises(argparse.ArgumentTypeError):
+        constant_definition("DEBUG")
+    with pytest.raises(argparse.ArgumentTypeError):
+        constant_definition("LIST=[1]")
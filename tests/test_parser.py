@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from php2py.parser import ParseError, get_worker, parse, parse_many, parse_oneshot
+from php2py.php_ast import Stmt_InlineHTML
+
+
+def test_worker_is_reused():
+    parse("<?php $a = 1;")
+    pid = get_worker().process.pid
+    parse("<?php $b = 2;")
+    assert get_worker().process.pid == pid
+
+
+def test_worker_restarts_after_crash():
+    parse("<?php $a = 1;")
+    get_worker().process.kill()
+    get_worker().process.wait()
+
+    assert parse("html") == [Stmt_InlineHTML(value="html")]
+
+
+def test_worker_restarts_after_malformed_response():
+    parse("<?php $a = 1;")
+    worker = get_worker()
+    worker.close()
+    # Prints a warning instead of a response.
+    script = "import sys; print('PHP Warning: oops', flush=True); sys.stdin.read()"
+    worker.process = subprocess.Popen(
+        [sys.executable, "-c", script], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+
+    assert parse("html") == [Stmt_InlineHTML(value="html")]
+
+
+def test_parse_error():
+    with pytest.raises(ParseError):
+        parse("<?php $a = ;")
+    # The worker survives syntax errors.
+    assert parse("html") == [Stmt_InlineHTML(value="html")]
+
+
+def test_no_temporary_files_left_behind(tmp_path, monkeypatch):
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    programs = Path(__file__).parent / "programs"
+    for path in programs.glob("*.php"):
+        source = path.read_text()
+        assert parse(source) == parse_oneshot(source)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parse_many(tmp_path):
+    paths = []
+    for i, source in enumerate(["a", "<?php $a = ;", "b", "c"]):
+        path = tmp_path / f"{i}.php"
+        path.write_text(source)
+        paths.append(path)
+    paths.append(tmp_path / "missing.php")
+
+    results = list(parse_many(paths, chunk_size=2))
+
+    assert [path for path, _ in results] == paths
+    assert results[0][1] == [Stmt_InlineHTML(value="a")]
+    assert isinstance(results[1][1], ParseError)
+    assert results[2][1] == [Stmt_InlineHTML(value="b")]
+    assert results[3][1] == [Stmt_InlineHTML(value="c")]
+    assert isinstance(results[4][1], OSError)
@@ -0,0 +1,22 @@
+from php2py.parser import NODE_SPECS
+from php2py.php_ast import Expr_BinaryOp_Concat, Expr_Variable, Node, Scalar_String
+
+
+def test_nodes_are_slotted():
+    for spec in NODE_SPECS.values():
+        assert "__dict__" not in dir(spec.cls), spec.cls
+        assert spec.cls.__match_args__ == spec.fields
+
+
+def test_pattern_matching():
+    node = Expr_BinaryOp_Concat(Scalar_String("a"), Expr_Variable("b"), lineno=12)
+
+    match node:
+        case Expr_BinaryOp_Concat(Scalar_String(value), Expr_Variable(name)):
+            assert (value, name) == ("a", "b")
+        case _:
+            raise AssertionError()
+
+    assert node._lineno == 12
+    assert node == Expr_BinaryOp_Concat(Scalar_String("a"), Expr_Variable("b"))
+    assert isinstance(node, Node)
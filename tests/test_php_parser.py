@@ -0,0 +1,244 @@
+import difflib
+import shutil
+from pathlib import Path
+
+import attr
+import pytest
+
+from php2py import php_parser
+from php2py.ast_utils import walk
+from php2py.parser import ParseError, parse
+from php2py.php_ast import (
+    Arg,
+    Expr_Array,
+    Expr_ArrayItem,
+    Expr_Assign,
+    Expr_BinaryOp_Concat,
+    Expr_BinaryOp_Plus,
+    Expr_BooleanNot,
+    Expr_FuncCall,
+    Expr_List,
+    Expr_Variable,
+    Name,
+    Node,
+    Scalar_Encapsed,
+    Scalar_EncapsedStringPart,
+    Scalar_LNumber,
+    Scalar_String,
+    Stmt_Else,
+    Stmt_Expression,
+    Stmt_If,
+    Stmt_InlineHTML,
+    Stmt_Namespace,
+    Stmt_Nop,
+)
+from php2py.recursion import deep_recursion
+
+TESTS_DIR = Path(__file__).parent
+
+# Snippets exercising the corners of the grammar, checked against nikic.
+TRICKY_SNIPPETS = [
+    "<?php $a = $b ?: $c ?? $d; $e = $f ? 1 : ($g ? 2 : 3);",
+    "<?php !$a = f(); $b = -2 ** 2; $c = 'x' . 1 + 2;",
+    "<?php [$a, [$b, , $c]] = f(); list('k' => $d) = $e;",
+    "<?php foreach ($a as $k => [$v, $w]) {} foreach ($a as &$v);",
+    '<?php echo "a $b {$c->d} ${e} ${f[1]} $g[0] $h[-1] $i[k] $j->k";',
+    '<?php echo "\\x41\\u{41}\\101\\e\\$\\"\\q", "\\xc3\\xa9";',
+    "<?php $x = <<<EOT\n  a $b\n   c\n  EOT;\n$y = <<<'EOT'\nraw $b\\n\nEOT;\n",
+    "<?php $a->b->c()[0]::D; A::$b; A::{$c}(); $a?->b(); new $a->b(1);",
+    (
+        "<?php $f = fn($x) => $x + 1;"
+        " $g = static function &(int ...$a) use (&$b): ?int {};"
+    ),
+    "<?php echo match($a) { 1, 2 => 'x', default => 'y', };",
+    "<?php if ($a): ?>x<?php elseif ($b): ?>y<?php else: ?>z<?php endif; ?>",
+    "<?php switch ($a) { case 1; case 2: break; default: }",
+    "<?php namespace A\\B; use C\\{D, function e, const F}; use function G\\h;",
+    (
+        "<?php #[A(1)] final class C extends B implements I { use T { a as protected b; }"
+        " public const X = 1; private ?int $y = null, $z;"
+        " abstract public static function f(): static; }"
+    ),
+    "<?php enum Suit: string implements I { case Hearts = 'H'; }",
+    "<?php $a = (int) $b . (string) 1.5e3 . 0x1F . 0b11 . 017 . 1_000;",
+    "<?php $a = 9999999999999999999 . 1e400;",
+    "<?php try {} catch (A | B $e) {} catch (C) {} finally {}",
+    "<?php a: goto a; declare(strict_types=1); global $a; static $c = 1, $d;",
+    "<?php $a = `ls $b`; exit; die(1); print $a and $b; $x = yield $a => $b;",
+    "<?php if ($a) {} else if ($b) {} // c\n",
+    "<?php\n// a\n;\n$a = 1;\n/* b */\n",
+]
+
+
+# Nested deeper than the recursion limit allows without a larger stack.
+DEPTH = 5000
+DEEP_SNIPPETS = {
+    "arrays": "<?php $a = " + "[" * DEPTH + "1" + "]" * DEPTH + ";",
+    "parentheses": "<?php $a = " + "(" * DEPTH + "1" + " + 1)" * DEPTH + ";",
+    "calls": "<?php $a = " + "f(" * DEPTH + "1" + ")" * DEPTH + ";",
+}
+
+
+def dump(nodes) -> str:
+    """Dump an AST, one field per line, with line numbers."""
+    lines = []
+
+    def visit(value, indent, prefix):
+        pad = "  " * indent
+        if isinstance(value, Node):
+            lines.append(f"{pad}{prefix}{type(value).__name__} @{value._lineno}")
+            for field in attr.fields(type(value)):
+                if field.name != "_lineno":
+                    visit(getattr(value, field.name), indent + 1, f"{field.name}: ")
+        elif isinstance(value, list):
+            lines.append(f"{pad}{prefix}[")
+            for item in value:
+                visit(item, indent + 1, "")
+            lines.append(f"{pad}]")
+        else:
+            lines.append(f"{pad}{prefix}{value!r}")
+
+    visit(nodes, 0, "")
+    return "\n".join(lines)
+
+
+def test_statements():
+    php_ast = php_parser.parse("<?php\n$a = 1;\nf($a);\n")
+    arg = Arg(name=None, value=Expr_Variable("a"), byRef=False, unpack=False)
+    assert php_ast == [
+        Stmt_Expression(Expr_Assign(Expr_Variable("a"), Scalar_LNumber(1))),
+        Stmt_Expression(Expr_FuncCall(Name(["f"]), [arg])),
+    ]
+    assert [stmt._lineno for stmt in php_ast] == [2, 3]
+
+
+def test_inline_html():
+    php_ast = php_parser.parse("html <?php // php ?> more html")
+    assert php_ast == [
+        Stmt_InlineHTML(value="html "),
+        Stmt_Nop(),
+        Stmt_InlineHTML(value=" more html"),
+    ]
+
+
+def test_comments_become_nops():
+    php_ast = php_parser.parse("<?php\n// a\n;\n$a = 1;\n/* b\n */\n")
+    assert [type(stmt) for stmt in php_ast] == [Stmt_Nop, Stmt_Expression, Stmt_Nop]
+    assert [stmt._lineno for stmt in php_ast] == [3, 4, 6]
+
+
+def test_precedence():
+    [stmt] = php_parser.parse("<?php !$a = 'x' . 1 + 2;")
+    assert stmt.expr == Expr_BooleanNot(
+        Expr_Assign(
+            Expr_Variable("a"),
+            Expr_BinaryOp_Plus(
+                Expr_BinaryOp_Concat(Scalar_String("x"), Scalar_LNumber(1)),
+                Scalar_LNumber(2),
+            ),
+        )
+    )
+
+
+def test_else_if():
+    [stmt] = php_parser.parse("<?php if ($a) {} else if ($b) {}")
+    assert stmt.elseifs == []
+    assert stmt.else_ == Stmt_Else([Stmt_If(Expr_Variable("b"), [], [], None)])
+
+
+def test_array_destructuring():
+    def item(value):
+        return Expr_ArrayItem(key=None, value=value, byRef=False, unpack=False)
+
+    [stmt] = php_parser.parse("<?php [$a, [$b]] = $c;")
+    assert stmt.expr.var == Expr_List(
+        [item(Expr_Variable("a")), item(Expr_List([item(Expr_Variable("b"))]))]
+    )
+
+
+def test_interpolation():
+    [stmt] = php_parser.parse('<?php echo "a\\t$b[1] {$c}\\x41";')
+    [encapsed] = stmt.exprs
+    assert type(encapsed) is Scalar_Encapsed
+    assert encapsed.parts[0] == Scalar_EncapsedStringPart("a\t")
+    assert encapsed.parts[1].dim == Scalar_LNumber(1)
+    assert encapsed.parts[2] == Scalar_EncapsedStringPart(" ")
+    assert encapsed.parts[3] == Expr_Variable("c")
+    assert encapsed.parts[4] == Scalar_EncapsedStringPart("A")
+
+
+def test_heredoc_indentation():
+    [stmt] = php_parser.parse("<?php $a = <<<EOT\n    x\n      y\n    EOT;\n")
+    assert stmt.expr.expr == Scalar_String("x\n  y")
+
+
+def test_semicolon_namespaces():
+    php_ast = php_parser.parse("<?php namespace A; $a; namespace B; $b;")
+    assert [type(stmt) for stmt in php_ast] == [Stmt_Namespace, Stmt_Namespace]
+    assert [len(stmt.stmts) for stmt in php_ast] == [1, 1]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "<?php $a = ;",
+        "<?php if ($a) {",
+        "<?php $a = 'x",
+        "<?php $a = 09;",
+        '<?php $a = "\\xff";',
+        # No `php_ast` class for `Expr_AssignOp_Pow`.
+        "<?php $a **= 2;",
+    ],
+)
+def test_errors(source):
+    with pytest.raises(ParseError):
+        php_parser.parse(source)
+
+
+@pytest.mark.parametrize("source", DEEP_SNIPPETS.values(), ids=DEEP_SNIPPETS.keys())
+def test_deep_nesting(source):
+    nodes = php_parser.parse(source)
+    depth = sum(
+        isinstance(node, (Expr_Array, Expr_BinaryOp_Plus, Expr_FuncCall))
+        for node in walk(nodes)
+    )
+    assert depth == DEPTH
+
+
+def test_select_parser():
+    assert parse("<?php $a;", parser="python") == php_parser.parse("<?php $a;")
+
+
+def get_conformance_sources():
+    for path in sorted((TESTS_DIR / "programs").glob("*.php")):
+        yield pytest.param(path.read_text(), id=path.name)
+    for path in sorted((TESTS_DIR / "snippets").glob("*.py")):
+        if path.name.startswith("_"):
+            continue
+        ns = {}
+        exec(path.read_bytes(), ns)  # noqa: S102
+        yield pytest.param(ns["PHP"].strip(), id=path.name)
+    for i, source in enumerate(TRICKY_SNIPPETS):
+        yield pytest.param(source, id=f"tricky-{i}")
+
+
+@pytest.mark.skipif(shutil.which("php") is None, reason="PHP is not installed")
+@pytest.mark.parametrize(
+    "source",
+    [
+        *get_conformance_sources(),
+        *(
+            pytest.param(source, id=f"deep-{name}")
+            for name, source in DEEP_SNIPPETS.items()
+        ),
+    ],
+)
+def test_conformance_with_nikic(source):
+    # `dump()` recurses too.
+    expected = deep_recursion(dump, parse(source, parser="nikic"))
+    actual = deep_recursion(dump, parse(source, parser="python"))
+    if actual != expected:
+        diff = difflib.unified_diff(
+            expected.splitlines(), actual.splitlines(), "nikic", "python", lineterm=""
+        )
+        pytest.fail("\n".join(diff), pytrace=False)
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from php2py.pipeline import Pipeline
+
+
+def test_results_in_order():
+    stages = [("double", lambda x: 2 * x), ("inc", lambda x: x + 1)]
+    pipeline = Pipeline(range(100), stages)
+    assert list(pipeline.run()) == [2 * x + 1 for x in range(100)]
+    assert [stats.items for stats in pipeline.stats] == [100, 100, 100, 100]
+
+
+def test_backpressure():
+    produced = []
+
+    def source():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    pipeline = Pipeline(source(), [("id", lambda x: x)], queue_size=2)
+    results = pipeline.run()
+    assert next(results) == 0
+    # Wait for the stages to fill up the queues.
+    for _ in range(3):
+        threading.Event().wait(0.1)
+    # Two queues of 2 items, plus one item in each thread.
+    assert len(produced) <= 7
+    results.close()
+
+
+def test_stage_error_is_reraised():
+    def fail(x):
+        if x == 3:
+            raise RuntimeError("boom")
+        return x
+
+    results = []
+    with pytest.raises(RuntimeError, match="boom"):
+        # Not `list()`, which would drop the results before the error.
+        for result in Pipeline(range(10), [("fail", fail)]).run():
+            results.append(result)  # noqa: PERF402
+    assert results == [0, 1, 2]
+
+
+def test_early_stop_closes_source():
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield from range(1000)
+        finally:
+            closed.set()
+
+    results = Pipeline(source(), [("id", lambda x: x)]).run()
+    assert next(results) == 0
+    results.close()
+    assert closed.is_set()
+
+
+def test_summary():
+    pipeline = Pipeline(range(3), [("translate", str)], "parse", "emit")
+    list(pipeline.run())
+    summary = pipeline.summary()
+    assert summary.startswith("3 items in ")
+    assert "parse " in summary and "translate " in summary and "emit " in summary
@@ -0,0 +1,64 @@
+import json
+import pstats
+
+from php2py.main import main
+from php2py.profiling import Profiler, format_size
+
+
+def test_profile_report(tmp_path, capsys):
+    (tmp_path / "a.php").write_text("<?php $a = 1;")
+    (tmp_path / "b.php").write_text("<?php $b = ;")
+    report_path = tmp_path / "profile.json"
+    cprofile_path = tmp_path / "translate.pstats"
+
+    main(
+        [tmp_path],
+        ignore_errors=True,
+        parser="python",
+        profile_path=report_path,
+        cprofile_path=cprofile_path,
+    )
+
+    report = json.loads(report_path.read_text())
+    assert set(report["phases"]) == {
+        "read",
+        "parse",
+        "translate",
+        "optimize",
+        "unparse",
+        "write",
+    }
+    a, b = report["files"]
+    assert a["file"] == str(tmp_path / "a.php")
+    assert a["error"] is None
+    assert set(a["phases"]) == set(report["phases"])
+    assert a["wall"] == sum(phase["wall"] for phase in a["phases"].values())
+    # The parse error stops the file after the parse phase (and the emit).
+    assert b["error"].startswith("ParseError")
+    assert set(b["phases"]) == {"read", "parse", "write"}
+
+    assert (tmp_path / "a.py").exists()
+    assert "Slowest files (2 of 2)" in capsys.readouterr().out
+    assert pstats.Stats(str(cprofile_path)).total_calls > 0
+
+
+def test_profiler_phases():
+    profiler = Profiler()
+    profiler.start()
+    profiler.begin_file("a.php")
+    with profiler.phase("translate"):
+        data = bytearray(1_000_000)
+    with profiler.phase("translate"):
+        pass
+    profiler.stop()
+    del data
+
+    [file] = profiler.report()["files"]
+    assert file["phases"]["translate"]["peak_memory"] >= 1_000_000
+    assert "a.php" in profiler.summary()
+
+
+def test_format_size():
+    assert format_size(10) == "10 B"
+    assert format_size(1536) == "1.5 KiB"
+    assert format_size(3 * 2**30) == "3.0 GiB"
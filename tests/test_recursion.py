@@ -0,0 +1,44 @@
+import sys
+import threading
+
+from php2py.recursion import RECURSION_LIMIT, call_with_deep_stack, recursion_section
+
+
+def test_deep_stack_waits_for_sections():
+    entered = threading.Event()
+    leave = threading.Event()
+    limits = []
+
+    def section():
+        with recursion_section():
+            entered.set()
+            leave.wait()
+            limits.append(sys.getrecursionlimit())
+
+    thread = threading.Thread(target=section)
+    thread.start()
+    entered.wait()
+    deep = []
+    deep_thread = threading.Thread(
+        target=lambda: deep.append(call_with_deep_stack(sys.getrecursionlimit))
+    )
+    deep_thread.start()
+    # The recursion limit is only raised once the section is over.
+    deep_thread.join(0.2)
+    assert deep_thread.is_alive()
+    leave.set()
+    thread.join()
+    deep_thread.join()
+
+    assert limits == [sys.getrecursionlimit()]
+    assert deep == [RECURSION_LIMIT]
+
+
+def test_deep_stack_in_section():
+    # The section of the calling thread doesn't block it.
+    with recursion_section():
+        assert call_with_deep_stack(sys.getrecursionlimit) == RECURSION_LIMIT
+        # Sections in the deep thread don't wait either.
+        assert call_with_deep_stack(call_with_deep_stack, lambda: 1) == 1
+    with recursion_section():
+        pass
@@ -0,0 +1,48 @@
+from ast import unparse
+
+import pytest
+
+from php2py.php_parser import parse
+from php2py.translator import Translator
+
+
+def translate(source: str) -> str:
+    return unparse(Translator().translate(parse(source))).strip()
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        ('$s = "a" . "b";', "s = 'ab'"),
+        ('$s = "Hello $name!";', "s = f'Hello {name}!'"),
+        ('$s = "<td>" . $a . "</td>";', "s = f'<td>{a}</td>'"),
+        ('$s = $a . ($b . "c");', "s = f'{a}{b}c'"),
+        ('$s = "n=" . 1 . 2.0 . true . false . null;', "s = 'n=121'"),
+        # PHP writes 1e14 as "1.0E+14" (precision 14).
+        ('$s = "n=" . 99999999999999.0;', "s = 'n=99999999999999'"),
+        ('$s = "n=" . 1e14;', "s = f'n={100000000000000.0}'"),
+        ('$s = "n=" . -1e14;', "s = f'n={-100000000000000.0}'"),
+        ('$s = "{" . $a . "}";', "s = f'{{{a}}}'"),
+        ('$s = "{$o->p} and {$a[1]}";', "s = f'{o.p} and {a[1]}'"),
+        ("$s = $a + $b . $c;", "s = f'{a + b}{c}'"),
+        ('$s = "a" . f(1);', "s = f'a{f(1)}'"),
+        # Not writable in an f-string before Python 3.12.
+        ('$s = "a" . f("\\n");', "s = ''.join(['a', str(f('\\n'))])"),
+        ('$s = "a" . f("b" . $c);', "s = ''.join(['a', str(f(f'b{c}'))])"),
+    ],
+)
+def test_concatenation(source, expected):
+    assert translate(f"<?php {source}") == expected
+
+
+def test_generated_code_runs():
+    code = translate(
+        """<?php
+        function row($id, $name) {
+            return "<tr><td>$id</td>" . "<td>" . $name . "</td>" . 1 . "</tr>";
+        }
+        """
+    )
+    namespace = {}
+    exec(code, namespace)  # noqa: S102
+    assert namespace["row"](7, "x") == "<tr><td>7</td><td>x</td>1</tr>"
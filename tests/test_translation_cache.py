@@ -0,0 +1,102 @@
+import io
+import json
+from ast import unparse
+
+import pytest
+
+from php2py import translation_cache
+from php2py.cache import ParseCache
+from php2py.emitter import write_translation
+from php2py.main import main
+from php2py.php_parser import parse
+from php2py.translation_cache import structural_key
+from php2py.translator import Translator
+
+SOURCE = """<?php
+namespace App;
+$greeting = "hello";
+function f($x) { return $x + 1; }
+class A {
+    const B = 1;
+    function m() { return f(2); }
+}
+interface I {}
+echo f(1);
+"""
+
+
+class CountingTranslator(Translator):
+    def __init__(self):
+        self.translated = []
+
+    def translate(self, node):
+        self.translated.append(node.__class__.__name__)
+        return super().translate(node)
+
+
+def convert(source: str, cache: ParseCache, translator=None) -> str:
+    output = io.StringIO()
+    write_translation(parse(source), output, translator, cache)
+    return output.getvalue()
+
+
+def test_structural_key_ignores_positions():
+    a = parse("<?php\nfunction f($x) { return $x; }")[0]
+    b = parse("<?php\n\n\n  function f($x) {\n return $x;\n}")[0]
+    c = parse("<?php\nfunction f($y) { return $y; }")[0]
+    assert a._lineno != b._lineno
+    assert structural_key(a) == structural_key(b)
+    assert structural_key(a) != structural_key(c)
+
+
+@pytest.mark.parametrize("runs", [1, 2])
+def test_output_identical_to_unparse(tmp_path, runs):
+    cache = ParseCache(tmp_path)
+    expected = unparse(Translator().translate(parse(SOURCE)))
+    for _ in range(runs):
+        assert convert(SOURCE, cache) == expected
+
+
+def test_only_changed_declarations_are_translated(tmp_path):
+    cache = ParseCache(tmp_path)
+    convert(SOURCE, cache)
+    # The function, class and interface.
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    changed = SOURCE.replace("return f(2);", "return f(3);")
+    translator = CountingTranslator()
+    output = convert(changed, cache, translator)
+
+    assert output == unparse(Translator().translate(parse(changed)))
+    assert (cache.hits, cache.misses) == (2, 4)
+    assert "Stmt_Class" in translator.translated
+    assert "Stmt_Function" not in translator.translated
+    assert "Stmt_Interface" not in translator.translated
+
+
+def test_profile_report_has_cache_hit_rates(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(
+        translation_cache, "translation_cache_dir", lambda: tmp_path / "cache"
+    )
+    source_dir = tmp_path / "src"
+    source_dir.mkdir()
+    (source_dir / "a.php").write_text(SOURCE)
+    report_path = tmp_path / "profile.json"
+
+    for _ in range(2):
+        main(
+            [source_dir],
+            ignore_errors=False,
+            parser="python",
+            profile_path=report_path,
+            use_translation_cache=True,
+        )
+
+    report = json.loads(report_path.read_text())
+    assert report["caches"] == {
+        "translation": {"hits": 3, "misses": 0, "hit_rate": 1.0}
+    }
+    assert (source_dir / "a.py").read_text() == unparse(
+        Translator().translate(parse(SOURCE))
+    )
+    assert "translation         3        0      100%" in capsys.readouterr().out
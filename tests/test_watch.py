@@ -0,0 +1,84 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from php2py.discovery import OutputLayout
+from php2py.watch import InotifyWatcher, PollingWatcher, WatchSession
+
+WATCHERS = [PollingWatcher]
+if sys.platform == "linux":
+    WATCHERS.append(InotifyWatcher)
+
+
+def wait_for_changes(watcher, timeout=3.0) -> set[Path]:
+    changed = set()
+    deadline = time.monotonic() + timeout
+    while not changed and time.monotonic() < deadline:
+        changed = watcher.wait(0.2)
+    # Let the burst settle, as the debouncing does.
+    while more := watcher.wait(0.2):
+        changed |= more
+    return changed
+
+
+@pytest.mark.parametrize("watcher_class", WATCHERS)
+def test_watcher(tmp_path, watcher_class):
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "a.php").write_text("<?php $a = 1;")
+    watcher = watcher_class([tmp_path], ["*.php"], ["vendor/"])
+    try:
+        # mtime granularity: make sure the polling watcher sees a new one.
+        time.sleep(0.01)
+        (tmp_path / "a.php").write_text("<?php $a = 2;")
+        (tmp_path / "notes.txt").write_text("")
+        (tmp_path / "vendor" / "v.php").write_text("<?php $v = 1;")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.php").write_text("<?php $b = 1;")
+
+        assert wait_for_changes(watcher) == {
+            tmp_path / "a.php",
+            tmp_path / "sub" / "b.php",
+        }
+        assert watcher.wait(0.1) == set()
+    finally:
+        watcher.close()
+
+
+def test_session(tmp_path, capsys):
+    source = tmp_path / "a.php"
+    source.write_text("<?php $a = 1;")
+    session = WatchSession(OutputLayout([tmp_path], tmp_path / "out"), "python")
+
+    latency = session.convert(source)
+    assert latency is not None and latency >= 0
+    assert (tmp_path / "out" / "a.py").read_text().strip() == "a = 1"
+
+    # Saving again without changes doesn't convert the file again.
+    source.touch()
+    assert session.convert(source) is None
+
+    source.write_text("<?php $a = ;")
+    assert session.convert(source) is not None
+    assert "Error transpiling file." in capsys.readouterr().out
+    # The error doesn't mark the new source as converted.
+    assert session.convert(source) is not None
+
+    source.unlink()
+    assert session.convert(source) is None
+
+
+def test_session_survives_translator_bugs(tmp_path, capsys):
+    bad = tmp_path / "bad.php"
+    # Not a conversion error: an assertion in the translator.
+    bad.write_text("<?php for (;$a, $b;) {}")
+    good = tmp_path / "good.php"
+    good.write_text("<?php $a = 1;")
+    session = WatchSession(OutputLayout([tmp_path], tmp_path / "out"), "python")
+
+    assert session.convert(bad) is not None
+    assert "AssertionError" in capsys.readouterr().out
+    assert not (tmp_path / "out" / "bad.py").exists()
+    assert session.convert(good) is not None
+    assert (tmp_path / "out" / "good.py").read_text().strip() == "a = 1"